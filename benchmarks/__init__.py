@@ -0,0 +1,7 @@
+"""
+Benchmarks for the hot paths, run against a deterministic synthetic corpus.
+
+Usage:
+    python -m benchmarks.run --scales 1k,100k --output before.json
+    python -m benchmarks.compare before.json after.json
+"""
@@ -0,0 +1,50 @@
+"""
+Compares two benchmark result files.
+
+Usage:
+    python -m benchmarks.compare BASELINE.json CURRENT.json [--threshold 0.10]
+
+Exits with 1 when any benchmark's throughput dropped by more than the
+threshold (a fraction of the baseline).
+"""
+import argparse
+import json
+import sys
+
+
+def load(path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    return {(r["name"], r["scale"]): r for r in report["results"]}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed throughput drop (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    baseline = load(args.baseline)
+    current = load(args.current)
+
+    regressed = False
+    for key in sorted(baseline.keys() & current.keys()):
+        old = baseline[key]["ops_per_sec"]
+        new = current[key]["ops_per_sec"]
+        if not old or not new:
+            continue
+        ratio = new / old
+        slower = ratio < 1 - args.threshold
+        regressed |= slower
+        name, scale = key
+        print(f"{'SLOWER' if slower else 'ok    '} {name:32} {scale:>9} {old:>12,.0f} -> {new:>12,.0f} ops/s ({ratio:.2f}x)")
+
+    for key in sorted(baseline.keys() ^ current.keys()):
+        print(f"only in {'baseline' if key in baseline else 'current'}: {key[0]} @ {key[1]}")
+
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
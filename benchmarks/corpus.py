@@ -0,0 +1,234 @@
+"""
+Deterministic synthetic media corpus.
+
+Every file is built by hand from a fixed seed, so the same (seed, count)
+always produces byte-identical files on any machine. Files are tiny:
+they carry the headers the analyzers look at, not real image data.
+"""
+import os
+import random
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+
+
+# Share of each kind of file in a generated corpus
+DEFAULT_MIX = {
+    "jpeg_exif": 0.55,
+    "jpeg_plain": 0.10,
+    "png": 0.10,
+    "heic": 0.05,
+    "mp4_faststart": 0.10,
+    "mov_tail": 0.10,
+}
+
+# Filename styles seen in real libraries; {} fields come from the date
+NAME_STYLES = [
+    ("IMG_{:%Y%m%d_%H%M%S}", 0.30),
+    ("PXL_{:%Y%m%d_%H%M%S}{ms:03d}", 0.10),
+    ("IMG-{:%Y%m%d}-WA{seq:04d}", 0.10),
+    ("Screenshot_{:%Y-%m-%d-%H-%M-%S}", 0.05),
+    ("{:%Y-%m-%d %H.%M.%S}", 0.10),
+    ("VID_{:%Y%m%d_%H%M%S}", 0.05),
+    ("DSC{seq:05d}", 0.15),
+    ("holiday {word} {seq}", 0.10),
+    ("{:%d-%m-%Y}_{word}", 0.05),
+]
+
+WORDS = ["beach", "party", "family", "scan", "export", "edit", "final", "copy"]
+
+_MAC_EPOCH = datetime(1904, 1, 1, tzinfo=timezone.utc)
+_START = datetime(2005, 1, 1)
+_SPAN_SECONDS = 20 * 365 * 86400
+
+
+# -------------------------------------------------
+# JPEG
+# -------------------------------------------------
+def _segment(marker: int, payload: bytes) -> bytes:
+    return struct.pack(">BBH", 0xFF, marker, len(payload) + 2) + payload
+
+
+def minimal_jpeg(app_segments: bytes = b"") -> bytes:
+    """
+    A valid 8x8 grayscale baseline JPEG (one flat block).
+    The Huffman tables hold a single code each, so the whole scan is the
+    bits "00" (DC diff 0, end of block) padded with ones: 0x3F.
+    """
+    dqt = _segment(0xDB, b"\x00" + b"\x01" * 64)
+    sof = _segment(0xC0, struct.pack(">BHHB", 8, 8, 8, 1) + b"\x01\x11\x00")
+    dht_dc = _segment(0xC4, b"\x00" + b"\x01" + b"\x00" * 15 + b"\x00")
+    dht_ac = _segment(0xC4, b"\x10" + b"\x01" + b"\x00" * 15 + b"\x00")
+    sos = _segment(0xDA, b"\x01\x01\x00\x00\x3f\x00")
+    return b"\xff\xd8" + app_segments + dqt + sof + dht_dc + dht_ac + sos + b"\x3f" + b"\xff\xd9"
+
+
+def tiff_exif(taken=None, digitized=None, modified=None) -> bytes:
+    """Little-endian TIFF block with IFD0 DateTime and Exif-IFD date tags."""
+    def ascii_date(value):
+        return value.strftime("%Y:%m:%d %H:%M:%S").encode() + b"\x00"
+
+    ifd0_tags = []
+    if modified is not None:
+        ifd0_tags.append((0x0132, ascii_date(modified)))
+    exif_tags = []
+    if taken is not None:
+        exif_tags.append((0x9003, ascii_date(taken)))
+    if digitized is not None:
+        exif_tags.append((0x9004, ascii_date(digitized)))
+
+    # Layout: header, IFD0, Exif IFD, then the 20-byte values
+    ifd0_count = len(ifd0_tags) + 1
+    ifd0_offset = 8
+    exif_offset = ifd0_offset + 2 + ifd0_count * 12 + 4
+    data_offset = exif_offset + 2 + len(exif_tags) * 12 + 4
+
+    values = b""
+
+    def entries(tags):
+        nonlocal values
+        out = b""
+        for tag, value in tags:
+            out += struct.pack("<HHII", tag, 2, len(value), data_offset + len(values))
+            values += value
+        return out
+
+    ifd0 = struct.pack("<H", ifd0_count) + entries(ifd0_tags)
+    ifd0 += struct.pack("<HHII", 0x8769, 4, 1, exif_offset) + b"\x00" * 4
+    exif = struct.pack("<H", len(exif_tags)) + entries(exif_tags) + b"\x00" * 4
+
+    return b"II*\x00" + struct.pack("<I", ifd0_offset) + ifd0 + exif + values
+
+
+def exif_jpeg(taken, digitized=None, modified=None) -> bytes:
+    tiff = tiff_exif(taken, digitized or taken, modified or taken)
+    return minimal_jpeg(_segment(0xE1, b"Exif\x00\x00" + tiff))
+
+
+# -------------------------------------------------
+# PNG / HEIC-LIKE
+# -------------------------------------------------
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def minimal_png(exif_date=None) -> bytes:
+    """1x1 grayscale PNG, with an eXIf chunk when `exif_date` is given."""
+    png = b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 0, 0, 0, 0))
+    if exif_date is not None:
+        png += _png_chunk(b"eXIf", tiff_exif(exif_date, exif_date, exif_date))
+    return png + _png_chunk(b"IDAT", zlib.compress(b"\x00\x00")) + _png_chunk(b"IEND", b"")
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", len(payload) + 8, kind) + payload
+
+
+def heic_like(exif_date=None) -> bytes:
+    """
+    ftyp + meta + mdat: enough for the HEIC code paths to walk. With
+    `exif_date` the meta box lists an Exif item (iinf/iloc) stored in mdat.
+    """
+    ftyp = _box(b"ftyp", b"heic\x00\x00\x00\x00mif1heic")
+    hdlr = _box(b"hdlr", b"\x00" * 8 + b"pict" + b"\x00" * 13)
+    if exif_date is None:
+        meta = _box(b"meta", b"\x00\x00\x00\x00" + hdlr)
+        return ftyp + meta + _box(b"mdat", b"\x00" * 64)
+
+    # Exif item: offset of the TIFF header past the "Exif\0\0" prefix, then TIFF
+    item = struct.pack(">I", 6) + b"Exif\x00\x00" + tiff_exif(exif_date, exif_date, exif_date)
+    # infe version 2: item 1, no protection, type "Exif", empty name
+    infe = _box(b"infe", b"\x02\x00\x00\x00" + struct.pack(">HH", 1, 0) + b"Exif\x00")
+    iinf = _box(b"iinf", b"\x00\x00\x00\x00" + struct.pack(">H", 1) + infe)
+
+    def iloc(offset):
+        # Version 0, 4-byte offsets and lengths, one item with one extent
+        return _box(b"iloc", b"\x00\x00\x00\x00\x44\x00" + struct.pack(">HHHHII", 1, 1, 0, 1, offset, len(item)))
+
+    meta_size = len(_box(b"meta", b"\x00\x00\x00\x00" + hdlr + iinf + iloc(0)))
+    # The item is the first thing in mdat, right after its 8-byte header
+    meta = _box(b"meta", b"\x00\x00\x00\x00" + hdlr + iinf + iloc(len(ftyp) + meta_size + 8))
+    return ftyp + meta + _box(b"mdat", item + b"\x00" * 64)
+
+
+# -------------------------------------------------
+# MP4 / MOV
+# -------------------------------------------------
+def bmff_movie(created: datetime, brand: bytes = b"isom", moov_at_end=False, mdat_size=256) -> bytes:
+    """ftyp + moov(mvhd, trak/tkhd) + mdat, moov before or after mdat."""
+    seconds = int((created.replace(tzinfo=timezone.utc) - _MAC_EPOCH).total_seconds())
+    mvhd = _box(b"mvhd", b"\x00\x00\x00\x00" + struct.pack(">IIII", seconds, seconds, 1000, 0) + b"\x00" * 80)
+    tkhd = _box(b"tkhd", b"\x00\x00\x00\x07" + struct.pack(">II", seconds, seconds) + b"\x00" * 72)
+    moov = _box(b"moov", mvhd + _box(b"trak", tkhd))
+    ftyp = _box(b"ftyp", brand + b"\x00\x00\x02\x00" + brand)
+    mdat = _box(b"mdat", b"\x00" * mdat_size)
+    return ftyp + (mdat + moov if moov_at_end else moov + mdat)
+
+
+# -------------------------------------------------
+# CORPUS
+# -------------------------------------------------
+def random_date(rng: random.Random) -> datetime:
+    return _START + timedelta(seconds=rng.randrange(_SPAN_SECONDS))
+
+
+def random_name(rng: random.Random, date: datetime, seq: int) -> str:
+    styles, weights = zip(*NAME_STYLES)
+    style = rng.choices(styles, weights)[0]
+    return style.format(date, ms=rng.randrange(1000), seq=seq, word=rng.choice(WORDS))
+
+
+def filename_mix(count: int, seed: int = 0) -> list:
+    """`count` realistic file names (without extension), deterministic for `seed`."""
+    rng = random.Random(seed)
+    return [random_name(rng, random_date(rng), i) for i in range(count)]
+
+
+def build_file(kind: str, date: datetime):
+    """Returns (extension, bytes) for one corpus file of `kind`."""
+    if kind == "jpeg_exif":
+        return ".jpg", exif_jpeg(date)
+    if kind == "jpeg_plain":
+        return ".jpg", minimal_jpeg()
+    if kind == "png":
+        return ".png", minimal_png()
+    if kind == "heic":
+        return ".heic", heic_like(date)
+    if kind == "mp4_faststart":
+        return ".mp4", bmff_movie(date)
+    if kind == "mov_tail":
+        return ".mov", bmff_movie(date, brand=b"qt  ", moov_at_end=True)
+    raise ValueError(f"Unknown corpus file kind: {kind}")
+
+
+def generate_corpus(root: str, count: int, seed: int = 0, mix=None, per_folder: int = 1000) -> list:
+    """
+    Writes `count` files under `root`, `per_folder` per subfolder, and
+    returns their paths in creation order. Re-running with the same
+    arguments reproduces the same tree; existing files are overwritten.
+    """
+    mix = mix or DEFAULT_MIX
+    kinds, weights = zip(*mix.items())
+    rng = random.Random(seed)
+    base_time = _START.timestamp()
+
+    paths = []
+    for i in range(count):
+        folder = os.path.join(root, f"{i // per_folder:05d}")
+        if i % per_folder == 0:
+            os.makedirs(folder, exist_ok=True)
+
+        date = random_date(rng)
+        kind = rng.choices(kinds, weights)[0]
+        extension, data = build_file(kind, date)
+        # Suffix keeps names unique when two files share a date
+        path = os.path.join(folder, f"{random_name(rng, date, i)}_{i}{extension}")
+
+        with open(path, "wb") as f:
+            f.write(data)
+        # Fixed file times so filesystem dates are reproducible too
+        stamp = base_time + i
+        os.utime(path, (stamp, stamp))
+        paths.append(path)
+
+    return paths
@@ -0,0 +1,75 @@
+"""
+Simulates a high-latency network file system on a local disk.
+
+    with LatencyShim(0.005):
+        ...  # every open, stat and read now costs 5 ms more
+
+Patches builtins.open, os.stat and os.fstat for the current process, so
+it only affects code running in-process (workers=1 or the prefetch
+mode), not the analysis process pool. The delay is a sleep, which
+releases the GIL like a real network wait does, so concurrent requests
+overlap the way they would against an SMB/NFS server.
+"""
+import builtins
+import os
+import time
+
+
+class _SlowFile:
+    """Wraps an open file so every read call costs one round trip."""
+
+    def __init__(self, f, delay):
+        self._f = f
+        self._delay = delay
+
+    def read(self, *args):
+        time.sleep(self._delay)
+        return self._f.read(*args)
+
+    def readinto(self, buffer):
+        time.sleep(self._delay)
+        return self._f.readinto(buffer)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._f.close()
+        return False
+
+    def __iter__(self):
+        return iter(self._f)
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+class LatencyShim:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._saved = None
+
+    def __enter__(self):
+        real_open, real_stat, real_fstat = builtins.open, os.stat, os.fstat
+        self._saved = real_open, real_stat, real_fstat
+        delay = self.delay
+
+        def slow_open(file, mode="r", *args, **kwargs):
+            time.sleep(delay)
+            f = real_open(file, mode, *args, **kwargs)
+            return _SlowFile(f, delay) if "r" in mode else f
+
+        def slow_stat(*args, **kwargs):
+            time.sleep(delay)
+            return real_stat(*args, **kwargs)
+
+        def slow_fstat(fd):
+            time.sleep(delay)
+            return real_fstat(fd)
+
+        builtins.open, os.stat, os.fstat = slow_open, slow_stat, slow_fstat
+        return self
+
+    def __exit__(self, *exc):
+        builtins.open, os.stat, os.fstat = self._saved
+        return False
@@ -0,0 +1,339 @@
+"""
+Runs the benchmark suite and writes machine-readable results.
+
+Usage:
+    python -m benchmarks.run [--scales 1k,100k,1M] [--only NAME ...] [--output results.json]
+
+Each benchmark reports the best of --repeat runs as seconds and
+operations per second. Results are JSON so two commits can be compared
+with benchmarks.compare.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from .corpus import filename_mix, generate_corpus, random_date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RENAME_RULES = {
+    "use_exif": True,
+    "use_filename": True,
+    "use_earliest": False,
+    "offset_hours": 1,
+    "manual_date": None,
+    "enable_rename": True,
+    "date_format": "YYYYMMDD_HHMMSS",
+    "prefix": "IMG_",
+    "suffix": "",
+    "name_template": "",
+    "output_dir": "",
+}
+
+FOLDER_TEMPLATE = "{date:%Y/%m}/{date:%Y%m%d_%H%M%S}_{seq:04}{ext}"
+
+_SCALE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_scale(text: str) -> int:
+    text = text.strip().lower()
+    if text and text[-1] in _SCALE_SUFFIXES:
+        return int(float(text[:-1]) * _SCALE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+# -------------------------------------------------
+# BENCHMARKS
+# -------------------------------------------------
+# Each setup(scale, ctx) returns a callable doing `scale` operations.
+# Setup time is not measured.
+
+def bench_extract_date(scale, ctx):
+    from src.utils.filename_parser import FilenameParser
+
+    names = [name + ".jpg" for name in filename_mix(scale, ctx.seed)]
+
+    def run():
+        # Start cold: repeats would otherwise only measure memo hits
+        FilenameParser._days.clear()
+        extract = FilenameParser.extract_date
+        for name in names:
+            extract(name)
+    return run
+
+
+def _metas(scale, seed):
+    import random
+    from src.models.metadata_model import FileMetadata
+
+    rng = random.Random(seed)
+    metas = []
+    for i, name in enumerate(filename_mix(scale, seed)):
+        taken = random_date(rng) if rng.random() < 0.7 else None
+        metas.append(FileMetadata(
+            file_path=f"/corpus/{i // 1000:05d}/{name}.jpg",
+            filename=f"{name}.jpg",
+            extension=".jpg",
+            exif_date_taken=taken,
+            exif_date_digitized=taken,
+            file_system_created=random_date(rng),
+            file_system_modified=random_date(rng),
+            filename_date=random_date(rng) if rng.random() < 0.5 else None,
+        ))
+    return metas
+
+
+def bench_apply_rules(scale, ctx):
+    from src.controllers.processing_controller import ProcessingController
+
+    processor = ProcessingController()
+    metas = _metas(scale, ctx.seed)
+
+    def run():
+        for meta in metas:
+            processor.apply_rules(meta, RENAME_RULES)
+    return run
+
+
+def bench_render_template(scale, ctx):
+    import random
+    from src.utils.rename_template import RenameTemplate
+
+    rng = random.Random(ctx.seed)
+    dates = [random_date(rng) for _ in range(scale)]
+
+    def run():
+        # A fresh template so the per-day cache starts cold
+        render = RenameTemplate(FOLDER_TEMPLATE).render
+        for seq, date in enumerate(dates, 1):
+            render(date, ".jpg", "IMG_0001", "exif", seq)
+    return run
+
+
+def bench_batch_rules(scale, ctx):
+    from src.controllers.batch_rules import BatchRuleEvaluator
+    from src.controllers.processing_controller import ProcessingController
+    from src.models.metadata_store import MetadataStore
+
+    store = MetadataStore(_metas(scale, ctx.seed))
+
+    def run():
+        # A fresh evaluator so every run is a full (not incremental) pass
+        evaluator = BatchRuleEvaluator(ProcessingController())
+        evaluator.evaluate(store, RENAME_RULES)
+        # Names are lazy; format them as the table would
+        for i in range(len(store)):
+            store._proposed_filename(i)
+    return run
+
+
+def bench_scan_folder(scale, ctx):
+    from src.utils.file_utils import FileUtils
+
+    root = ctx.corpus(scale)
+
+    def run():
+        FileUtils.scan_folder(root, recursive=True)
+    return run
+
+
+def bench_analyze_file(scale, ctx):
+    from src.controllers.processing_controller import ProcessingController
+
+    ctx.corpus(scale)
+    paths = ctx.paths
+    processor = ProcessingController()
+
+    def run():
+        for path in paths:
+            processor.analyze_file(path)
+    return run
+
+
+def bench_update_metadata(scale, ctx):
+    from src.utils.exif_handler import ExifHandler
+
+    source = ctx.corpus(scale)
+    work = os.path.join(ctx.work_dir, f"update-{scale}")
+    shutil.rmtree(work, ignore_errors=True)
+    shutil.copytree(source, work)
+    paths = [os.path.join(work, os.path.relpath(path, source)) for path in ctx.paths]
+    new_date = datetime(2024, 2, 29, 12, 0, 0)
+
+    def run():
+        for path in paths:
+            ExifHandler.update_metadata(path, new_date)
+    return run
+
+
+def _analyze_with_latency(scale, ctx, concurrency):
+    from src.controllers.processing_controller import ProcessingController
+    from src.utils.prefetch import Prefetcher
+    from .latency import LatencyShim
+
+    ctx.corpus(scale)
+    paths = ctx.paths
+
+    def run():
+        processor = ProcessingController()
+        with LatencyShim(ctx.latency_ms / 1000):
+            if not concurrency:
+                processor.analyze_many(paths, workers=1)
+                return
+            with Prefetcher(concurrency) as prefetcher:
+                processor.analyze_many(paths, workers=1, prefetcher=prefetcher)
+    return run
+
+
+def bench_analyze_serial_latency(scale, ctx):
+    return _analyze_with_latency(scale, ctx, 0)
+
+
+def bench_analyze_prefetch_latency(scale, ctx):
+    return _analyze_with_latency(scale, ctx, ctx.concurrency)
+
+
+BENCHMARKS = {
+    "filename_parser.extract_date": bench_extract_date,
+    "processing.apply_rules": bench_apply_rules,
+    "rename_template.render": bench_render_template,
+    "batch_rules.evaluate": bench_batch_rules,
+    "file_utils.scan_folder": bench_scan_folder,
+    "processing.analyze_file": bench_analyze_file,
+    "exif_handler.update_metadata": bench_update_metadata,
+    "latency.analyze_serial": bench_analyze_serial_latency,
+    "latency.analyze_prefetch": bench_analyze_prefetch_latency,
+}
+
+
+class Context:
+    """Shared state: the on-disk corpus is generated once per scale and reused."""
+
+    def __init__(self, corpus_dir, seed, latency_ms=1.0, concurrency=32):
+        self.corpus_dir = corpus_dir
+        self.seed = seed
+        self.latency_ms = latency_ms
+        self.concurrency = concurrency
+        self.work_dir = tempfile.mkdtemp(prefix="exif-bench-")
+        self.paths = []
+        self._scale = None
+
+    def corpus(self, scale) -> str:
+        root = os.path.join(self.corpus_dir, f"seed{self.seed}-{scale}")
+        if self._scale == scale:
+            return root
+
+        marker = os.path.join(root, "corpus.json")
+        try:
+            with open(marker, "r", encoding="utf-8") as f:
+                self.paths = [os.path.join(root, p) for p in json.load(f)["paths"]]
+        except (OSError, ValueError, KeyError):
+            print(f"Generating {scale} corpus files in {root}...", file=sys.stderr)
+            shutil.rmtree(root, ignore_errors=True)
+            self.paths = generate_corpus(root, scale, self.seed)
+            with open(marker, "w", encoding="utf-8") as f:
+                json.dump({"paths": [os.path.relpath(p, root) for p in self.paths]}, f)
+
+        self._scale = scale
+        return root
+
+    def close(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def measure(setup, scale, ctx, repeat):
+    run = setup(scale, ctx)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {
+        "seconds": best,
+        "ops_per_sec": scale / best if best > 0 else None,
+        "runs": timings,
+    }
+
+
+def environment(seed) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": seed,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", default="1k", help="Comma separated, e.g. 1k,100k,1M")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the best is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--corpus-dir", default=os.path.join(tempfile.gettempdir(), "exif-date-fixer-corpus"),
+        help="Where generated corpora are kept between runs",
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=1.0,
+        help="Simulated per-request latency of the latency.* benchmarks",
+    )
+    parser.add_argument("--concurrency", type=int, default=32, help="Prefetch concurrency of latency.analyze_prefetch")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    scales = [parse_scale(s) for s in args.scales.split(",") if s.strip()]
+    names = args.only or list(BENCHMARKS)
+    ctx = Context(args.corpus_dir, args.seed, args.latency_ms, args.concurrency)
+
+    results = []
+    try:
+        for scale in scales:
+            for name in names:
+                # update_metadata writes, so it only gets one pass per copy
+                repeat = 1 if name == "exif_handler.update_metadata" else args.repeat
+                try:
+                    result = measure(BENCHMARKS[name], scale, ctx, repeat)
+                except ImportError as e:
+                    print(f"SKIP {name} @ {scale}: {e}", file=sys.stderr)
+                    continue
+                results.append({"name": name, "scale": scale, **result})
+                print(
+                    f"{name:32} {scale:>9} {result['seconds']:9.3f} s "
+                    f"{result['ops_per_sec']:>12,.0f} ops/s",
+                    file=sys.stderr,
+                )
+    finally:
+        ctx.close()
+
+    env = environment(args.seed)
+    env.update(latency_ms=args.latency_ms, concurrency=args.concurrency)
+    report = json.dumps({"environment": env, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,38 @@
 import sys
-from PyQt6.QtWidgets import QApplication
-from src.views.main_window import MainWindow
-from src.controllers.main_controller import MainController
+import multiprocessing
 
 def main():
+    # Required for the analysis process pool in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
+
+    # Qt is imported here rather than at module level so that analysis
+    # worker processes (which re-import this module on spawn) never load it.
+    from PyQt6.QtWidgets import QApplication
+    from src.views.main_window import MainWindow
+
     app = QApplication(sys.argv)
     app.setApplicationName("EXIF Date Fixer")
-    
+
     window = MainWindow()
-    controller = MainController(window)
-    
     window.show()
-    sys.exit(app.exec())
+    # Paint the window before the processing engine is imported
+    app.processEvents()
+
+    from src.controllers.main_controller import MainController
+    controller = MainController(window)
+
+    # EXIF_FIXER_PROFILE=1: print stage timings and dump a cProfile on exit
+    from src.utils import instrumentation
+    if not instrumentation.enabled():
+        sys.exit(app.exec())
+
+    profiler = instrumentation.Profiler()
+    profiler.start()
+    code = app.exec()
+    path = profiler.stop()
+    print(instrumentation.report(), file=sys.stderr)
+    print(f"Profile written to {path}", file=sys.stderr)
+    sys.exit(code)
 
 if __name__ == "__main__":
     main()
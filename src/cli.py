@@ -0,0 +1,358 @@
+"""
+Headless batch mode.
+
+Usage:
+    python -m src.cli PATH [PATH ...] [options]
+
+Analyzes the given files/folders, applies the fixing rules and prints one
+JSON object per file. Nothing is written unless --apply is passed.
+This module must never import PyQt6.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+from .controllers.processing_controller import ProcessingController
+from .models.metadata_model import FileMetadata
+from .utils import instrumentation
+from .utils.apply_journal import ApplyJournal, JournalState, undo
+from .utils.exif_handler import ExifHandler
+from .utils.file_utils import FileUtils
+from .utils.metadata_cache import MetadataCache
+from .utils.prefetch import DEFAULT_CONCURRENCY, DEFAULT_READ_AHEAD, Prefetcher
+from .utils.progress import ProgressTracker
+from .utils.rename_planner import RenamePlanner
+from .utils.scan_manifest import ScanManifest
+
+
+# Same keys and defaults as SettingsPanel.get_settings()
+DEFAULT_RULES = {
+    "use_exif": True,
+    "use_filename": True,
+    "use_earliest": False,
+    "offset_hours": 0,
+    "manual_date": None,
+    "enable_rename": False,
+    "date_format": "YYYYMMDD_HHMMSS",
+    "prefix": "",
+    "suffix": "",
+    "name_template": "",
+    "output_dir": "",
+}
+
+DATE_FORMATS = ["YYYYMMDD_HHMMSS", "YYYY-MM-DD_HH-MM-SS", "YYYYMMDD", "YYYY-MM-DD"]
+
+# Minimum seconds between progress lines on stderr
+PROGRESS_INTERVAL = 0.5
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="exif-date-fixer",
+        description="Fix and normalize media dates without the GUI.",
+    )
+    parser.add_argument("paths", nargs="*", help="Files or folders to process")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Scan folders recursively")
+    parser.add_argument("--config", help="JSON file with rule settings (same keys as the GUI)")
+    parser.add_argument("--apply", action="store_true", help="Write changes (default is a dry run)")
+    parser.add_argument("--workers", type=int, default=None, help="Analysis processes (default: CPU count)")
+    parser.add_argument("--apply-workers", type=int, default=None, help="Files written concurrently with --apply (default: 4)")
+    parser.add_argument(
+        "--prefetch", type=int, nargs="?", const=DEFAULT_CONCURRENCY, metavar="N",
+        help=f"Network-share mode: read up to N files concurrently (default N: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--read-ahead", type=int, default=DEFAULT_READ_AHEAD // 1024, metavar="KB",
+        help="With --prefetch, bytes read up front from each file, in KB",
+    )
+    parser.add_argument("--output", help="Write JSONL results here instead of stdout")
+    parser.add_argument(
+        "--journal", metavar="FILE",
+        help="With --apply, record every change in this journal (appended to if it exists)",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Skip files the --journal already records as applied",
+    )
+    parser.add_argument("--undo", metavar="FILE", help="Revert every change recorded in a journal and exit")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the metadata cache")
+    parser.add_argument("-q", "--quiet", action="store_true", help="No progress on stderr")
+    parser.add_argument(
+        "--profile", nargs="?", const=".", default=None, metavar="DIR",
+        help=f"Print per-stage timings and write a cProfile dump to DIR (also enabled by {instrumentation.ENV_VAR}=1)",
+    )
+    parser.add_argument(
+        "--changed-only", action="store_true",
+        help="Only process folder files added or modified since the last --changed-only --apply run",
+    )
+    parser.add_argument(
+        "--deep", action="store_true",
+        help="With --changed-only, also stat files in unchanged folders (catches in-place edits)",
+    )
+
+    rules = parser.add_argument_group("rules (override --config)")
+    rules.add_argument("--use-exif", action=argparse.BooleanOptionalAction, default=None)
+    rules.add_argument("--use-filename", action=argparse.BooleanOptionalAction, default=None)
+    rules.add_argument("--use-earliest", action=argparse.BooleanOptionalAction, default=None)
+    rules.add_argument("--offset-hours", type=int, default=None)
+    rules.add_argument("--manual-date", default=None, help="ISO date, e.g. 2023-05-01T12:00:00")
+    rules.add_argument("--rename", dest="enable_rename", action=argparse.BooleanOptionalAction, default=None)
+    rules.add_argument("--date-format", choices=DATE_FORMATS, default=None)
+    rules.add_argument("--prefix", default=None)
+    rules.add_argument("--suffix", default=None)
+    rules.add_argument(
+        "--template", dest="name_template", default=None, metavar="TEMPLATE",
+        help="Name template, e.g. '{date:%%Y/%%m}/{date:%%Y%%m%%d_%%H%%M%%S}_{seq:04}{ext}' "
+             "(tokens: date, seq, source, stem, ext; overrides --date-format/--prefix/--suffix)",
+    )
+    rules.add_argument("--output-dir", default=None, help="Copy fixed files here instead of modifying in place")
+    return parser
+
+
+def load_rules(args) -> dict:
+    rules = dict(DEFAULT_RULES)
+
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        unknown = set(config) - set(DEFAULT_RULES)
+        if unknown:
+            raise ValueError(f"Unknown rule keys in config: {', '.join(sorted(unknown))}")
+        rules.update(config)
+
+    for key in DEFAULT_RULES:
+        value = getattr(args, key, None)
+        if value is not None:
+            rules[key] = value
+
+    if isinstance(rules["manual_date"], str):
+        rules["manual_date"] = datetime.fromisoformat(rules["manual_date"])
+
+    # Fail before any file is touched; raises ValueError
+    ProcessingController.filename_formatter(rules)
+
+    return rules
+
+
+def collect_files(paths, recursive, manifest=None, deep=False, quiet=False) -> list:
+    """
+    Returns (path, os.stat_result) records; folder contents are sorted.
+    With a ScanManifest only folder files that changed since its last
+    rescan are returned. The manifest update is left uncommitted.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path) and manifest is not None:
+            delta = manifest.rescan(path, recursive=recursive, deep=deep, commit=False)
+            files.extend(delta.changed)
+            if not quiet:
+                print(
+                    f"{path}: {len(delta.added)} added, {len(delta.modified)} modified, "
+                    f"{len(delta.removed)} removed, {delta.unchanged} unchanged "
+                    f"({delta.dirs_listed} folders listed, {delta.dirs_skipped} skipped)",
+                    file=sys.stderr,
+                )
+        elif os.path.isdir(path):
+            records = FileUtils.iter_media(path, recursive=recursive)
+            files.extend(sorted(records, key=lambda record: record[0]))
+        elif os.path.isfile(path):
+            files.append((path, os.stat(path)))
+        else:
+            print(f"Skipping missing path: {path}", file=sys.stderr)
+    return files
+
+
+def result_record(file_meta, name_clash=None) -> dict:
+    def iso(value):
+        return value.isoformat() if value else None
+
+    return {
+        "file_path": file_meta.file_path,
+        "filename": file_meta.filename,
+        "status": file_meta.status,
+        "message": file_meta.message,
+        "proposed_date": iso(file_meta.proposed_date),
+        "proposed_filename": file_meta.proposed_filename,
+        "name_clash": name_clash,
+        "exif_date_taken": iso(file_meta.exif_date_taken),
+        "exif_date_digitized": iso(file_meta.exif_date_digitized),
+        "filename_date": iso(file_meta.filename_date),
+        "file_system_modified": iso(file_meta.file_system_modified),
+    }
+
+
+def run(args) -> int:
+    rules = load_rules(args)
+    manifest = None
+    if args.changed_only:
+        manifest = ScanManifest(ScanManifest.default_path())
+        try:
+            records = collect_files(args.paths, args.recursive, manifest, args.deep, args.quiet)
+        except BaseException:
+            manifest.close()
+            raise
+    else:
+        records = collect_files(args.paths, args.recursive)
+
+    journal = applied = None
+    if args.apply and args.journal:
+        journal = ApplyJournal(args.journal)
+    if args.resume:
+        # A dry run only reads which files are done
+        applied = journal.state if journal else JournalState.load(args.journal)
+
+    # {seq} of each file: its position in the full listing
+    seqs = range(1, len(records) + 1)
+    done = []
+    if applied is not None:
+        # Files the journal lists as applied are not even analyzed
+        seqs = [seq for seq, (path, _) in zip(seqs, records) if not applied.is_applied(path)]
+        if len(seqs) < len(records):
+            done = [path for path, _ in records if applied.is_applied(path)]
+            records = [records[seq - 1] for seq in seqs]
+    files = [path for path, _ in records]
+    # Listed paths of files that failed, kept out of the manifest, and
+    # (listed path, new path, stat) of files that were applied
+    failed = []
+    written = []
+
+    cache = None
+    if not args.no_cache:
+        try:
+            cache = MetadataCache(MetadataCache.default_path())
+        except Exception as e:
+            print(f"Metadata cache unavailable: {e}", file=sys.stderr)
+
+    processor = ProcessingController(cache=cache)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+
+    prefetcher = None
+    if args.prefetch:
+        prefetcher = Prefetcher(args.prefetch, args.read_ahead * 1024)
+
+    tracker = ProgressTracker(len(files), interval=PROGRESS_INTERVAL)
+    planner = RenamePlanner()
+    counts = {}
+
+    try:
+        for path in done:
+            meta = FileMetadata(path, os.path.basename(path), os.path.splitext(path)[1].lower())
+            meta.status = "Skipped"
+            meta.message = "Already applied (journal)"
+            out.write(json.dumps(result_record(meta)) + "\n")
+        if done:
+            counts["Skipped"] = len(done)
+
+        for batch in processor.iter_analyze(
+            files, workers=args.workers, stats=[stat for _, stat in records],
+            prefetcher=prefetcher,
+        ):
+            # Positions in batch of the files that can be applied
+            ready_rows = [row for row, meta in enumerate(batch) if meta.status != "Error"]
+            ready = [batch[row] for row in ready_rows]
+            # {seq} numbers files in input order across batches
+            first = tracker.done
+            for seq, meta in zip(seqs[first:first + len(batch)], batch):
+                if meta.status != "Error":
+                    processor.apply_rules(meta, rules, seq)
+            # Target path the rules wanted, for files that had to get a suffix
+            clashes = {
+                id(ready[conflict.row]): conflict.wanted
+                for conflict in processor.plan_targets(ready, rules, planner)
+            }
+            if args.apply:
+                results = processor.iter_process(
+                    ready, rules, workers=args.apply_workers, journal=journal
+                )
+                for row, success, stat in results:
+                    if stat is not None and manifest is not None:
+                        meta = ready[row]
+                        # A copy leaves the listed file as it was
+                        listed = None if rules.get("output_dir") else files[first + ready_rows[row]]
+                        written.append((listed, meta.file_path, stat))
+            else:
+                for meta in ready:
+                    processor.process_file(meta, rules, dry_run=True)
+
+            for row, meta in enumerate(batch, first):
+                if meta.status == "Error":
+                    failed.append(files[row])
+                counts[meta.status] = counts.get(meta.status, 0) + 1
+                out.write(json.dumps(result_record(meta, clashes.get(id(meta)))) + "\n")
+
+            out.flush()
+
+            nbytes = sum(stat.st_size for _, stat in records[first:first + len(batch)])
+            due = tracker.advance(len(batch), nbytes)
+            if not args.quiet and (due or tracker.done == tracker.total):
+                print(tracker.snapshot().describe(), file=sys.stderr)
+
+        if manifest is not None and args.apply:
+            # Only now are the listed files handled; an interrupted run or
+            # a dry run leaves them to be reported again
+            manifest.commit(failed, written)
+    finally:
+        if manifest is not None:
+            manifest.close()
+        if out is not sys.stdout:
+            out.close()
+        if cache is not None:
+            cache.close()
+        if journal is not None:
+            journal.close()
+        if prefetcher is not None:
+            prefetcher.close()
+
+    if not args.quiet:
+        summary = ", ".join(f"{status}: {n}" for status, n in sorted(counts.items()))
+        print(f"Done. {summary or 'no files'}", file=sys.stderr)
+
+    return 1 if counts.get("Error") else 0
+
+
+def run_undo(args) -> int:
+    undone, skipped, failed = undo(args.undo, ExifHandler())
+    for message in undone:
+        if not args.quiet:
+            print(message, file=sys.stderr)
+    for message in failed:
+        print(f"failed: {message}", file=sys.stderr)
+    if not args.quiet:
+        print(
+            f"Done. Undone: {len(undone)}, untouched: {len(skipped)}, failed: {len(failed)}",
+            file=sys.stderr,
+        )
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.undo:
+        return run_undo(args)
+    if not args.paths:
+        parser.error("at least one PATH is required")
+    if args.resume and not args.journal:
+        parser.error("--resume needs --journal")
+
+    profiler = None
+    if args.profile is not None or instrumentation.enabled():
+        profiler = instrumentation.Profiler()
+        profiler.start()
+
+    try:
+        return run(args)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if profiler is not None:
+            path = profiler.stop(args.profile or ".")
+            print(instrumentation.report(), file=sys.stderr)
+            print(f"Profile written to {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
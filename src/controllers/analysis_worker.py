@@ -0,0 +1,71 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+from ..utils.file_utils import FileUtils
+from ..utils.progress import ProgressTracker
+
+
+class AnalysisWorker(QObject):
+    """
+    Scans and analyzes files off the GUI thread.
+    Results are emitted in batches so the table can fill in while
+    the rest of the folder is still being listed and analyzed; batches
+    finishing faster than the UI frame rate are merged before they are
+    emitted. Folder files arrive in listing order, not sorted.
+    """
+
+    batch_ready = pyqtSignal(list)      # list[FileMetadata]
+    progress = pyqtSignal(object)       # ProgressSnapshot
+    finished = pyqtSignal(bool)         # True if cancelled
+
+    def __init__(self, processor, file_paths=None, folder=None):
+        super().__init__()
+        self.processor = processor
+        self.file_paths = file_paths
+        self.folder = folder
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        stats = None
+        if self.file_paths is None:
+            # Analyze while listing; the scan's stat results are reused
+            # instead of stat-ing every file again
+            stats = []
+            tracker = ProgressTracker(0)
+            batches = self.processor.iter_analyze(None, records=self._listing(stats))
+        else:
+            tracker = ProgressTracker(len(self.file_paths))
+            batches = self.processor.iter_analyze(self.file_paths)
+
+        self.progress.emit(tracker.snapshot())
+        pending = []
+        try:
+            for batch in batches:
+                if self._cancelled:
+                    break
+                nbytes = 0
+                if stats is not None:
+                    first = tracker.done
+                    nbytes = sum(stat.st_size for stat in stats[first:first + len(batch)])
+                    # The total grows as the listing goes on
+                    tracker.total = len(stats)
+                pending.extend(batch)
+                if tracker.advance(len(batch), nbytes):
+                    self.batch_ready.emit(pending)
+                    self.progress.emit(tracker.snapshot())
+                    pending = []
+        finally:
+            # Cancels any chunks still queued in the process pool
+            batches.close()
+
+        if pending:
+            self.batch_ready.emit(pending)
+        self.progress.emit(tracker.snapshot())
+        self.finished.emit(self._cancelled)
+
+    def _listing(self, stats):
+        """Yields the folder's (path, stat) records, collecting the stats."""
+        for path, stat in FileUtils.iter_media(self.folder):
+            stats.append(stat)
+            yield path, stat
@@ -0,0 +1,62 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+from ..utils.progress import ProgressTracker
+
+
+class ApplyWorker(QObject):
+    """
+    Applies the proposed changes off the GUI thread.
+    Files are processed concurrently, but results arrive in row order;
+    finished rows are reported as one range per UI frame so the table
+    and progress bar advance front to back at a constant cost.
+    """
+
+    rows_done = pyqtSignal(int, int)    # first, last row finished since the last update
+    progress = pyqtSignal(object)       # ProgressSnapshot
+    finished = pyqtSignal(int, bool)    # processed count, True if cancelled
+
+    def __init__(self, processor, files, rules, workers=None, journal=None):
+        super().__init__()
+        self.processor = processor
+        self.files = files
+        self.rules = rules
+        self.workers = workers
+        self.journal = journal
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        tracker = ProgressTracker(len(self.files))
+        processed = 0
+        self.progress.emit(tracker.snapshot())
+
+        # The folders may have changed since the preview
+        self.processor.plan_targets(self.files, self.rules)
+
+        results = self.processor.iter_process(
+            self.files,
+            self.rules,
+            workers=self.workers,
+            cancelled=lambda: self._cancelled,
+            journal=self.journal,
+        )
+        try:
+            for row, success, stat in results:
+                if success:
+                    processed += 1
+                nbytes = stat.st_size if stat is not None else 0
+                if tracker.advance(1, nbytes, row=row):
+                    self._emit_update(tracker)
+        finally:
+            if self.journal is not None:
+                self.journal.close()
+
+        self._emit_update(tracker)
+        self.finished.emit(processed, self._cancelled)
+
+    def _emit_update(self, tracker):
+        rows = tracker.take_rows()
+        if rows is not None:
+            self.rows_done.emit(*rows)
+        self.progress.emit(tracker.snapshot())
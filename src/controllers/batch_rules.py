@@ -0,0 +1,179 @@
+from datetime import timedelta
+
+from ..models.metadata_store import (
+    LAZY_FILENAME,
+    NULL_DATE,
+    SOURCES,
+    MetadataStore,
+    date_to_int,
+)
+
+# Codes of the proposed_source column
+_EXIF, _FILENAME, _FS, _MANUAL = (SOURCES.index(name) for name in ("exif", "filename", "fs", "manual"))
+
+# Settings that feed the proposed date / only the proposed file name
+DATE_RULE_KEYS = ("use_exif", "use_filename", "use_earliest", "offset_hours", "manual_date")
+NAME_RULE_KEYS = ("enable_rename", "date_format", "prefix", "suffix", "name_template")
+
+
+class BatchRuleEvaluator:
+    """
+    Applies the fixing rules to a whole MetadataStore at once.
+
+    Proposed dates are computed over NumPy datetime64 views of the store's
+    date columns; proposed file names are left as LAZY_FILENAME and only
+    formatted when a row is displayed or processed. The results match
+    ProcessingController.apply_rules row for row.
+
+    Re-previews are incremental: the new settings are diffed against the
+    last ones, so a name-only change just resets the lazy names and an
+    unchanged preview only evaluates rows added or edited since.
+    """
+
+    def __init__(self, processor):
+        self.processor = processor
+        self._last_rules = None
+        self._last_store = None
+
+    def evaluate(self, store, rules: dict):
+        """
+        Returns the (first, last) row range whose preview may have changed,
+        or None when nothing did.
+        """
+        if not len(store):
+            return None
+
+        np = None
+        if isinstance(store, MetadataStore):
+            try:
+                import numpy as np
+            except ImportError:
+                pass
+
+        if np is None:
+            # Same results, one row at a time
+            for seq, file_meta in enumerate(store, 1):
+                self.processor.apply_rules(file_meta, rules, seq)
+            return 0, len(store) - 1
+
+        rules = dict(rules)
+        if store is not self._last_store or self._last_rules is None:
+            dates_changed = names_changed = True
+        else:
+            dates_changed = self._changed(rules, DATE_RULE_KEYS)
+            names_changed = self._changed(rules, NAME_RULE_KEYS)
+
+        if dates_changed:
+            self.evaluate_dates(store, rules, np)
+            self.reset_filenames(store, rules)
+            changed = (0, len(store) - 1)
+        else:
+            stale = store.stale_rows()
+            if stale:
+                self.evaluate_dates(store, rules, np, np.array(stale, dtype=np.intp))
+            if names_changed:
+                self.reset_filenames(store, rules)
+                changed = (0, len(store) - 1)
+            elif stale:
+                self.reset_filenames(store, rules, stale)
+                # stale_rows() is sorted
+                changed = (stale[0], stale[-1])
+            else:
+                changed = None
+
+        store.mark_clean()
+        self._last_rules = rules
+        self._last_store = store
+        return changed
+
+    def _changed(self, rules: dict, keys) -> bool:
+        return any(rules.get(key) != self._last_rules.get(key) for key in keys)
+
+    def evaluate_dates(self, store: MetadataStore, rules: dict, np, rows=None):
+        """Writes the proposed_date and proposed_source columns for every row, or only `rows`."""
+        count = len(store) if rows is None else len(rows)
+        if not count:
+            return
+        proposed = np.full(count, NULL_DATE, dtype=np.int64)
+        sources = np.zeros(count, dtype=np.uint8)
+
+        if rules.get("manual_date"):
+            proposed[:] = date_to_int(rules["manual_date"].replace(microsecond=0))
+            sources[:] = _MANUAL
+        else:
+            taken = self._column(store, "exif_date_taken", np, rows)
+            filename = self._column(store, "filename_date", np, rows)
+            created = self._column(store, "file_system_created", np, rows)
+
+            # Rows still waiting for a date, in the same order as apply_rules
+            pending = np.ones(count, dtype=bool)
+
+            if rules.get("use_exif"):
+                take = pending & ~np.isnat(taken)
+                proposed[take] = taken.view(np.int64)[take]
+                sources[take] = _EXIF
+                pending &= ~take
+
+            if rules.get("use_filename"):
+                take = pending & ~np.isnat(filename)
+                proposed[take] = filename.view(np.int64)[take]
+                sources[take] = _FILENAME
+                pending &= ~take
+
+            if rules.get("use_earliest"):
+                stacked = np.stack([
+                    taken.view(np.int64),
+                    filename.view(np.int64),
+                    created.view(np.int64),
+                ])
+                # Ignore missing dates by pushing them past any real one
+                stacked = np.where(stacked == NULL_DATE, np.iinfo(np.int64).max, stacked)
+                # argmin picks the first source on a tie, like min() in apply_rules
+                which = stacked.argmin(axis=0)
+                earliest = np.take_along_axis(stacked, which[np.newaxis], axis=0)[0]
+                take = pending & (earliest != np.iinfo(np.int64).max)
+                proposed[take] = earliest[take]
+                sources[take] = np.array([_EXIF, _FILENAME, _FS], dtype=np.uint8)[which[take]]
+
+            # Release the buffer exports before the store is resized again
+            del taken, filename, created
+
+        if rules.get("offset_hours"):
+            has_date = proposed != NULL_DATE
+            # Fractional hours round like the timedelta of apply_rules
+            offset = timedelta(hours=rules["offset_hours"]) // timedelta(microseconds=1)
+            proposed[has_date] += offset
+
+        target = np.frombuffer(store.dates["proposed_date"], dtype=np.int64)
+        source_target = np.frombuffer(store.source_codes, dtype=np.uint8)
+        if rows is None:
+            target[:] = proposed
+            source_target[:] = sources
+        else:
+            target[rows] = proposed
+            source_target[rows] = sources
+        del target, source_target
+
+    def reset_filenames(self, store: MetadataStore, rules: dict, rows=None):
+        """Marks proposed names (all, or only `rows`) for lazy formatting, or clears them."""
+        if rules.get("enable_rename"):
+            template = self.processor.name_template(rules)
+            store.filename_formatter = template.render
+            store.numbered_names = template.uses_seq
+            value = LAZY_FILENAME
+        else:
+            store.filename_formatter = None
+            store.numbered_names = False
+            value = None
+
+        if rows is None:
+            store.proposed_filenames[:] = [value] * len(store)
+        else:
+            for row in rows:
+                store.proposed_filenames[row] = value
+
+    @staticmethod
+    def _column(store: MetadataStore, name: str, np, rows=None):
+        column = np.frombuffer(store.dates[name], dtype="datetime64[us]")
+        # Fancy indexing copies, which also drops the buffer export early
+        return column if rows is None else column[rows]
@@ -1,27 +1,58 @@
+from PyQt6.QtCore import QThread
 from PyQt6.QtWidgets import QFileDialog, QMessageBox
-from ..utils.file_utils import FileUtils
+from ..models.metadata_store import MetadataStore
+from ..utils.metadata_cache import MetadataCache
+from ..utils.apply_journal import ApplyJournal
 from .processing_controller import ProcessingController
+from .batch_rules import BatchRuleEvaluator
+from .preview_plan import PreviewPlan
+from .analysis_worker import AnalysisWorker
+from .apply_worker import ApplyWorker
 
 class MainController:
     """Main controller to handle UI events and coordinate with the processing engine."""
     
     def __init__(self, view):
         self.view = view
-        self.processor = ProcessingController()
-        self.files_metadata = []
+        self.processor = ProcessingController(cache=self._open_cache())
+        self.rule_evaluator = BatchRuleEvaluator(self.processor)
+        # Columnar store shared with the file table's model: rows deleted
+        # in the view are removed from it too
+        self.files_metadata = MetadataStore()
+        self.view.file_table.set_files(self.files_metadata)
+        # Name clashes of the last preview; removed or reordered rows
+        # make the next preview plan every row again
+        self.preview_plan = PreviewPlan(self.processor, self.rule_evaluator)
+        model = self.view.file_table.file_model
+        model.rowsRemoved.connect(lambda *_: self.preview_plan.invalidate())
+        model.modelReset.connect(self.preview_plan.invalidate)
+        self._analysis_thread = None
+        self._analysis_worker = None
+        self._sort_from = None
+        self._apply_thread = None
+        self._apply_worker = None
         
         # Connect signals
         self.view.add_folder_btn.clicked.connect(self.add_folder)
         self.view.add_files_btn.clicked.connect(self.add_files)
         self.view.clear_btn.clicked.connect(self.clear_list)
+        self.view.cancel_btn.clicked.connect(self.cancel_running)
         self.view.settings_panel.apply_rules_btn.clicked.connect(self.preview_changes)
         self.view.settings_panel.process_btn.clicked.connect(self.apply_fixes)
 
+    @staticmethod
+    def _open_cache():
+        try:
+            return MetadataCache(MetadataCache.default_path())
+        except Exception as e:
+            print("Metadata cache unavailable:", e)
+            return None
+
     def add_folder(self):
         folder = QFileDialog.getExistingDirectory(self.view, "Select Folder")
         if folder:
-            files = FileUtils.scan_folder(folder)
-            self._add_files_to_list(files)
+            self.view.status_label.setText("Scanning folder...")
+            self._start_analysis(folder=folder)
 
     def add_files(self):
         files, _ = QFileDialog.getOpenFileNames(
@@ -29,15 +60,65 @@ class MainController:
             "Images/Videos (*.jpg *.jpeg *.png *.heic *.mp4 *.mov);;All Files (*)"
         )
         if files:
-            self._add_files_to_list(files)
+            self.view.status_label.setText(f"Analyzing {len(files)} files...")
+            self._start_analysis(file_paths=files)
+
+    # -------------------------------------------------
+    # BACKGROUND ANALYSIS
+    # -------------------------------------------------
+    def _start_analysis(self, file_paths=None, folder=None):
+        if self._analysis_thread is not None:
+            return
+
+        # Folder rows stream in listing order and are sorted once loaded
+        self._sort_from = len(self.files_metadata) if folder is not None else None
+        self._analysis_thread = QThread()
+        self._analysis_worker = AnalysisWorker(self.processor, file_paths, folder)
+        self._analysis_worker.moveToThread(self._analysis_thread)
+
+        self._analysis_thread.started.connect(self._analysis_worker.run)
+        self._analysis_worker.batch_ready.connect(self._add_batch_to_list)
+        self._analysis_worker.progress.connect(
+            lambda snapshot: self.view.update_progress(snapshot, "Analyzing")
+        )
+        self._analysis_worker.finished.connect(self._on_analysis_finished)
 
-    def _add_files_to_list(self, file_paths):
-        self.view.status_label.setText(f"Analyzing {len(file_paths)} files...")
-        for path in file_paths:
-            meta = self.processor.analyze_file(path)
-            self.files_metadata.append(meta)
-            self.view.file_table.add_file_row(meta)
-        self.view.status_label.setText(f"Loaded {len(self.files_metadata)} files")
+        self._set_busy(True)
+        self._analysis_thread.start()
+
+    def cancel_running(self):
+        """Cancels the running scan or apply, whichever is active."""
+        worker = self._analysis_worker or self._apply_worker
+        if worker is not None:
+            worker.cancel()
+            self.view.status_label.setText("Cancelling...")
+
+    def _add_batch_to_list(self, batch):
+        # Appends to files_metadata through the model
+        self.view.file_table.add_file_rows(batch)
+
+    def _on_analysis_finished(self, cancelled):
+        self._analysis_thread.quit()
+        self._analysis_thread.wait()
+        self._analysis_worker.deleteLater()
+        self._analysis_thread.deleteLater()
+        self._analysis_thread = None
+        self._analysis_worker = None
+        if self._sort_from is not None:
+            self.view.file_table.sort_rows(self._sort_from)
+
+        self._set_busy(False)
+        prefix = "Cancelled. " if cancelled else ""
+        self.view.processing_done(f"{prefix}Loaded {len(self.files_metadata)} files")
+
+    def _set_busy(self, running):
+        self.view.add_folder_btn.setEnabled(not running)
+        self.view.add_files_btn.setEnabled(not running)
+        self.view.clear_btn.setEnabled(not running)
+        self.view.settings_panel.apply_rules_btn.setEnabled(not running)
+        self.view.settings_panel.process_btn.setEnabled(not running)
+        self.view.cancel_btn.setVisible(running)
+        self.view.progress_bar.setVisible(running)
 
     def clear_list(self):
     # ── Ask to clear after processing ──
@@ -48,19 +129,44 @@ class MainController:
         )
 
         if clear_reply == QMessageBox.StandardButton.Yes:
-            self.files_metadata = []
+            # Clears files_metadata through the model
             self.view.file_table.clear_all()
             self.view.status_label.setText("Ready")
 
+    def _check_template(self, rules: dict) -> bool:
+        """Compiles the name template up front; warns and returns False if it is invalid."""
+        if not rules.get("enable_rename"):
+            return True
+        try:
+            self.processor.filename_formatter(rules)
+        except ValueError as e:
+            QMessageBox.warning(self.view, "Invalid Name Template", str(e))
+            return False
+        return True
+
     def preview_changes(self):
         rules = self.view.settings_panel.get_settings()
-        for i, meta in enumerate(self.files_metadata):
-            self.processor.apply_rules(meta, rules)
-            self.view.file_table.update_row(i, meta)
-        self.view.status_label.setText("Preview updated based on rules")
+        if not self._check_template(rules):
+            return
+        # Only rows affected by what changed since the last preview are redone
+        stale = self.files_metadata.stale_rows()
+        changed = self.rule_evaluator.evaluate(self.files_metadata, rules)
+        rows = list(changed or ())
+        # Only the folders of those rows are planned again
+        rows += self.preview_plan.update(self.files_metadata, rules, changed, stale)
+        conflicts = self.preview_plan.conflicts
+
+        if rows:
+            self.view.file_table.refresh_rows(min(rows), max(rows))
+        message = "Preview updated based on rules"
+        if conflicts:
+            message += f"; {len(conflicts)} name clashes get a _1, _2, ... suffix"
+        self.view.status_label.setText(message)
 
     def apply_fixes(self):
-        if not self.files_metadata:
+        if not self.files_metadata or self._apply_thread is not None:
+            return
+        if not self._check_template(self.view.settings_panel.get_settings()):
             return
             
         reply = QMessageBox.question(
@@ -70,18 +176,48 @@ class MainController:
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            self.view.progress_bar.setVisible(True)
-            self.view.progress_bar.setMaximum(len(self.files_metadata))
-            
             rules = self.view.settings_panel.get_settings()
-            processed_count = 0
-            for i, meta in enumerate(self.files_metadata):
-                if self.processor.process_file(meta, rules):
-                    processed_count += 1
-                self.view.file_table.update_row(i, meta)
-                self.view.progress_bar.setValue(i + 1)
-                
-            self.view.status_label.setText(f"Processed {processed_count} files successfully")
-            self.view.progress_bar.setVisible(False)
-
-            QMessageBox.information(self.view, "Complete", f"Successfully processed {processed_count} files.")
+            try:
+                journal = ApplyJournal(ApplyJournal.default_path())
+            except OSError as e:
+                QMessageBox.warning(self.view, "Error", f"Could not create the apply journal: {e}")
+                return
+
+            self._apply_thread = QThread()
+            self._apply_worker = ApplyWorker(
+                self.processor, self.files_metadata, rules, journal=journal
+            )
+            self._apply_worker.moveToThread(self._apply_thread)
+
+            self._apply_thread.started.connect(self._apply_worker.run)
+            self._apply_worker.rows_done.connect(self.view.file_table.refresh_rows)
+            self._apply_worker.progress.connect(self.view.update_progress)
+            self._apply_worker.finished.connect(self._on_apply_finished)
+
+            # Rows are addressed by position, so the list must not change
+            # while the workers run
+            self.view.file_table.set_locked(True)
+            self._set_busy(True)
+            self._apply_thread.start()
+
+    def _on_apply_finished(self, processed_count, cancelled):
+        journal_path = self._apply_worker.journal.path
+        self._apply_thread.quit()
+        self._apply_thread.wait()
+        self._apply_worker.deleteLater()
+        self._apply_thread.deleteLater()
+        self._apply_thread = None
+        self._apply_worker = None
+
+        # Files were renamed on disk: the next preview plans from scratch
+        self.preview_plan.invalidate()
+        self.view.file_table.set_locked(False)
+        self._set_busy(False)
+        prefix = "Cancelled. " if cancelled else ""
+        self.view.processing_done(f"{prefix}Processed {processed_count} files successfully")
+
+        QMessageBox.information(
+            self.view, "Complete",
+            f"{prefix}Successfully processed {processed_count} files.\n\n"
+            f"To revert them, run:\npython -m src.cli --undo \"{journal_path}\"",
+        )
@@ -0,0 +1,129 @@
+import os
+
+from .processing_controller import NAME_CLASH
+
+
+class PreviewPlan:
+    """
+    Name clash planning for the preview, kept between previews.
+
+    A full plan runs ProcessingController.plan_targets over every row
+    and remembers which rows target which folder. After that, only the
+    folders of rows whose names may have changed are planned again, so
+    an unchanged preview plans nothing and editing a few rows only
+    re-lists their folders. Removing or reordering rows, or renaming
+    files on disk, calls for invalidate(): the next preview then plans
+    everything again.
+    """
+
+    def __init__(self, processor, evaluator):
+        self.processor = processor
+        self.evaluator = evaluator
+        self._rules = None
+        # normcase'd target folder -> rows targeting it; None: no valid plan
+        self._folders = None
+        self._row_folders = {}
+        # row -> RenameConflict of the current plan
+        self._clashes = {}
+
+    def invalidate(self):
+        self._folders = None
+
+    @property
+    def conflicts(self) -> list:
+        return [self._clashes[row] for row in sorted(self._clashes)]
+
+    def update(self, store, rules: dict, changed, stale) -> list:
+        """
+        Re-plans after evaluate() reported `changed` ((first, last) or
+        None); `stale` are the store's stale_rows() from before evaluate().
+        Flags clashes with NAME_CLASH and returns the rows whose name or
+        status may have changed.
+        """
+        rules = dict(rules)
+        if changed is not None and changed == (0, len(store) - 1):
+            # Every name was built again, suffixes included
+            return self._plan_all(store, rules)
+        if self._folders is None or rules != self._rules:
+            return self._plan_all(store, rules)
+        if changed is None:
+            return []
+
+        # Every row sharing a folder an edited row leaves or goes to is
+        # planned again; clashes elsewhere keep their suffixed names
+        folders = set()
+        for row in stale:
+            folders.add(self._row_folders.get(row))
+            folders.add(self._folder(store, row, rules))
+        folders.discard(None)
+        rows = set(stale)
+        for folder in folders:
+            rows.update(self._folders.get(folder, ()))
+        rows = sorted(rows)
+        self._reset_clashes(store, rules, [row for row in rows if row in self._clashes])
+        for row in rows:
+            self._clashes.pop(row, None)
+            self._move(row, None)
+
+        planned = {}
+        conflicts = self.processor.plan_targets(store, rules, rows=rows, folders=planned)
+        for row, folder in planned.items():
+            self._move(row, folder)
+        self._flag(store, conflicts)
+        return rows
+
+    def _plan_all(self, store, rules) -> list:
+        self._rules = rules
+        if self._folders is None:
+            # Rows may have moved since the last plan: find clashes by status
+            clash_code = store.statuses.code(NAME_CLASH)
+            self._clashes = {
+                row: None for row, code in enumerate(store.status_codes) if code == clash_code
+            }
+        previous = self._reset_clashes(store, rules, list(self._clashes))
+
+        planned = {}
+        conflicts = self.processor.plan_targets(store, rules, folders=planned)
+        self._folders = {}
+        self._row_folders = {}
+        for row, folder in planned.items():
+            self._move(row, folder)
+        self._clashes = {}
+        self._flag(store, conflicts)
+        return previous + [conflict.row for conflict in conflicts]
+
+    def _folder(self, store, row, rules):
+        file_meta = store[row]
+        if not file_meta.proposed_date:
+            return None
+        return os.path.normcase(os.path.dirname(self.processor.target_path(file_meta, rules)))
+
+    def _reset_clashes(self, store, rules, rows) -> list:
+        """Gives last plan's clashes the names the rules give them again."""
+        previous = [row for row in rows if row < len(store)]
+        if previous:
+            self.evaluator.reset_filenames(store, rules, previous)
+            for row in previous:
+                file_meta = store[row]
+                if file_meta.status == NAME_CLASH:
+                    file_meta.status = "Pending"
+                    file_meta.message = ""
+        return previous
+
+    def _move(self, row, folder):
+        old = self._row_folders.pop(row, None)
+        if old is not None:
+            self._folders[old].discard(row)
+        if folder is not None:
+            self._row_folders[row] = folder
+            self._folders.setdefault(folder, set()).add(row)
+
+    def _flag(self, store, conflicts):
+        for conflict in conflicts:
+            file_meta = store[conflict.row]
+            file_meta.status = NAME_CLASH
+            taken_by = "an existing file" if conflict.existing else "an earlier file in the list"
+            file_meta.message = (
+                f"{os.path.basename(conflict.wanted)} is already used by {taken_by}"
+            )
+            self._clashes[conflict.row] = conflict
@@ -1,86 +1,469 @@
+from collections import deque
 from datetime import timedelta
+from itertools import islice
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from ..utils.exif_handler import ExifHandler
 from ..utils.filename_parser import FilenameParser
+from ..utils import instrumentation
+from ..utils.instrumentation import stage
+from ..utils.prefetch import Prefetcher
+from ..utils.rename_planner import RenameConflict, RenamePlanner
+from ..utils.rename_template import compile_template, legacy_template
 from ..models.metadata_model import FileMetadata
 import os
 import shutil
+import threading
+
+
+# Files handed to a worker process per task
+MIN_CHUNK_SIZE = 16
+MAX_CHUNK_SIZE = 256
+
+# Files written concurrently by iter_process; applying is I/O bound
+DEFAULT_APPLY_WORKERS = 4
+# Path locks are striped so memory stays flat on huge batches
+_PATH_LOCK_STRIPES = 64
+
+# Preview status of a file whose target name had to be disambiguated
+NAME_CLASH = "Name Clash"
+
+
+def _analyze_chunk(file_paths, stats=None):
+    """
+    Process-pool entry point.
+    Returns (rows, timings): one compact row per path, (dates, error)
+    where dates is the tuple produced by ProcessingController.analyze_dates,
+    plus the drained stage timings when instrumentation is enabled.
+    `stats` optionally holds an os.stat_result per path (None to stat).
+    """
+    processor = ProcessingController()
+    rows = []
+    for path, stat in zip(file_paths, stats or [None] * len(file_paths)):
+        try:
+            rows.append((processor.analyze_dates(path, stat), None))
+        except Exception as e:
+            rows.append((None, str(e)))
+    return rows, instrumentation.drain() if instrumentation.enabled() else None
 
 
 class ProcessingController:
     """Engine for processing files and applying date fixing rules."""
 
-    def __init__(self):
+    def __init__(self, cache=None):
         self.exif_handler = ExifHandler()
         self.filename_parser = FilenameParser()
+        # Optional MetadataCache consulted by iter_analyze/analyze_many
+        self.cache = cache
+        # Target folders known to exist, so makedirs runs once per folder
+        self._made_dirs = set()
 
     def analyze_file(self, file_path: str) -> FileMetadata:
+        return self._build_metadata(file_path, self.analyze_dates(file_path))
+
+    def analyze_dates(self, file_path: str, stat=None, head=None) -> tuple:
+        """
+        Returns the detected dates as a plain tuple:
+        (exif taken, exif digitized, exif modified, fs created, fs modified, filename date)
+        Pass the file's os.stat_result as `stat` if the caller already has it,
+        and an open (e.g. prefetched) binary file of it as `head`.
+        """
+        ext = os.path.splitext(file_path)[1].lower()
+        with stage("media_dates", ext):
+            meta = self.exif_handler.get_media_dates(file_path, stat, head)
+        with stage("filename.extract_date", ext):
+            fn_date = self.filename_parser.extract_date(os.path.basename(file_path))
+
+        return (
+            meta["date_taken"],
+            meta["date_digitized"],
+            meta["date_modified"],
+            meta["file_created"],
+            meta["file_modified"],
+            fn_date,
+        )
+
+    # -------------------------------------------------
+    # BATCH ANALYSIS
+    # -------------------------------------------------
+    def analyze_many(self, file_paths, workers=None, stats=None, prefetcher=None) -> list:
+        """
+        Analyzes many files across a process pool.
+        Results keep the input order; a file that fails to analyze comes
+        back as an "Error" entry instead of aborting the batch.
+        """
+        results = []
+        for batch in self.iter_analyze(file_paths, workers, stats, prefetcher):
+            results.extend(batch)
+        return results
+
+    def iter_analyze(self, file_paths, workers=None, stats=None, prefetcher=None, records=None):
+        """
+        Yields lists of FileMetadata, one per chunk, in input order.
+        `stats` optionally holds the os.stat_result of each path (as
+        yielded by FileUtils.iter_media) so files are not stat-ed again.
+        Instead of both, `records` may be an iterable of (path, stat),
+        such as a FileUtils.iter_media listing: chunks are then analyzed
+        while the rest of the folder is still being listed.
+        Closing the generator cancels chunks still queued in the pool.
+
+        With a Prefetcher (for high-latency network shares) files are
+        analyzed in this process with concurrent I/O instead of on the
+        process pool; `workers` then only sizes the chunks.
+        """
+        total = None
+        has_stats = records is not None or stats is not None
+        if records is None:
+            file_paths = list(file_paths)
+            total = len(file_paths)
+            records = zip(file_paths, stats if has_stats else [None] * total)
+
+        workers = workers or os.cpu_count() or 1
+        executor = prefetcher
+
+        # Chunks in flight, oldest first, so results keep input order
+        pending = deque()
+        try:
+            for index, chunk in enumerate(self._chunk(records, workers, total)):
+                paths = [path for path, _ in chunk]
+                chunk_stats = [stat for _, stat in chunk] if has_stats else None
+                if executor is None and workers > 1 and (index or (total or 0) > len(chunk)):
+                    # A single chunk is analyzed right here
+                    executor = ProcessPoolExecutor(max_workers=workers)
+                pending.append(self._submit_chunk(paths, chunk_stats, executor))
+                while len(pending) > workers * 2:
+                    yield self._collect_chunk(*pending.popleft())
+            while pending:
+                yield self._collect_chunk(*pending.popleft())
+        finally:
+            if executor is not None and executor is not prefetcher:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit_chunk(self, chunk, stats, executor):
+        """
+        Resolves cache hits and sends only the misses off for analysis.
+        `executor` is the process pool, a Prefetcher, or None to analyze
+        right here.
+        """
+        prefetcher = executor if isinstance(executor, Prefetcher) else None
+        if stats is None:
+            if self.cache is not None and prefetcher is not None:
+                stats = prefetcher.stat_many(chunk)
+            elif self.cache is not None:
+                stats = [self._try_stat(path) for path in chunk]
+            else:
+                stats = [None] * len(chunk)
+
+        if self.cache is not None:
+            cached = self.cache.get_many(chunk, stats)
+        else:
+            cached = [None] * len(chunk)
+
+        misses = [i for i, hit in enumerate(cached) if hit is None]
+        miss_paths = [chunk[i] for i in misses]
+        miss_stats = [stats[i] for i in misses]
+        if prefetcher is not None:
+            future = Future()
+            rows = prefetcher.submit_chunk(miss_paths, miss_stats, self.analyze_dates)
+            # Stage timings were recorded in this process already
+            rows.add_done_callback(lambda done: self._resolve(future, done))
+        elif executor is not None and misses:
+            future = executor.submit(_analyze_chunk, miss_paths, miss_stats)
+        else:
+            future = Future()
+            future.set_result(_analyze_chunk(miss_paths, miss_stats))
+
+        return chunk, stats, cached, future
+
+    def _collect_chunk(self, chunk, stats, cached, future) -> list:
+        miss_rows, timings = future.result()
+        miss_rows = iter(miss_rows)
+        if timings:
+            instrumentation.merge(timings)
+        rows = []
+        fresh = []
+
+        for path, stat, hit in zip(chunk, stats, cached):
+            if hit is not None:
+                taken, digitized, modified, fn_date = hit
+                created, fs_modified = ExifHandler.filesystem_dates(stat)
+                rows.append(((taken, digitized, modified, created, fs_modified, fn_date), None))
+                continue
+
+            dates, error = next(miss_rows)
+            rows.append((dates, error))
+            if self.cache is not None and error is None and stat is not None:
+                fresh.append((path, stat, (dates[0], dates[1], dates[2], dates[5])))
+
+        if fresh:
+            self.cache.put_many(fresh)
+
+        return self._build_chunk(chunk, rows)
+
+    @staticmethod
+    def _resolve(future, rows):
+        if rows.cancelled():
+            future.cancel()
+        elif rows.exception() is not None:
+            future.set_exception(rows.exception())
+        else:
+            future.set_result((rows.result(), None))
+
+    @staticmethod
+    def _try_stat(path):
+        try:
+            return os.stat(path)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _chunk(records, workers, total=None):
+        # ~4 tasks per worker keeps cores busy without flooding the pipe;
+        # a listing of unknown length grows up to the largest chunks
+        target = MAX_CHUNK_SIZE if total is None else total // (workers * 4)
+        target = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, target))
+
+        # Ramp up from small chunks so the first results arrive quickly
+        records = iter(records)
+        size = MIN_CHUNK_SIZE
+        while True:
+            chunk = list(islice(records, size))
+            if not chunk:
+                return
+            yield chunk
+            size = min(size * 2, target)
+
+    def _build_chunk(self, file_paths, rows) -> list:
+        batch = []
+        for path, (dates, error) in zip(file_paths, rows):
+            if error is None:
+                batch.append(self._build_metadata(path, dates))
+            else:
+                meta = self._build_metadata(path, (None,) * 6)
+                meta.status = "Error"
+                meta.message = f"Analysis failed: {error}"
+                batch.append(meta)
+        return batch
+
+    @staticmethod
+    def _build_metadata(file_path: str, dates: tuple) -> FileMetadata:
         filename = os.path.basename(file_path)
         ext = os.path.splitext(filename)[1].lower()
-
-        meta = self.exif_handler.get_media_dates(file_path)
-        fn_date = self.filename_parser.extract_date(filename)
+        taken, digitized, modified, created, fs_modified, fn_date = dates
 
         return FileMetadata(
             file_path=file_path,
             filename=filename,
             extension=ext,
 
-            exif_date_taken=meta["date_taken"],
-            exif_date_digitized=meta["date_digitized"],
-            exif_date_modified=meta["date_modified"],
+            exif_date_taken=taken,
+            exif_date_digitized=digitized,
+            exif_date_modified=modified,
 
-            file_system_created=meta["file_created"],
-            file_system_modified=meta["file_modified"],
+            file_system_created=created,
+            file_system_modified=fs_modified,
 
             filename_date=fn_date,
         )
 
-    def apply_rules(self, file_meta: FileMetadata, rules: dict):
-        proposed = None
-
-        if rules.get("manual_date"):
-            proposed = rules["manual_date"].replace(microsecond=0)
-
-        elif rules.get("use_exif") and file_meta.exif_date_taken:
-            proposed = file_meta.exif_date_taken
-
-        elif rules.get("use_filename") and file_meta.filename_date:
-            proposed = file_meta.filename_date
-
-        elif rules.get("use_earliest"):
-            dates = [
-                file_meta.exif_date_taken,
-                file_meta.filename_date,
-                file_meta.file_system_created,
-            ]
-            dates = [d for d in dates if d]
-            if dates:
-                proposed = min(dates)
-
-        if proposed and rules.get("offset_hours"):
-            proposed += timedelta(hours=rules["offset_hours"])
-
-        file_meta.proposed_date = proposed
-        
-        if rules.get("enable_rename") and proposed:
-            date_str = proposed.strftime(self._get_strftime_format(rules.get("date_format", "YYYYMMDD_HHMMSS")))
-            prefix = rules.get("prefix", "")
-            suffix = rules.get("suffix", "")
-            new_name = f"{prefix}{date_str}{suffix}{file_meta.extension}"
-            file_meta.proposed_filename = new_name
-        else:
-            file_meta.proposed_filename = None
+    def apply_rules(self, file_meta: FileMetadata, rules: dict, seq: int = 1):
+        """`seq` is the file's 1-based position in the list, for {seq} in name templates."""
+        with stage("rules.apply", file_meta.extension):
+            proposed = None
+            source = None
+
+            if rules.get("manual_date"):
+                proposed = rules["manual_date"].replace(microsecond=0)
+                source = "manual"
+
+            elif rules.get("use_exif") and file_meta.exif_date_taken:
+                proposed = file_meta.exif_date_taken
+                source = "exif"
+
+            elif rules.get("use_filename") and file_meta.filename_date:
+                proposed = file_meta.filename_date
+                source = "filename"
+
+            elif rules.get("use_earliest"):
+                dates = [
+                    (file_meta.exif_date_taken, "exif"),
+                    (file_meta.filename_date, "filename"),
+                    (file_meta.file_system_created, "fs"),
+                ]
+                dates = [(d, s) for d, s in dates if d]
+                if dates:
+                    # The first source wins a tie, as in the batch evaluator
+                    proposed, source = min(dates, key=lambda entry: entry[0])
+
+            if proposed and rules.get("offset_hours"):
+                proposed += timedelta(hours=rules["offset_hours"])
+
+            file_meta.proposed_date = proposed
+            file_meta.proposed_source = source
+
+            if rules.get("enable_rename") and proposed:
+                stem = os.path.splitext(file_meta.filename)[0]
+                file_meta.proposed_filename = self.filename_formatter(rules)(
+                    proposed, file_meta.extension, stem, source, seq
+                )
+            else:
+                file_meta.proposed_filename = None
+
+            return proposed
+
+    @staticmethod
+    def name_template(rules: dict):
+        """
+        Returns the compiled RenameTemplate of `rules`. Without a
+        name_template the date format, prefix and suffix settings are
+        used. Raises ValueError for an invalid template.
+        """
+        template = rules.get("name_template") or legacy_template(
+            rules.get("date_format", "YYYYMMDD_HHMMSS"),
+            rules.get("prefix", ""),
+            rules.get("suffix", ""),
+        )
+        return compile_template(template)
+
+    @staticmethod
+    def filename_formatter(rules: dict):
+        """A callable (proposed_date, extension, stem, source, seq) -> new name for `rules`."""
+        return ProcessingController.name_template(rules).render
+
+    # -------------------------------------------------
+    # NAME CLASHES
+    # -------------------------------------------------
+    def plan_targets(self, files, rules: dict, planner=None, rows=None, folders=None) -> list:
+        """
+        Gives every file in `files` a target path no other file has and
+        no existing file uses, renaming clashes to `name_1`, `name_2`, ...
+        (the new name is stored as proposed_filename). Returns the
+        RenameConflicts; pass the same planner for every batch of a run.
+        `rows` limits planning to those (ascending) positions of `files`;
+        a `folders` dict receives the normcase'd target folder of each
+        planned row.
+        """
+        if not rules.get("enable_rename") and not rules.get("output_dir"):
+            return []
+        planner = planner or RenamePlanner()
+        conflicts = []
+        for row in range(len(files)) if rows is None else rows:
+            file_meta = files[row]
+            if not file_meta.proposed_date:
+                continue
+            wanted = self.target_path(file_meta, rules)
+            if folders is not None:
+                folders[row] = os.path.normcase(os.path.dirname(wanted))
+            resolved, existing = planner.claim(file_meta.file_path, wanted)
+            if existing is None:
+                continue
+            # Keep the template's subfolders, only the file name changes
+            folder = os.path.dirname(file_meta.proposed_filename or "")
+            name = os.path.basename(resolved)
+            file_meta.proposed_filename = f"{folder}/{name}" if folder else name
+            conflicts.append(RenameConflict(row, wanted, resolved, existing))
+        return conflicts
+
+    # -------------------------------------------------
+    # BATCH APPLY
+    # -------------------------------------------------
+    def iter_process(self, files, rules: dict, workers=None, dry_run=False, cancelled=None, journal=None):
+        """
+        Runs process_file over `files` on a thread pool and yields
+        (row, success, stat) in row order, whatever order the files
+        finish in. stat is the os.stat_result of a successfully applied
+        file, taken on the pool thread (None otherwise, and on dry runs).
+
+        Files whose source or target path coincide are processed one at a
+        time. `cancelled` is an optional callable checked before each file
+        starts; once it returns True no new files are started and the
+        generator ends after the ones in flight.
 
-        return proposed
+        With an ApplyJournal, each file's plan is made durable before the
+        file is submitted and a done mark is recorded once it finishes.
+        """
+        workers = max(1, workers or DEFAULT_APPLY_WORKERS)
+        locks = [threading.Lock() for _ in range(_PATH_LOCK_STRIPES)]
+        executor = ThreadPoolExecutor(max_workers=workers)
+        # Rows [0, planned) have a synced plan entry; row -> journal seq
+        planned = 0
+        seqs = {}
 
-    def _get_strftime_format(self, format_str: str) -> str:
-        mapping = {
-            "YYYYMMDD_HHMMSS": "%Y%m%d_%H%M%S",
-            "YYYY-MM-DD_HH-MM-SS": "%Y-%m-%d_%H-%M-%S",
-            "YYYYMMDD": "%Y%m%d",
-            "YYYY-MM-DD": "%Y-%m-%d"
-        }
-        return mapping.get(format_str, "%Y%m%d_%H%M%S")
+        # Files in flight, oldest first: results are reported from the
+        # front only, which keeps them in row order
+        pending = deque()
+        try:
+            for row in range(len(files)):
+                if cancelled is not None and cancelled():
+                    break
+                if journal is not None and not dry_run and row >= planned:
+                    planned = min(len(files), row + journal.sync_every)
+                    self._plan_rows(journal, files, rules, row, planned, seqs)
+                future = executor.submit(
+                    self._process_locked, files[row], rules, dry_run, locks
+                )
+                pending.append((row, future))
+                while len(pending) > workers * 4:
+                    yield self._finish_row(*pending.popleft(), journal, seqs)
+            while pending:
+                yield self._finish_row(*pending.popleft(), journal, seqs)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _plan_rows(self, journal, files, rules, first, last, seqs):
+        output_dir = bool(rules.get("output_dir"))
+        for row in range(first, last):
+            file_meta = files[row]
+            if file_meta.proposed_date:
+                seqs[row] = journal.plan(file_meta, self.target_path(file_meta, rules), output_dir)
+        journal.sync()
+
+    @staticmethod
+    def _finish_row(row, future, journal, seqs):
+        success, stat = future.result()
+        seq = seqs.pop(row, None)
+        if seq is not None:
+            journal.done(seq, success)
+        return row, success, stat
+
+    def _process_locked(self, file_meta, rules, dry_run, locks) -> tuple:
+        source = file_meta.file_path
+        paths = {source, self.target_path(file_meta, rules)}
+        # Always acquired in index order so two files cannot deadlock
+        stripes = sorted({
+            hash(os.path.normcase(os.path.abspath(path))) % len(locks)
+            for path in paths
+        })
+
+        for stripe in stripes:
+            locks[stripe].acquire()
+        try:
+            success = self.process_file(file_meta, rules, dry_run)
+        except Exception as e:
+            file_meta.status = "Error"
+            file_meta.message = f"Processing failed: {str(e)}"
+            return False, None
+        finally:
+            for stripe in reversed(stripes):
+                locks[stripe].release()
+
+        # Stat-ed here so a slow share does not hold up the caller reading results
+        return success, self._try_stat(file_meta.file_path) if success and not dry_run else None
+
+    @staticmethod
+    def target_path(file_meta: FileMetadata, rules: dict) -> str:
+        """Where process_file will put the file."""
+        target_dir = rules.get("output_dir")
+        if not target_dir:
+            target_dir = os.path.dirname(file_meta.file_path)
+
+        target_name = file_meta.proposed_filename if file_meta.proposed_filename else file_meta.filename
+        return os.path.join(target_dir, target_name)
+
+    def _ensure_dir(self, directory: str):
+        # Apply workers race on the same folders; makedirs tolerates that
+        if directory and directory not in self._made_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._made_dirs.add(directory)
 
     def process_file(self, file_meta: FileMetadata, rules: dict, dry_run=False) -> bool:
         if not file_meta.proposed_date:
@@ -94,19 +477,25 @@ class ProcessingController:
             return True
 
         original_path = file_meta.file_path
-        target_dir = rules.get("output_dir")
-        if not target_dir:
-            target_dir = os.path.dirname(original_path)
-            
-        target_name = file_meta.proposed_filename if file_meta.proposed_filename else file_meta.filename
-        target_path = os.path.join(target_dir, target_name)
+        target_path = self.target_path(file_meta, rules)
+        target_name = os.path.basename(target_path)
 
+        # Set when the copy already carries the new dates and file times
+        written = False
         if target_path != original_path:
             try:
+                # Templates may sort files into (new) date folders
+                self._ensure_dir(os.path.dirname(target_path))
                 if rules.get("output_dir"):
-                    shutil.copy2(original_path, target_path)
+                    with stage("apply.copy", file_meta.extension):
+                        written = self.exif_handler.copy_with_metadata(
+                            original_path, target_path, file_meta.proposed_date
+                        )
+                        if not written:
+                            shutil.copy2(original_path, target_path)
                 else:
-                    os.rename(original_path, target_path)
+                    with stage("apply.rename", file_meta.extension):
+                        os.rename(original_path, target_path)
                 
                 file_meta.file_path = target_path
                 file_meta.filename = target_name
@@ -115,10 +504,13 @@ class ProcessingController:
                 file_meta.message = f"File operation failed: {str(e)}"
                 return False
 
-        success = self.exif_handler.update_metadata(
-            file_meta.file_path,
-            file_meta.proposed_date,
-        )
+        success = written
+        if not success:
+            with stage("apply.metadata", file_meta.extension):
+                success = self.exif_handler.update_metadata(
+                    file_meta.file_path,
+                    file_meta.proposed_date,
+                )
 
         if success:
             file_meta.status = "Processed"
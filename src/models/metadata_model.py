@@ -20,6 +20,7 @@ class FileMetadata:
     # Proposed/New metadata
     proposed_date: Optional[datetime] = None
     proposed_filename: Optional[str] = None
+    proposed_source: Optional[str] = None  # exif, filename, fs or manual
     status: str = "Pending" # Pending, Processed, Error, Skipped
     message: str = ""
 
@@ -0,0 +1,383 @@
+import os
+import threading
+from array import array
+from datetime import datetime, timedelta
+from typing import Optional
+
+from .metadata_model import FileMetadata
+
+
+# Null date sentinel: int64 minimum, which NumPy also reads as NaT
+NULL_DATE = -(2 ** 63)
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Placeholder in proposed_filenames: format from filename_formatter on first access
+LAZY_FILENAME = object()
+
+# proposed_source values, stored as their index (0 = None)
+SOURCES = (None, "exif", "filename", "fs", "manual")
+_SOURCE_CODES = {source: code for code, source in enumerate(SOURCES)}
+
+DATE_FIELDS = (
+    "exif_date_taken",
+    "exif_date_digitized",
+    "exif_date_modified",
+    "file_system_created",
+    "file_system_modified",
+    "filename_date",
+    "proposed_date",
+)
+
+
+def date_to_int(value: Optional[datetime]) -> int:
+    """Naive datetime -> microseconds since 1970-01-01 (wall clock, no timezone)."""
+    if value is None:
+        return NULL_DATE
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def int_to_date(value: int) -> Optional[datetime]:
+    if value == NULL_DATE:
+        return None
+    return _EPOCH + timedelta(microseconds=value)
+
+
+class StringPool:
+    """Interns repeated strings (directories, extensions, statuses) as small ints."""
+
+    def __init__(self):
+        self.strings = []
+        self._codes = {}
+        # Apply workers may intern new directories concurrently
+        self._lock = threading.Lock()
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self.strings)
+                    self.strings.append(value)
+                    self._codes[value] = code
+        return code
+
+    def __getitem__(self, code: int) -> str:
+        return self.strings[code]
+
+
+class MetadataStore:
+    """
+    Columnar container for FileMetadata.
+
+    Dates live in int64 arrays (NULL_DATE for None), extensions and
+    statuses are small-int codes, and each path is split into a pooled
+    directory prefix plus its file name. Indexing returns a lightweight
+    FileMetadataView with the same attributes as FileMetadata, so code
+    written against the dataclass keeps working.
+
+    Views refer to a row by position: deleting rows shifts later views.
+    """
+
+    def __init__(self, metas=None):
+        self.dates = {name: array("q") for name in DATE_FIELDS}
+        self.dir_codes = array("I")
+        self.names = []
+        self.ext_codes = array("H")
+        self.status_codes = array("B")
+        self.messages = []
+        self.proposed_filenames = []
+        self.source_codes = array("B")
+        # Rare rows whose filename is not the tail of file_path
+        self.filename_overrides = {}
+        # Callable(proposed_date, extension, stem, source, seq) -> name,
+        # used for LAZY_FILENAME rows (seq is the 1-based row number)
+        self.filename_formatter = None
+        # True when the formatter uses seq: names after a deleted row are stale
+        self.numbered_names = False
+
+        # Rule evaluation bookkeeping: rows [0, clean_rows) were evaluated
+        # and, apart from dirty_rows, their inputs have not changed since
+        self.clean_rows = 0
+        self.dirty_rows = set()
+
+        self.dirs = StringPool()
+        self.extensions = StringPool()
+        self.statuses = StringPool()
+        for status in ("Pending", "Processed", "Error", "Skipped", "Dry Run"):
+            self.statuses.code(status)
+
+        if metas:
+            self.extend(metas)
+
+    # -------------------------------------------------
+    # LIST INTERFACE
+    # -------------------------------------------------
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [FileMetadataView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("MetadataStore index out of range")
+        return FileMetadataView(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield FileMetadataView(self, i)
+
+    def append(self, meta):
+        self.extend([meta])
+
+    def extend(self, metas):
+        date_columns = [(name, self.dates[name]) for name in DATE_FIELDS]
+        ext_code = self.extensions.code
+        status_code = self.statuses.code
+
+        for meta in metas:
+            row = len(self.names)
+            for name, column in date_columns:
+                column.append(date_to_int(getattr(meta, name)))
+            self.dir_codes.append(0)
+            self.names.append("")
+            self._set_path(row, meta.file_path, meta.filename)
+            self.ext_codes.append(ext_code(meta.extension))
+            self.status_codes.append(status_code(meta.status))
+            self.messages.append(meta.message)
+            self.proposed_filenames.append(meta.proposed_filename)
+            self.source_codes.append(_SOURCE_CODES[getattr(meta, "proposed_source", None)])
+
+    def __delitem__(self, index):
+        if not isinstance(index, slice):
+            if index < 0:
+                index += len(self)
+            index = slice(index, index + 1)
+
+        start, stop, step = index.indices(len(self))
+        if step != 1:
+            raise ValueError("MetadataStore only supports contiguous deletes")
+
+        for column in self.dates.values():
+            del column[start:stop]
+        del self.dir_codes[start:stop]
+        del self.names[start:stop]
+        del self.ext_codes[start:stop]
+        del self.status_codes[start:stop]
+        del self.messages[start:stop]
+        del self.proposed_filenames[start:stop]
+        del self.source_codes[start:stop]
+        if self.numbered_names:
+            # Later rows moved up, so their {seq} changed: rebuild on access
+            self.proposed_filenames[start:] = [LAZY_FILENAME] * (len(self) - start)
+
+        removed = stop - start
+        if self.filename_overrides:
+            self.filename_overrides = {
+                (row - removed if row >= stop else row): name
+                for row, name in self.filename_overrides.items()
+                if not start <= row < stop
+            }
+        if self.dirty_rows:
+            self.dirty_rows = {
+                row - removed if row >= stop else row
+                for row in self.dirty_rows
+                if not start <= row < stop
+            }
+        self.clean_rows -= max(0, min(stop, self.clean_rows) - start)
+
+    def clear(self):
+        del self[:]
+
+    def sort_by_path(self, start=0):
+        """
+        Sorts rows [start, len) by file path. Sorted rows count as not
+        evaluated yet, so the next rule evaluation covers them again.
+        """
+        order = sorted(range(start, len(self)), key=self._file_path)
+        if order == list(range(start, len(self))):
+            return
+
+        columns = [*self.dates.values(), self.dir_codes, self.names, self.ext_codes,
+                   self.status_codes, self.messages, self.proposed_filenames, self.source_codes]
+        for column in columns:
+            values = [column[row] for row in order]
+            column[start:] = array(column.typecode, values) if isinstance(column, array) else values
+
+        if self.filename_overrides:
+            moved = {old: new for new, old in enumerate(order, start)}
+            self.filename_overrides = {
+                moved.get(row, row): name for row, name in self.filename_overrides.items()
+            }
+        if self.numbered_names:
+            self.proposed_filenames[start:] = [LAZY_FILENAME] * (len(self) - start)
+        self.dirty_rows = {row for row in self.dirty_rows if row < start}
+        self.clean_rows = min(self.clean_rows, start)
+
+    # -------------------------------------------------
+    # CHANGE TRACKING
+    # -------------------------------------------------
+    def mark_dirty(self, row):
+        """Records that an input of an already evaluated row changed."""
+        if row < self.clean_rows:
+            self.dirty_rows.add(row)
+
+    def stale_rows(self) -> list:
+        """Rows whose inputs changed or that were added since mark_clean()."""
+        return sorted(self.dirty_rows) + list(range(self.clean_rows, len(self)))
+
+    def mark_clean(self):
+        self.clean_rows = len(self)
+        self.dirty_rows = set()
+
+    def to_metadata(self, index) -> FileMetadata:
+        """Materializes one row as a regular FileMetadata."""
+        view = self[index]
+        return FileMetadata(
+            file_path=view.file_path,
+            filename=view.filename,
+            extension=view.extension,
+            proposed_filename=view.proposed_filename,
+            proposed_source=view.proposed_source,
+            status=view.status,
+            message=view.message,
+            **{name: getattr(view, name) for name in DATE_FIELDS},
+        )
+
+    # -------------------------------------------------
+    # PATHS
+    # -------------------------------------------------
+    def _set_path(self, row, file_path, filename):
+        if filename and file_path.endswith(filename):
+            prefix = file_path[:len(file_path) - len(filename)]
+            self.filename_overrides.pop(row, None)
+        else:
+            self.filename_overrides[row] = filename
+            prefix, filename = file_path, ""
+        self.dir_codes[row] = self.dirs.code(prefix)
+        self.names[row] = filename
+
+    def _file_path(self, row):
+        return self.dirs[self.dir_codes[row]] + self.names[row]
+
+    def _proposed_filename(self, row):
+        name = self.proposed_filenames[row]
+        if name is LAZY_FILENAME:
+            proposed = int_to_date(self.dates["proposed_date"][row])
+            if proposed is None or self.filename_formatter is None:
+                name = None
+            else:
+                name = self.filename_formatter(
+                    proposed,
+                    self.extensions[self.ext_codes[row]],
+                    os.path.splitext(self._filename(row))[0],
+                    SOURCES[self.source_codes[row]] or "",
+                    row + 1,
+                )
+            self.proposed_filenames[row] = name
+        return name
+
+    def _filename(self, row):
+        if row in self.filename_overrides:
+            return self.filename_overrides[row]
+        return self.names[row]
+
+
+def _date_property(name):
+    def fget(self):
+        return int_to_date(self._store.dates[name][self._index])
+
+    def fset(self, value):
+        self._store.dates[name][self._index] = date_to_int(value)
+        if name != "proposed_date":
+            self._store.mark_dirty(self._index)
+
+    return property(fget, fset)
+
+
+class FileMetadataView:
+    """Row view over a MetadataStore with the FileMetadata attribute API."""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: MetadataStore, index: int):
+        self._store = store
+        self._index = index
+
+    exif_date_taken = _date_property("exif_date_taken")
+    exif_date_digitized = _date_property("exif_date_digitized")
+    exif_date_modified = _date_property("exif_date_modified")
+    file_system_created = _date_property("file_system_created")
+    file_system_modified = _date_property("file_system_modified")
+    filename_date = _date_property("filename_date")
+    proposed_date = _date_property("proposed_date")
+
+    @property
+    def file_path(self) -> str:
+        return self._store._file_path(self._index)
+
+    @file_path.setter
+    def file_path(self, value: str):
+        self._store._set_path(self._index, value, self.filename)
+
+    @property
+    def filename(self) -> str:
+        return self._store._filename(self._index)
+
+    @filename.setter
+    def filename(self, value: str):
+        self._store._set_path(self._index, self.file_path, value)
+
+    @property
+    def extension(self) -> str:
+        return self._store.extensions[self._store.ext_codes[self._index]]
+
+    @extension.setter
+    def extension(self, value: str):
+        self._store.ext_codes[self._index] = self._store.extensions.code(value)
+        self._store.mark_dirty(self._index)
+
+    @property
+    def status(self) -> str:
+        return self._store.statuses[self._store.status_codes[self._index]]
+
+    @status.setter
+    def status(self, value: str):
+        self._store.status_codes[self._index] = self._store.statuses.code(value)
+
+    @property
+    def message(self) -> str:
+        return self._store.messages[self._index]
+
+    @message.setter
+    def message(self, value: str):
+        self._store.messages[self._index] = value
+
+    @property
+    def proposed_filename(self) -> Optional[str]:
+        return self._store._proposed_filename(self._index)
+
+    @proposed_filename.setter
+    def proposed_filename(self, value: Optional[str]):
+        self._store.proposed_filenames[self._index] = value
+
+    @property
+    def proposed_source(self) -> Optional[str]:
+        return SOURCES[self._store.source_codes[self._index]]
+
+    @proposed_source.setter
+    def proposed_source(self, value: Optional[str]):
+        self._store.source_codes[self._index] = _SOURCE_CODES[value]
+
+    @property
+    def current_best_date(self) -> Optional[datetime]:
+        """Returns the most reliable date currently available."""
+        return self.exif_date_taken or self.filename_date or self.exif_date_digitized or self.file_system_created
+
+    def __repr__(self):
+        return f"FileMetadataView({self._index}, {self.file_path!r})"
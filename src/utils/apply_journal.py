@@ -0,0 +1,234 @@
+import json
+import os
+import time
+from datetime import datetime
+
+from .exif_reader import read_jpeg_exif_dates
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _from_iso(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+class ApplyJournal:
+    """
+    Append-only write-ahead journal of an apply run (one JSON object per line).
+
+    Every file gets a "plan" entry (old/new path, old/new dates) that is
+    fsync'ed before the file is touched, and a "done" entry once
+    process_file returns. Plans are written and synced in groups of
+    `sync_every` files; done marks are synced at the same rate and on
+    close, so a crash loses at most the last group's done marks. Files
+    whose plan has no done mark are treated as possibly applied: resume
+    runs them again (every step is idempotent) and undo only reverts
+    what it can see was changed.
+    """
+
+    def __init__(self, path: str, sync_every: int = 256):
+        self.path = path
+        self.sync_every = sync_every
+        self.state = JournalState.load(path)
+        self._seq = self.state.last_seq
+        self._unsynced = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    @staticmethod
+    def default_path() -> str:
+        """A new journal file in the per-user journal folder."""
+        if os.name == "nt":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+            folder = os.path.join(base, "EXIF Date Fixer", "journals")
+        else:
+            base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+            folder = os.path.join(base, "exif-date-fixer", "journals")
+        return os.path.join(folder, time.strftime("apply-%Y%m%d-%H%M%S.jsonl"))
+
+    # -------------------------------------------------
+    # WRITING
+    # -------------------------------------------------
+    def plan(self, file_meta, target_path: str, output_dir: bool) -> int:
+        """Records the intended change of one file; returns its sequence number."""
+        self._seq += 1
+        source = file_meta.file_path
+        if target_path == source:
+            action = "inplace"
+        else:
+            action = "copy" if output_dir else "rename"
+
+        self._write({
+            "op": "plan",
+            "seq": self._seq,
+            "action": action,
+            "src": source,
+            "dst": target_path,
+            "ext": file_meta.extension,
+            "old_taken": _iso(file_meta.exif_date_taken),
+            "old_digitized": _iso(file_meta.exif_date_digitized),
+            "old_created": _iso(file_meta.file_system_created),
+            "old_modified": _iso(file_meta.file_system_modified),
+            "new": _iso(file_meta.proposed_date),
+        })
+        return self._seq
+
+    def done(self, seq: int, success: bool):
+        self._write({"op": "done", "seq": seq, "ok": bool(success)})
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+
+    def undone(self, seq: int):
+        self._write({"op": "undone", "seq": seq})
+
+    def sync(self):
+        """Makes everything written so far durable."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+    def _write(self, entry: dict):
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+class JournalState:
+    """Parsed contents of a journal file."""
+
+    def __init__(self):
+        self.plans = {}         # seq -> plan entry
+        self.done = {}          # seq -> success
+        self.undone = set()     # seq
+        self.applied = set()    # src and dst paths of successful entries
+        self.last_seq = 0
+
+    @staticmethod
+    def load(path: str) -> "JournalState":
+        state = JournalState()
+        try:
+            f = open(path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return state
+
+        with f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    op = entry["op"]
+                    seq = entry["seq"]
+                except (ValueError, KeyError, TypeError):
+                    # A torn last line after a crash
+                    continue
+                state.last_seq = max(state.last_seq, seq)
+                if op == "plan":
+                    state.plans[seq] = entry
+                elif op == "done":
+                    state.done[seq] = entry.get("ok", False)
+                elif op == "undone":
+                    state.undone.add(seq)
+
+        for seq, success in state.done.items():
+            plan = state.plans.get(seq)
+            if success and plan is not None and seq not in state.undone:
+                state.applied.add(plan["src"])
+                state.applied.add(plan["dst"])
+        return state
+
+    def is_applied(self, path: str) -> bool:
+        """True when `path` was successfully processed (as source or result)."""
+        return path in self.applied
+
+
+# -------------------------------------------------
+# UNDO
+# -------------------------------------------------
+def undo(path: str, exif_handler) -> tuple:
+    """
+    Reverts every change recorded in the journal at `path`, newest first,
+    and marks each reverted entry so a second undo skips it.
+    Entries without a done mark are only reverted where the change is
+    visible (the file was moved, or now carries the planned date); the
+    dates of entries that failed are left alone.
+    Returns (undone, skipped, failed) lists of messages.
+    """
+    journal = ApplyJournal(path)
+    state = journal.state
+    undone, skipped, failed = [], [], []
+
+    try:
+        for seq in sorted(state.plans, reverse=True):
+            if seq in state.undone:
+                continue
+            plan = state.plans[seq]
+            try:
+                result = _undo_entry(plan, state.done.get(seq), exif_handler)
+            except (OSError, ValueError) as e:
+                failed.append(f"{plan['src']}: {e}")
+                continue
+
+            if result is None:
+                skipped.append(plan["src"])
+            else:
+                undone.append(result)
+                journal.undone(seq)
+    finally:
+        journal.close()
+
+    return undone, skipped, failed
+
+
+def _undo_entry(plan: dict, outcome, exif_handler):
+    """`outcome` is the done mark: True/False, or None when it was lost."""
+    src, dst, action = plan["src"], plan["dst"], plan["action"]
+    confirmed = outcome is not None
+
+    if action == "copy":
+        # The source is never modified in output-folder mode; only remove
+        # copies we know were completed
+        if outcome is not True or not os.path.exists(dst):
+            return None
+        os.remove(dst)
+        return f"removed {dst}"
+
+    moved = False
+    if action == "rename":
+        if os.path.exists(dst) and not os.path.exists(src):
+            os.rename(dst, src)
+            moved = True
+        elif not os.path.exists(src):
+            raise OSError(f"neither {src} nor {dst} exists")
+
+    if outcome is False or (not confirmed and not _carries_date(src, plan)):
+        # Failed or never reached the metadata step: the dates are untouched
+        return f"moved back {dst}" if moved else None
+
+    exif_handler.restore_metadata(
+        src,
+        _from_iso(plan["old_taken"]),
+        _from_iso(plan["old_digitized"]),
+        _from_iso(plan["old_created"]),
+        _from_iso(plan["old_modified"]),
+    )
+    return f"restored {src}"
+
+
+def _carries_date(path: str, plan: dict) -> bool:
+    """Whether `path` already shows the planned date (EXIF or mtime)."""
+    new = _from_iso(plan["new"])
+    if plan["ext"] in (".jpg", ".jpeg"):
+        dates = read_jpeg_exif_dates(path)
+        if dates and dates["date_taken"] == new:
+            return True
+    try:
+        return int(os.stat(path).st_mtime) == int(new.timestamp())
+    except (OSError, OverflowError, ValueError):
+        return False
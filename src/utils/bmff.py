@@ -0,0 +1,244 @@
+import struct
+from datetime import datetime, timedelta, timezone
+
+
+# ISO-BMFF / QuickTime timestamps count seconds from 1904-01-01 UTC
+MAC_EPOCH = datetime(1904, 1, 1, tzinfo=timezone.utc)
+
+# Box types that may open an ISO-BMFF or QuickTime file
+TOP_LEVEL_TYPES = {
+    b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot", b"uuid", b"meta",
+}
+
+# Guards against crafted files with endless runs of tiny boxes
+_MAX_BOXES = 256
+
+
+def iter_boxes(f, start: int, end: int):
+    """
+    Yields (type, payload_offset, payload_size) for each box in [start, end).
+    Only the box headers are read; payloads are skipped by seeking, so a
+    multi-gigabyte mdat costs one 8 or 16 byte read.
+    Raises ValueError on a malformed box header.
+    """
+    pos = start
+    for _ in range(_MAX_BOXES):
+        if pos + 8 > end:
+            return
+
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+
+        size, box_type = struct.unpack(">I4s", header)
+        header_size = 8
+
+        if size == 1:
+            # 64-bit largesize follows the type
+            large = f.read(8)
+            if len(large) < 8:
+                raise ValueError("Truncated box header")
+            size = struct.unpack(">Q", large)[0]
+            header_size = 16
+        elif size == 0:
+            # Box runs to the end of its parent (or the file)
+            size = end - pos
+
+        if size < header_size or pos + size > end:
+            raise ValueError(f"Bad size for box {box_type!r}")
+
+        yield box_type, pos + header_size, size - header_size
+        pos += size
+
+
+def find_box(f, start: int, end: int, box_type: bytes):
+    """Returns (payload_offset, payload_size) of the first `box_type` child, or None."""
+    for found_type, offset, size in iter_boxes(f, start, end):
+        if found_type == box_type:
+            return offset, size
+    return None
+
+
+def is_bmff(head: bytes) -> bool:
+    """True when the first 8 bytes of a file look like an ISO-BMFF box header."""
+    return len(head) >= 8 and head[4:8] in TOP_LEVEL_TYPES
+
+
+def read_creation_time(f, file_size: int):
+    """
+    Reads the creation time of an MP4/MOV file from moov/mvhd, falling
+    back to the first track's tkhd and then its mdhd when mvhd is unset.
+    moov may sit anywhere at top level, including after mdat.
+
+    Returns (utc_datetime, source_box) with source_box one of "mvhd",
+    "tkhd" or "mdhd", or None when no box carries a creation time.
+    Raises ValueError on a malformed file.
+    """
+    moov = find_box(f, 0, file_size, b"moov")
+    if moov is None:
+        return None
+    moov_start = moov[0]
+    moov_end = moov_start + moov[1]
+
+    mvhd = find_box(f, moov_start, moov_end, b"mvhd")
+    if mvhd is not None:
+        created = _read_header_time(f, *mvhd)
+        if created is not None:
+            return created, "mvhd"
+
+    for box_type, offset, size in iter_boxes(f, moov_start, moov_end):
+        if box_type != b"trak":
+            continue
+
+        tkhd = find_box(f, offset, offset + size, b"tkhd")
+        if tkhd is not None:
+            created = _read_header_time(f, *tkhd)
+            if created is not None:
+                return created, "tkhd"
+
+        mdia = find_box(f, offset, offset + size, b"mdia")
+        if mdia is not None:
+            mdhd = find_box(f, mdia[0], mdia[0] + mdia[1], b"mdhd")
+            if mdhd is not None:
+                created = _read_header_time(f, *mdhd)
+                if created is not None:
+                    return created, "mdhd"
+
+    return None
+
+
+def _read_header_time(f, offset: int, size: int):
+    """
+    Parses the creation_time of an mvhd/tkhd/mdhd full box.
+    Version 0 stores 32-bit times, version 1 stores 64-bit times.
+    Returns None for an unset (zero) or out of range value.
+    """
+    f.seek(offset)
+    data = f.read(min(size, 12))
+    if len(data) < 8:
+        raise ValueError("Truncated header box")
+
+    if data[0] == 1:
+        if len(data) < 12:
+            raise ValueError("Truncated header box")
+        seconds = struct.unpack(">Q", data[4:12])[0]
+    else:
+        seconds = struct.unpack(">I", data[4:8])[0]
+
+    if not seconds:
+        return None
+    try:
+        return MAC_EPOCH + timedelta(seconds=seconds)
+    except OverflowError:
+        return None
+
+
+# -------------------------------------------------
+# HEIF ITEMS
+# -------------------------------------------------
+def find_item_extents(f, file_size: int, item_type: bytes):
+    """
+    Locates the first item of `item_type` (e.g. b"Exif") in a HEIF file
+    through the top-level meta box: iinf gives the item id, iloc its
+    extents. Returns [(file_offset, length)], or None when there is no
+    such item. Only box headers and the two tables are read.
+    Raises ValueError on a malformed file.
+    """
+    meta = find_box(f, 0, file_size, b"meta")
+    if meta is None:
+        return None
+    # meta is a full box: version and flags precede its children
+    meta_start, meta_end = meta[0] + 4, meta[0] + meta[1]
+
+    iinf = find_box(f, meta_start, meta_end, b"iinf")
+    iloc = find_box(f, meta_start, meta_end, b"iloc")
+    if iinf is None or iloc is None:
+        return None
+
+    item_id = _find_item_id(f, iinf, item_type)
+    if item_id is None:
+        return None
+
+    f.seek(iloc[0])
+    extents = _parse_iloc(f.read(iloc[1]), item_id)
+    if extents is None:
+        return None
+
+    construction_method, extents = extents
+    if construction_method == 1:
+        # Offsets are relative to the meta box's idat payload
+        idat = find_box(f, meta_start, meta_end, b"idat")
+        if idat is None:
+            raise ValueError("iloc refers to a missing idat box")
+        extents = [(idat[0] + offset, length) for offset, length in extents]
+    elif construction_method != 0:
+        return None
+    return extents
+
+
+def _find_item_id(f, iinf, item_type: bytes):
+    f.seek(iinf[0])
+    header = f.read(8)
+    if len(header) < 6:
+        raise ValueError("Truncated iinf box")
+    # Entry count is 16-bit in version 0, 32-bit after
+    children = iinf[0] + (6 if header[0] == 0 else 8)
+
+    for box_type, offset, size in iter_boxes(f, children, iinf[0] + iinf[1]):
+        if box_type != b"infe":
+            continue
+        f.seek(offset)
+        infe = f.read(min(size, 16))
+        version = infe[0] if infe else 0
+        if version == 2 and len(infe) >= 12:
+            item_id, = struct.unpack(">H", infe[4:6])
+            found_type = infe[8:12]
+        elif version == 3 and len(infe) >= 14:
+            item_id, = struct.unpack(">I", infe[4:8])
+            found_type = infe[10:14]
+        else:
+            # Versions 0/1 predate item types
+            continue
+        if found_type == item_type:
+            return item_id
+    return None
+
+
+def _parse_iloc(data: bytes, wanted_id: int):
+    """Returns (construction_method, [(offset, length)]) for `wanted_id`, or None."""
+    if len(data) < 8:
+        raise ValueError("Truncated iloc box")
+    version = data[0]
+    offset_size, length_size = data[4] >> 4, data[4] & 0x0F
+    base_offset_size = data[5] >> 4
+    index_size = data[5] & 0x0F if version in (1, 2) else 0
+    pos = 6
+
+    def read(size):
+        nonlocal pos
+        if size == 0:
+            return 0
+        if size not in (2, 4, 8) or pos + size > len(data):
+            raise ValueError("Bad iloc field")
+        value = int.from_bytes(data[pos:pos + size], "big")
+        pos += size
+        return value
+
+    id_size = 2 if version < 2 else 4
+    for _ in range(read(id_size)):
+        item_id = read(id_size)
+        construction_method = read(2) & 0x0F if version in (1, 2) else 0
+        read(2)     # data_reference_index
+        base_offset = read(base_offset_size)
+        extent_count = read(2)
+
+        extents = []
+        for _ in range(extent_count):
+            read(index_size)
+            offset = read(offset_size)
+            length = read(length_size)
+            extents.append((base_offset + offset, length))
+        if item_id == wanted_id:
+            return construction_method, extents
+    return None
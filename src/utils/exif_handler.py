@@ -1,17 +1,22 @@
 import os
-import platform
+import shutil
 from datetime import datetime
 from pathlib import Path
-from PIL import Image
-import piexif
 
 from .video_metadata import get_video_creation_time
+from .instrumentation import stage
+from .exif_reader import (
+    TAG_DATETIME_DIGITIZED,
+    TAG_DATETIME_ORIGINAL,
+    copy_jpeg_with_dates,
+    patch_jpeg_exif_dates,
+    read_heic_exif_dates,
+    read_jpeg_exif_dates,
+    read_png_exif_dates,
+)
 
-# Windows-only imports
-if platform.system() == "Windows":
-    import pywintypes  #type: ignore
-    import win32file   #type: ignore
-    import win32con    #type: ignore
+# Pillow, piexif and pywin32 are imported on first use: they are only
+# needed for non-JPEG photos, EXIF writes and Windows creation times.
 
 
 class ExifHandler:
@@ -22,26 +27,60 @@ class ExifHandler:
 
     PHOTO_EXTENSIONS = [".jpg", ".jpeg", ".png", ".heic"]
     VIDEO_EXTENSIONS = [".mp4", ".mov", ".avi", ".mkv"]
+    JPEG_EXTENSIONS = [".jpg", ".jpeg"]
+
+    # Photo formats whose dates are read from the header without Pillow
+    HEADER_READERS = {
+        ".jpg": read_jpeg_exif_dates,
+        ".jpeg": read_jpeg_exif_dates,
+        ".png": read_png_exif_dates,
+        ".heic": read_heic_exif_dates,
+    }
 
     # -------------------------------------------------
     # READ METADATA
     # -------------------------------------------------
     @staticmethod
-    def get_media_dates(file_path: str):
+    def get_media_dates(file_path: str, stat=None, head=None):
+        """
+        `stat` is the file's os.stat_result when the caller already has one;
+        `head` an open binary file of it (e.g. a prefetched HeaderBuffer)
+        that the parsers read instead of opening the file again.
+        """
         file_path = Path(file_path)
+        source = str(file_path) if head is None else head
+        ext = file_path.suffix.lower()
 
         date_taken = None
         date_digitized = None
         date_modified = None
 
-        # ---------- PHOTO EXIF ----------
-        if file_path.suffix.lower() in ExifHandler.PHOTO_EXTENSIONS:
+        # ---------- JPEG / PNG / HEIC EXIF (HEADER ONLY) ----------
+        fast = None
+        header_reader = ExifHandler.HEADER_READERS.get(ext)
+        if header_reader is not None:
+            with stage("exif.header", ext):
+                fast = header_reader(source)
+            if fast:
+                date_taken = fast["date_taken"]
+                date_digitized = fast["date_digitized"]
+                date_modified = fast["date_modified"]
+
+        # ---------- PHOTO EXIF (PILLOW FALLBACK) ----------
+        if fast is None and ext in ExifHandler.PHOTO_EXTENSIONS:
             try:
-                img = Image.open(file_path)
-                exif_bytes = img.info.get("exif")
+                from PIL import Image
+                import piexif
+
+                if head is not None:
+                    head.seek(0)
+                with stage("exif.image_open", ext):
+                    img = Image.open(file_path if head is None else head)
+                    exif_bytes = img.info.get("exif")
 
                 if exif_bytes:
-                    exif = piexif.load(exif_bytes)
+                    with stage("exif.piexif_load", ext):
+                        exif = piexif.load(exif_bytes)
 
                     if piexif.ExifIFD.DateTimeOriginal in exif["Exif"]:
                         date_taken = ExifHandler._parse_exif(
@@ -61,17 +100,15 @@ class ExifHandler:
                 pass
 
         # ---------- FILESYSTEM ----------
-        stat = os.stat(file_path)
-
-        file_created = (
-            datetime.fromtimestamp(stat.st_ctime)
-            if os.name == "nt"
-            else datetime.fromtimestamp(stat.st_mtime)
-        )
+        if stat is None:
+            with stage("stat", ext):
+                stat = os.stat(file_path)
+        file_created, file_modified = ExifHandler.filesystem_dates(stat)
 
         # ---------- VIDEO METADATA (REAL CREATION DATE) ----------
-        if file_path.suffix.lower() in ExifHandler.VIDEO_EXTENSIONS:
-            video_date = get_video_creation_time(str(file_path))
+        if ext in ExifHandler.VIDEO_EXTENSIONS:
+            with stage("video", ext):
+                video_date = get_video_creation_time(str(file_path), head)
             if video_date:
                 date_taken = video_date
 
@@ -80,9 +117,19 @@ class ExifHandler:
             "date_digitized": date_digitized,
             "date_modified": date_modified,
             "file_created": file_created,
-            "file_modified": datetime.fromtimestamp(stat.st_mtime),
+            "file_modified": file_modified,
         }
 
+    @staticmethod
+    def filesystem_dates(stat):
+        """Returns (created, modified) local datetimes from an os.stat result."""
+        file_created = (
+            datetime.fromtimestamp(stat.st_ctime)
+            if os.name == "nt"
+            else datetime.fromtimestamp(stat.st_mtime)
+        )
+        return file_created, datetime.fromtimestamp(stat.st_mtime)
+
     @staticmethod
     def _parse_exif(value):
         try:
@@ -110,7 +157,13 @@ class ExifHandler:
 
         try:
             # ---------- EXIF WRITE (JPEG only) ----------
-            if ext in [".jpg", ".jpeg"]:
+            # Dates are fixed-width, so existing values are patched in
+            # place; the full rewrite is only needed when tags are missing
+            if ext in [".jpg", ".jpeg"] and not patch_jpeg_exif_dates(
+                file_path, date_str.encode()
+            ):
+                import piexif
+
                 exif = piexif.load(file_path)
 
                 exif["Exif"][piexif.ExifIFD.DateTimeOriginal] = date_str.encode()
@@ -119,24 +172,89 @@ class ExifHandler:
 
                 piexif.insert(piexif.dump(exif), file_path)
 
-            # ---------- FILESYSTEM ----------
-            os.utime(file_path, (new_date.timestamp(), new_date.timestamp()))
-
-            # ---------- WINDOWS CREATED DATE ----------
-            if os.name == "nt":
-                ExifHandler._set_windows_creation_time(file_path, new_date)
-
+            ExifHandler._set_file_times(file_path, new_date)
             return True
 
         except Exception as e:
             print("Metadata update failed:", e)
             return False
 
+    @staticmethod
+    def copy_with_metadata(src_path: str, dst_path: str, new_date: datetime) -> bool:
+        """
+        Output-folder copy in a single pass: JPEG dates are patched while
+        the file is copied, then stats and times are set as copy2 +
+        update_metadata would. Returns False without writing anything when
+        the file needs the regular copy followed by update_metadata.
+        """
+        if not isinstance(new_date, datetime):
+            return False
+        if Path(src_path).suffix.lower() not in ExifHandler.JPEG_EXTENSIONS:
+            return False
+
+        date_str = new_date.strftime("%Y:%m:%d %H:%M:%S")
+        if not copy_jpeg_with_dates(src_path, dst_path, date_str.encode()):
+            return False
+
+        shutil.copystat(src_path, dst_path)
+        ExifHandler._set_file_times(dst_path, new_date)
+        return True
+
+    @staticmethod
+    def restore_metadata(file_path: str, taken, digitized, created, modified):
+        """
+        Reverts update_metadata using the values recorded before it ran:
+        EXIF Date Taken / Digitized (None removes the tag again) and the
+        file times. Raises on failure.
+        """
+        if Path(file_path).suffix.lower() in ExifHandler.JPEG_EXTENSIONS:
+            pending = {}
+            for tag, value in ((TAG_DATETIME_ORIGINAL, taken), (TAG_DATETIME_DIGITIZED, digitized)):
+                if value is not None:
+                    date_str = value.strftime("%Y:%m:%d %H:%M:%S").encode()
+                    if patch_jpeg_exif_dates(file_path, date_str, tags=(tag,)):
+                        continue
+                    pending[tag] = date_str
+                else:
+                    pending[tag] = None
+
+            current = read_jpeg_exif_dates(file_path) or {}
+            present = current.get("offsets", {})
+            # Only rewrite when a tag must be added or one we added removed
+            if any(value is not None or tag in present for tag, value in pending.items()):
+                import piexif
+
+                exif = piexif.load(file_path)
+                for tag, value in pending.items():
+                    if value is None:
+                        exif["Exif"].pop(tag, None)
+                    else:
+                        exif["Exif"][tag] = value
+                piexif.insert(piexif.dump(exif), file_path)
+
+        if modified is not None:
+            os.utime(file_path, (modified.timestamp(), modified.timestamp()))
+        if os.name == "nt" and created is not None:
+            ExifHandler._set_windows_creation_time(file_path, created)
+
+    @staticmethod
+    def _set_file_times(file_path: str, new_date: datetime):
+        # ---------- FILESYSTEM ----------
+        os.utime(file_path, (new_date.timestamp(), new_date.timestamp()))
+
+        # ---------- WINDOWS CREATED DATE ----------
+        if os.name == "nt":
+            ExifHandler._set_windows_creation_time(file_path, new_date)
+
     # -------------------------------------------------
     # WINDOWS CREATION TIME
     # -------------------------------------------------
     @staticmethod
     def _set_windows_creation_time(file_path: str, new_date: datetime):
+        import pywintypes  #type: ignore
+        import win32file   #type: ignore
+        import win32con    #type: ignore
+
         handle = win32file.CreateFile(
             file_path,
             win32con.GENERIC_WRITE,
@@ -0,0 +1,520 @@
+import os
+import re
+import struct
+import zlib
+from datetime import datetime
+
+from .bmff import find_item_extents, is_bmff
+from .file_utils import FileUtils
+
+
+# EXIF tag ids we care about
+TAG_DATETIME = 0x0132             # IFD0  - DateTime (modified)
+TAG_EXIF_IFD = 0x8769             # IFD0  - pointer to Exif sub-IFD
+TAG_DATETIME_ORIGINAL = 0x9003    # Exif  - Date Taken
+TAG_DATETIME_DIGITIZED = 0x9004   # Exif  - Date Digitized
+TAG_OFFSET_TIME = 0x9010
+TAG_OFFSET_TIME_ORIGINAL = 0x9011
+TAG_OFFSET_TIME_DIGITIZED = 0x9012
+TAG_SUBSEC_TIME = 0x9290
+TAG_SUBSEC_TIME_ORIGINAL = 0x9291
+TAG_SUBSEC_TIME_DIGITIZED = 0x9292
+
+EXIF_HEADER = b"Exif\x00\x00"
+
+# Longest run of segments we walk before giving up on finding APP1
+_MAX_SEGMENTS = 32
+_TYPE_ASCII = 2
+_TYPE_LONG = 4
+
+
+def parse_exif_datetime(value):
+    """
+    Parses a fixed-width EXIF date ("YYYY:MM:DD HH:MM:SS") without strptime.
+    Returns naive datetime or None.
+    """
+    if len(value) < 19:
+        return None
+    try:
+        if value[4] != 0x3A or value[7] != 0x3A or value[13] != 0x3A or value[16] != 0x3A:
+            return None
+        return datetime(
+            int(value[0:4]), int(value[5:7]), int(value[8:10]),
+            int(value[11:13]), int(value[14:16]), int(value[17:19]),
+        )
+    except ValueError:
+        return None
+
+
+def read_jpeg_exif_dates(source):
+    """
+    Reads the EXIF dates of a JPEG from its APP1 segment only.
+    `source` is a path or an open binary file (see FileUtils.open_source).
+    Returns a dict (see parse_tiff_dates) or None when the fast path
+    cannot handle the file, so callers can fall back to Pillow.
+    """
+    try:
+        with FileUtils.open_source(source) as f:
+            found = find_jpeg_exif(f)
+            if found is None:
+                return empty_dates()
+            offset, length = found
+            f.seek(offset)
+            tiff = f.read(length)
+    except (OSError, ValueError):
+        return None
+
+    return parse_tiff_dates(tiff)
+
+
+def empty_dates():
+    """Result for a well-formed file that simply carries no EXIF dates."""
+    return {
+        "date_taken": None,
+        "date_digitized": None,
+        "date_modified": None,
+        "subsec_taken": None,
+        "subsec_digitized": None,
+        "subsec_modified": None,
+        "offset_taken": None,
+        "offset_digitized": None,
+        "offset_modified": None,
+        "offsets": {},
+    }
+
+
+def find_jpeg_exif(f):
+    """
+    Walks JPEG markers up to the EXIF APP1 segment.
+    Returns (tiff_offset, tiff_length), or None when the image data starts
+    without an EXIF segment. Raises ValueError on a malformed stream.
+    Only the marker headers are read on the way.
+    """
+    if f.read(2) != b"\xff\xd8":
+        raise ValueError("Not a JPEG stream")
+
+    for _ in range(_MAX_SEGMENTS):
+        prefix = f.read(2)
+        if len(prefix) < 2 or prefix[0] != 0xFF:
+            raise ValueError("Bad JPEG marker")
+
+        marker = prefix[1]
+        # Fill bytes before a marker
+        while marker == 0xFF:
+            fill = f.read(1)
+            if not fill:
+                raise ValueError("Truncated JPEG marker")
+            marker = fill[0]
+
+        # Start of scan / end of image: no metadata beyond this point
+        if marker in (0xDA, 0xD9):
+            return None
+
+        size = f.read(2)
+        if len(size) < 2:
+            raise ValueError("Truncated JPEG segment")
+        length = struct.unpack(">H", size)[0]
+        if length < 2:
+            raise ValueError("Bad JPEG segment length")
+
+        if marker == 0xE1 and length >= 8:
+            ident = f.read(6)
+            if ident == EXIF_HEADER:
+                return f.tell(), length - 8
+            f.seek(length - 8, 1)
+        else:
+            f.seek(length - 2, 1)
+
+    raise ValueError("Too many JPEG segments before image data")
+
+
+def parse_tiff_dates(tiff: bytes):
+    """
+    Reads DateTimeOriginal, DateTimeDigitized and DateTime (plus their
+    SubSec/OffsetTime companions) out of a TIFF-structured EXIF block.
+
+    Returns a dict with date_taken / date_digitized / date_modified
+    (naive datetimes), the raw subsec_* / offset_* strings, and
+    `offsets`, the absolute position of each date value inside `tiff`
+    keyed by tag id. Returns None when the block is malformed.
+    """
+    if len(tiff) < 8:
+        return None
+
+    if tiff[:2] == b"II":
+        endian = "<"
+    elif tiff[:2] == b"MM":
+        endian = ">"
+    else:
+        return None
+
+    if struct.unpack(endian + "H", tiff[2:4])[0] != 42:
+        return None
+
+    ifd0 = struct.unpack(endian + "I", tiff[4:8])[0]
+    entries = _read_ifd(tiff, ifd0, endian)
+    if entries is None:
+        return None
+
+    exif_ifd = entries.get(TAG_EXIF_IFD)
+    if exif_ifd is not None:
+        exif_entries = _read_ifd(tiff, exif_ifd[2], endian)
+        if exif_entries:
+            entries.update(exif_entries)
+
+    values = {}
+    offsets = {}
+    for tag, entry in entries.items():
+        if tag == TAG_EXIF_IFD or entry[0] != _TYPE_ASCII:
+            continue
+        value_type, count, value_offset = entry
+        if value_offset + count > len(tiff):
+            continue
+        values[tag] = tiff[value_offset:value_offset + count].rstrip(b"\x00 ")
+        offsets[tag] = (value_offset, count)
+
+    def date(tag):
+        value = values.get(tag)
+        return parse_exif_datetime(value) if value else None
+
+    def text(tag):
+        value = values.get(tag)
+        return value.decode("ascii", "replace") if value else None
+
+    return {
+        "date_taken": date(TAG_DATETIME_ORIGINAL),
+        "date_digitized": date(TAG_DATETIME_DIGITIZED),
+        "date_modified": date(TAG_DATETIME),
+        "subsec_taken": text(TAG_SUBSEC_TIME_ORIGINAL),
+        "subsec_digitized": text(TAG_SUBSEC_TIME_DIGITIZED),
+        "subsec_modified": text(TAG_SUBSEC_TIME),
+        "offset_taken": text(TAG_OFFSET_TIME_ORIGINAL),
+        "offset_digitized": text(TAG_OFFSET_TIME_DIGITIZED),
+        "offset_modified": text(TAG_OFFSET_TIME),
+        "offsets": {
+            tag: offsets[tag]
+            for tag in (TAG_DATETIME_ORIGINAL, TAG_DATETIME_DIGITIZED, TAG_DATETIME)
+            if tag in offsets
+        },
+    }
+
+
+_WANTED_TAGS = {
+    TAG_DATETIME,
+    TAG_EXIF_IFD,
+    TAG_DATETIME_ORIGINAL,
+    TAG_DATETIME_DIGITIZED,
+    TAG_OFFSET_TIME,
+    TAG_OFFSET_TIME_ORIGINAL,
+    TAG_OFFSET_TIME_DIGITIZED,
+    TAG_SUBSEC_TIME,
+    TAG_SUBSEC_TIME_ORIGINAL,
+    TAG_SUBSEC_TIME_DIGITIZED,
+}
+
+
+def _read_ifd(tiff: bytes, offset: int, endian: str):
+    """
+    Returns {tag: (type, count, value_offset)} for the tags we want.
+    value_offset is the absolute position of the value, resolving the
+    inline (<= 4 bytes) case; for the Exif IFD pointer it is the pointer.
+    """
+    if offset + 2 > len(tiff):
+        return None
+
+    count = struct.unpack(endian + "H", tiff[offset:offset + 2])[0]
+    end = offset + 2 + count * 12
+    if end > len(tiff):
+        return None
+
+    entries = {}
+    for pos in range(offset + 2, end, 12):
+        tag, value_type, n, raw = struct.unpack(endian + "HHII", tiff[pos:pos + 12])
+        if tag not in _WANTED_TAGS:
+            continue
+
+        if tag == TAG_EXIF_IFD:
+            if value_type == _TYPE_LONG:
+                entries[tag] = (value_type, n, raw)
+        elif value_type == _TYPE_ASCII:
+            # ASCII values of 4 bytes or less live inside the entry itself
+            entries[tag] = (value_type, n, pos + 8 if n <= 4 else raw)
+
+    return entries
+
+
+# Fixed-width "YYYY:MM:DD HH:MM:SS" plus its NUL terminator
+EXIF_DATE_LENGTH = 20
+
+
+def patch_jpeg_exif_dates(
+    file_path: str,
+    value: bytes,
+    tags=(TAG_DATETIME_ORIGINAL, TAG_DATETIME_DIGITIZED),
+) -> bool:
+    """
+    Overwrites existing EXIF date values of a JPEG in place, touching only
+    their bytes. `value` is the 19-byte "YYYY:MM:DD HH:MM:SS" string.
+
+    Returns False without modifying the file when there is no EXIF block
+    or any of `tags` is missing or shorter than a full date, so callers
+    can fall back to rewriting the EXIF block.
+    """
+    if len(value) != EXIF_DATE_LENGTH - 1:
+        return False
+
+    try:
+        with open(file_path, "r+b") as f:
+            targets = _date_targets(f, value, tags)
+            if targets is None:
+                return False
+            for position, data in targets:
+                f.seek(position)
+                f.write(data)
+    except (OSError, ValueError):
+        return False
+
+    return True
+
+
+def copy_jpeg_with_dates(
+    src_path: str,
+    dst_path: str,
+    value: bytes,
+    tags=(TAG_DATETIME_ORIGINAL, TAG_DATETIME_DIGITIZED),
+) -> bool:
+    """
+    Copies a JPEG to `dst_path` with its EXIF dates replaced, in one pass:
+    the header up to the end of the EXIF block is patched in memory and
+    the rest is copied with FileUtils.copy_tail. The result is
+    byte-identical to copying the file and then calling
+    patch_jpeg_exif_dates on the copy.
+
+    Returns False without creating `dst_path` when the dates cannot be
+    patched (see patch_jpeg_exif_dates). I/O errors during the copy are
+    raised and the partial copy is removed.
+    """
+    if len(value) != EXIF_DATE_LENGTH - 1:
+        return False
+
+    with open(src_path, "rb") as src:
+        try:
+            targets = _date_targets(src, value, tags)
+        except ValueError:
+            return False
+        if targets is None:
+            return False
+
+        # The header ends with the EXIF block, which is at most 64 KB
+        header_end = src.tell()
+        src.seek(0)
+        header = bytearray(src.read(header_end))
+        for position, data in targets:
+            header[position:position + len(data)] = data
+
+        try:
+            with open(dst_path, "wb") as dst:
+                dst.write(header)
+                FileUtils.copy_tail(src, dst, header_end)
+        except OSError:
+            try:
+                os.remove(dst_path)
+            except OSError:
+                pass
+            raise
+
+    return True
+
+
+def _date_targets(f, value: bytes, tags):
+    """
+    Returns [(file position, padded value)] for each of `tags`, or None
+    when any is missing or too short. Leaves `f` at the end of the EXIF
+    block. Raises ValueError on a malformed JPEG.
+    """
+    found = find_jpeg_exif(f)
+    if found is None:
+        return None
+    tiff_offset, length = found
+    f.seek(tiff_offset)
+    parsed = parse_tiff_dates(f.read(length))
+    if parsed is None:
+        return None
+
+    targets = []
+    for tag in tags:
+        entry = parsed["offsets"].get(tag)
+        if entry is None or entry[1] < EXIF_DATE_LENGTH:
+            return None
+        offset, count = entry
+        targets.append((tiff_offset + offset, value.ljust(count, b"\x00")))
+    return targets
+
+
+# -------------------------------------------------
+# PNG
+# -------------------------------------------------
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Text chunk keyword carrying an XMP packet
+XMP_KEYWORD = b"XML:com.adobe.xmp"
+
+# Largest metadata chunk we are willing to read
+_MAX_METADATA_CHUNK = 1 << 20
+_MAX_CHUNKS = 256
+
+
+def read_png_exif_dates(source):
+    """
+    Reads dates from a PNG's eXIf chunk, falling back to an XMP packet in
+    a tEXt/iTXt chunk for any date the EXIF block lacks. Chunks are walked
+    by their headers up to the first IDAT (where Pillow stops too); only
+    metadata chunks are read. `source` is a path or an open binary file.
+    Returns a dict (see parse_tiff_dates) or None when the file is not a
+    readable PNG.
+    """
+    try:
+        with FileUtils.open_source(source) as f:
+            if f.read(8) != PNG_SIGNATURE:
+                return None
+            tiff, xmp = _read_png_metadata(f)
+    except (OSError, ValueError, zlib.error):
+        return None
+
+    dates = empty_dates()
+    if tiff is not None:
+        if tiff.startswith(EXIF_HEADER):
+            tiff = tiff[len(EXIF_HEADER):]
+        dates = parse_tiff_dates(tiff) or dates
+    if xmp is not None:
+        _merge_xmp_dates(dates, xmp)
+    return dates
+
+
+def _read_png_metadata(f):
+    """Returns (eXIf payload, XMP packet), either None when absent."""
+    tiff = xmp = None
+    for _ in range(_MAX_CHUNKS):
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        length, chunk_type = struct.unpack(">I4s", header)
+        if chunk_type in (b"IDAT", b"IEND"):
+            break
+
+        if chunk_type in (b"eXIf", b"tEXt", b"iTXt") and length <= _MAX_METADATA_CHUNK:
+            data = f.read(length)
+            if len(data) < length:
+                raise ValueError("Truncated PNG chunk")
+            f.seek(4, 1)    # CRC
+            if chunk_type == b"eXIf":
+                tiff = data
+            elif xmp is None:
+                xmp = _png_text_xmp(chunk_type, data)
+        else:
+            f.seek(length + 4, 1)
+    return tiff, xmp
+
+
+def _png_text_xmp(chunk_type: bytes, data: bytes):
+    keyword, sep, text = data.partition(b"\x00")
+    if not sep or keyword != XMP_KEYWORD:
+        return None
+    if chunk_type == b"tEXt":
+        return text
+
+    # iTXt: compression flag, method, language tag\0, translated keyword\0, text
+    if len(text) < 2:
+        return None
+    compressed = text[0] == 1
+    parts = text[2:].split(b"\x00", 2)
+    if len(parts) < 3:
+        return None
+    return zlib.decompress(parts[2]) if compressed else parts[2]
+
+
+# -------------------------------------------------
+# XMP
+# -------------------------------------------------
+# (XMP property, dates key), strongest first for each key
+_XMP_DATES = (
+    (b"exif:DateTimeOriginal", "date_taken"),
+    (b"photoshop:DateCreated", "date_taken"),
+    (b"exif:DateTimeDigitized", "date_digitized"),
+    (b"xmp:CreateDate", "date_digitized"),
+    (b"xmp:ModifyDate", "date_modified"),
+)
+
+_XMP_VALUE = {
+    name: re.compile(
+        # Attribute (name="value") or element (<name>value</name>) form
+        rb"\b" + re.escape(name) + rb"""(?:\s*=\s*["']|>)\s*([0-9][0-9T:.+\-Z ]*)"""
+    )
+    for name, _ in _XMP_DATES
+}
+
+
+def _merge_xmp_dates(dates: dict, xmp: bytes):
+    """Fills the dates `dates` lacks from an XMP packet (local wall time)."""
+    for name, key in _XMP_DATES:
+        if dates[key] is not None:
+            continue
+        match = _XMP_VALUE[name].search(xmp)
+        if match:
+            dates[key] = parse_xmp_datetime(match.group(1).decode("ascii"))
+
+
+def parse_xmp_datetime(value: str):
+    """
+    Parses an XMP (ISO 8601) date such as "2023-05-01T12:30:00+02:00".
+    The offset is dropped: like EXIF dates the result is the naive wall
+    time the photo was taken at. Returns None when unparseable.
+    """
+    value = value.strip()
+    if value.endswith("Z"):
+        value = value[:-1]
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=None, microsecond=0)
+
+
+# -------------------------------------------------
+# HEIC / HEIF
+# -------------------------------------------------
+def read_heic_exif_dates(source):
+    """
+    Reads the EXIF dates of a HEIC/HEIF image without decoding it: the
+    meta box's iinf/iloc tables locate the Exif item, and only that
+    item's bytes are read. `source` is a path or an open binary file.
+    Returns a dict (see parse_tiff_dates) or None when the file cannot be
+    handled this way.
+    """
+    try:
+        with FileUtils.open_source(source) as f:
+            file_size = FileUtils.source_size(f)
+            if not is_bmff(f.read(8)):
+                return None
+            extents = find_item_extents(f, file_size, b"Exif")
+            if extents is None:
+                return empty_dates()
+
+            item = bytearray()
+            for offset, length in extents:
+                if length == 0:
+                    # Extent runs to the end of the file
+                    length = file_size - offset
+                f.seek(offset)
+                item += f.read(min(length, _MAX_METADATA_CHUNK - len(item)))
+                if len(item) >= _MAX_METADATA_CHUNK:
+                    break
+    except (OSError, ValueError):
+        return None
+
+    # The item starts with the offset of the TIFF header past this field,
+    # normally skipping an "Exif\0\0" prefix
+    if len(item) < 4:
+        return None
+    start = 4 + struct.unpack(">I", item[:4])[0]
+    return parse_tiff_dates(bytes(item[start:]))
@@ -1,6 +1,18 @@
+import contextlib
 import os
+import shutil
+import stat as stat_module
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
+# How iter_media treats symbolic links:
+#   "skip"   - ignore links entirely
+#   "files"  - include linked files, do not walk linked folders
+#   "follow" - also walk linked folders (each real folder only once)
+SYMLINK_POLICIES = ("skip", "files", "follow")
+
+
 class FileUtils:
     """Utility functions for file and folder operations."""
     
@@ -9,21 +21,196 @@ class FileUtils:
     @staticmethod
     def scan_folder(folder_path, recursive=False):
         """Scans a folder for supported image and video files."""
+        return sorted(path for path, _ in FileUtils.iter_media(folder_path, recursive))
+
+    @staticmethod
+    def iter_media(
+        folder_path,
+        recursive=False,
+        symlinks="files",
+        include_hidden=True,
+        extensions=None,
+        workers=1,
+    ):
+        """
+        Yields (path, os.stat_result) for supported files as they are found,
+        in directory order (not sorted). Names are filtered by extension and
+        hidden-ness before anything is stat-ed, so each yielded file costs
+        one stat and everything else costs none.
+
+        With workers > 1 subfolders are listed on a thread pool, which
+        mostly helps on network drives.
+        """
+        if symlinks not in SYMLINK_POLICIES:
+            raise ValueError(f"Unknown symlink policy: {symlinks}")
+        if extensions is None:
+            extensions = FileUtils.SUPPORTED_EXTENSIONS
+        else:
+            extensions = {ext.lower() for ext in extensions}
+
+        root = os.path.normpath(str(folder_path))
+        if not os.path.isdir(root):
+            return
+
+        def scan(path):
+            return FileUtils._scan_dir(path, recursive, symlinks, include_hidden, extensions)
+
+        # Real folders already walked, to stop symlink loops
+        seen = set()
+        if symlinks == "follow":
+            root_stat = os.stat(root)
+            seen.add((root_stat.st_dev, root_stat.st_ino))
+
+        def unseen(subdirs):
+            for path, key in subdirs:
+                if key is None:
+                    yield path
+                elif key not in seen:
+                    seen.add(key)
+                    yield path
+
+        if workers <= 1 or not recursive:
+            stack = [root]
+            while stack:
+                files, subdirs = scan(stack.pop())
+                yield from files
+                # Reversed so folders are walked in listing order
+                stack.extend(reversed(list(unseen(subdirs))))
+            return
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            pending = {executor.submit(scan, root)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, subdirs = future.result()
+                    pending.update(executor.submit(scan, path) for path in unseen(subdirs))
+                    yield from files
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _scan_dir(path, recursive, symlinks, include_hidden, extensions, stat_files=True):
+        """
+        Lists one folder. Returns ([(path, stat)], [(subfolder, key)]) where
+        key is the folder's (st_dev, st_ino) when following symlinks.
+        With stat_files=False files are not stat-ed and come back with a
+        None stat (symlinks to non-files are then not filtered out).
+        Unreadable folders and entries are skipped.
+        """
         files = []
-        path = Path(folder_path)
-        
-        if not path.exists():
-            return files
-            
-        pattern = '**/*' if recursive else '*'
-        for p in path.glob(pattern):
-            if p.is_file() and p.suffix.lower() in FileUtils.SUPPORTED_EXTENSIONS:
-                files.append(str(p))
-                
-        return sorted(files)
+        subdirs = []
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            return files, subdirs
+
+        with entries:
+            for entry in entries:
+                try:
+                    if not include_hidden and FileUtils._is_hidden(entry):
+                        continue
+
+                    # is_symlink/is_dir come from the listing itself
+                    is_link = entry.is_symlink()
+                    if is_link and symlinks == "skip":
+                        continue
+
+                    if entry.is_dir():
+                        if recursive and (symlinks == "follow" or not is_link):
+                            key = None
+                            if symlinks == "follow":
+                                info = entry.stat()
+                                key = (info.st_dev, info.st_ino)
+                            subdirs.append((entry.path, key))
+                        continue
+
+                    if os.path.splitext(entry.name)[1].lower() not in extensions:
+                        continue
+
+                    if not stat_files:
+                        files.append((entry.path, None))
+                        continue
+
+                    info = entry.stat()
+                    if stat_module.S_ISREG(info.st_mode):
+                        files.append((entry.path, info))
+                except OSError:
+                    continue
+
+        return files, subdirs
+
+    @staticmethod
+    def _is_hidden(entry) -> bool:
+        if entry.name.startswith("."):
+            return True
+        if os.name == "nt":
+            # Free on Windows: the attributes come with the listing
+            attributes = entry.stat(follow_symlinks=False).st_file_attributes
+            return bool(attributes & stat_module.FILE_ATTRIBUTE_HIDDEN)
+        return False
 
     @staticmethod
     def get_safe_backup_path(file_path):
         """Generates a backup path for a file."""
         path = Path(file_path)
         return path.with_suffix(path.suffix + '.bak')
+
+    @staticmethod
+    def open_source(source):
+        """
+        Opens `source` for binary reading when it is a path. An already
+        open file (e.g. a prefetched HeaderBuffer) is rewound instead and
+        left open when the with-block ends.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            return open(source, "rb")
+        source.seek(0)
+        return contextlib.nullcontext(source)
+
+    @staticmethod
+    def source_size(f) -> int:
+        """Size of a file opened by open_source."""
+        size = getattr(f, "size", None)
+        return size if size is not None else os.fstat(f.fileno()).st_size
+
+    @staticmethod
+    def copy_tail(src, dst, offset: int):
+        """
+        Appends everything in `src` from `offset` to the end onto `dst`
+        (both open binary files). Uses os.copy_file_range or os.sendfile
+        where the kernel supports them, so the data never passes through
+        Python; anything they cannot do goes through a plain buffered copy.
+        """
+        dst.flush()
+        src_fd = src.fileno()
+        dst_fd = dst.fileno()
+        total = os.fstat(src_fd).st_size - offset
+        copied = 0
+
+        # Both calls take an explicit source offset and advance dst's position
+        if hasattr(os, "copy_file_range"):
+            try:
+                while copied < total:
+                    n = os.copy_file_range(src_fd, dst_fd, total - copied, offset + copied)
+                    if not n:
+                        break
+                    copied += n
+            except OSError:
+                pass
+
+        if copied < total and sys.platform.startswith("linux"):
+            try:
+                while copied < total:
+                    n = os.sendfile(dst_fd, src_fd, offset + copied, total - copied)
+                    if not n:
+                        break
+                    copied += n
+            except OSError:
+                pass
+
+        if copied < total:
+            src.seek(offset + copied)
+            dst.seek(0, os.SEEK_END)
+            shutil.copyfileobj(src, dst, 1024 * 1024)
@@ -1,66 +1,212 @@
 import re
+import time
 from datetime import datetime
-from dateutil import parser
+from operator import itemgetter
+
+
+# Building blocks shared by the patterns below
+_YEAR = r'(?P<year>19\d{2}|20\d{2})'
+_MONTH = r'(?P<month>0[1-9]|1[0-2])'
+_DAY = r'(?P<day>0[1-9]|[12]\d|3[01])'
+_HOUR = r'(?P<hour>[01]\d|2[0-3])'
+_MINUTE = r'(?P<minute>[0-5]\d)'
+_SECOND = r'(?P<second>[0-5]\d)'
+
+# A year followed by a month: needed by every year-first pattern
+_YEAR_MONTH_HINT = re.compile(r'(?:19|20)\d\d[-_.]?(?:0[1-9]|1[0-2])')
+
+_DATE_FIELDS = ("year", "month", "day")
+_TIME_FIELDS = ("hour", "minute", "second")
+# "00".."99" and the accepted years: a dict lookup is much cheaper than int()
+_NUMBERS = {f"{i:02d}": i for i in range(100)}
+_NUMBERS.update({str(year): year for year in range(1900, 2100)})
+
+# Distinct dates memoized before the memo is reset
+_MAX_CACHED_DAYS = 1 << 15
 
 
 class FilenameParser:
     """Automatically extracts date AND time from filenames."""
 
+    # -------------------------------------------------
+    # PATTERN REGISTRY (checked in order of priority)
+    # -------------------------------------------------
+    # Each pattern uses the named groups year/month/day and optionally
+    # hour/minute/second. Its `hint` (a literal the name must contain, or
+    # a compiled regex that must match) is checked before the pattern is
+    # tried: a substring test or one shared search is much cheaper than
+    # every failed pattern search. Add new styles with register_pattern().
+    PATTERNS = [
+        # WhatsApp: IMG-20230105-WA0001
+        ("whatsapp", r'(?:IMG|VID|AUD|PTT)-' + _YEAR + _MONTH + _DAY + r'-WA\d+', "-WA"),
+
+        # Google Pixel: PXL_20230105_123045123
+        ("pixel", r'PXL_' + _YEAR + _MONTH + _DAY + r'_' + _HOUR + _MINUTE + _SECOND, "PXL_"),
+
+        # Screenshots: Screenshot_2023-01-05-12-30-45 / Screenshot_20230105-123045
+        ("screenshot",
+         r'Screenshot[_ -]' + _YEAR + r'-?' + _MONTH + r'-?' + _DAY
+         + r'[-_ ]' + _HOUR + r'-?' + _MINUTE + r'-?' + _SECOND,
+         "Screenshot"),
+
+        # Android cameras: IMG_20230105_123045 / VID_20230105_123045
+        ("camera", r'^(?:IMG|VID)_' + _YEAR + _MONTH + _DAY + r'_' + _HOUR + _MINUTE + _SECOND, None),
+
+        # YYYY-MM-DD with optional HH-MM-SS / HH_MM_SS / HHMMSS
+        ("iso",
+         _YEAR + r'[-_.]' + _MONTH + r'[-_.]' + _DAY
+         + r'(?:[ T_.-]?' + _HOUR + r'[:_.-]?' + _MINUTE + r'[:_.-]?' + _SECOND + r')?',
+         _YEAR_MONTH_HINT),
+
+        # YYYYMMDD_HHMMSS (Samsung and most Android cameras)
+        ("compact",
+         _YEAR + _MONTH + _DAY
+         + r'(?:[_-]?' + _HOUR + _MINUTE + _SECOND + r')?',
+         _YEAR_MONTH_HINT),
+
+        # DD-MM-YYYY with optional time
+        ("dmy",
+         _DAY + r'[-_.]' + _MONTH + r'[-_.]' + _YEAR
+         + r'(?:[ T_.-]?' + _HOUR + r'[:_.-]?' + _MINUTE + r'[:_.-]?' + _SECOND + r')?',
+         None),
+    ]
+
+    # Per registered pattern: (literal hint, regex hint, compiled pattern,
+    # getter of the year/month/day groups, getter of the time groups or None)
+    _compiled = None
+    # (year, month, day) text -> ints, or False for an invalid date
+    _days = {}
+    _max_year = 0
+    _max_year_expires = 0.0
+
+    @classmethod
+    def register_pattern(cls, name: str, pattern: str, priority: int = None, hint=None):
+        """
+        Adds a filename style. `pattern` must define the year, month and day
+        named groups; `hint` is an optional literal or compiled regex every
+        matching name contains. Lower priority values are preferred; by
+        default the pattern is tried after the built-in ones.
+        """
+        if priority is None:
+            priority = len(cls.PATTERNS)
+        cls.PATTERNS = list(cls.PATTERNS)
+        cls.PATTERNS.insert(priority, (name, pattern, hint))
+        cls._compiled = None
+
+    @classmethod
+    def _compile(cls) -> list:
+        compiled = []
+        for _, pattern, hint in cls.PATTERNS:
+            regex = re.compile(pattern)
+            date_fields = _getter(regex, _DATE_FIELDS)
+            time_fields = None
+            if any(name in regex.groupindex for name in _TIME_FIELDS):
+                time_fields = _getter(regex, _TIME_FIELDS)
+            # Literal hints are tested with `in`, regex hints with search()
+            literal = hint if isinstance(hint, str) else None
+            hint = None if literal is not None else hint
+            compiled.append((literal, hint, regex, date_fields, time_fields))
+        cls._compiled = compiled
+        return compiled
+
+    @classmethod
+    def _latest_year(cls) -> int:
+        # Refreshed hourly instead of calling datetime.now() per file
+        now = time.time()
+        if now >= cls._max_year_expires:
+            max_year = datetime.now().year + 1
+            if max_year != cls._max_year:
+                # Memoized days were checked against the old limit
+                cls._days.clear()
+            cls._max_year = max_year
+            cls._max_year_expires = now + 3600
+        return cls._max_year
+
     @staticmethod
     def extract_date(filename: str):
-        now_year = datetime.now().year + 1
-
-        # -------------------------------------------------
-        # 1️⃣ ISO-like patterns WITH optional time
-        # -------------------------------------------------
-        iso_patterns = [
-            # YYYY-MM-DD HH-MM-SS / HH_MM_SS / HHMMSS
-            r'(19\d{2}|20\d{2})[-_.](0[1-9]|1[0-2])[-_.](0[1-9]|[12]\d|3[01])'
-            r'(?:[ T_.-]?(?:[01]\d|2[0-3])'
-            r'[:_.-]?[0-5]\d'
-            r'[:_.-]?[0-5]\d)?',
-
-            # YYYYMMDD_HHMMSS
-            r'(19\d{2}|20\d{2})(0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])'
-            r'(?:[_-]?(?:[01]\d|2[0-3])[0-5]\d[0-5]\d)?',
-        ]
-
-        for pattern in iso_patterns:
-            match = re.search(pattern, filename)
-            if match:
-                try:
-                    dt = parser.parse(
-                        match.group(0),
-                        yearfirst=True,
-                        fuzzy=True
-                    )
-                    if 1970 <= dt.year <= now_year:
+        """
+        Tries the patterns in priority order and returns the date of the
+        first valid match. A match that is not a real date (2023-02-30, a
+        year past next year) does not end the search: the same pattern is
+        retried one character further on, then the next pattern.
+        """
+        days = FilenameParser._days
+        last_hint = found = None
+        for literal, hint, regex, date_fields, time_fields in FilenameParser._compiled or FilenameParser._compile():
+            if literal is not None and literal not in filename:
+                continue
+            if hint is not None:
+                # Patterns sharing a hint search for it once
+                if hint is not last_hint:
+                    last_hint = hint
+                    found = hint.search(filename) is not None
+                if not found:
+                    continue
+            match = regex.search(filename)
+            while match is not None:
+                groups = match.groups()
+                fields = date_fields(groups)
+                day = days.get(fields)
+                if day is None:
+                    day = FilenameParser._parse_day(fields)
+                if day:
+                    if time_fields is None:
+                        return datetime(*day)
+                    clock = time_fields(groups)
+                    if clock[0] is None:
+                        # The optional time is not in the name
+                        return datetime(*day)
+                    try:
+                        hour, minute, second = clock
+                        return datetime(*day, _NUMBERS[hour], _NUMBERS[minute], _NUMBERS[second])
+                    except (KeyError, ValueError):
+                        # Not two digits, or fewer fields
+                        dt = FilenameParser._at_time(day, clock)
+                    if dt is not None:
                         return dt
-                except Exception:
-                    pass
-
-        # -------------------------------------------------
-        # 2️⃣ DD-MM-YYYY with optional time
-        # -------------------------------------------------
-        dmy_patterns = [
-            r'(0[1-9]|[12]\d|3[01])[-_.](0[1-9]|1[0-2])[-_.](19\d{2}|20\d{2})'
-            r'(?:[ T_.-]?(?:[01]\d|2[0-3])'
-            r'[:_.-]?[0-5]\d'
-            r'[:_.-]?[0-5]\d)?'
-        ]
-
-        for pattern in dmy_patterns:
-            match = re.search(pattern, filename)
-            if match:
-                try:
-                    dt = parser.parse(
-                        match.group(0),
-                        dayfirst=True,
-                        fuzzy=True
-                    )
-                    if 1970 <= dt.year <= now_year:
-                        return dt
-                except Exception:
-                    pass
-
+                match = regex.search(filename, match.start() + 1)
         return None
+
+    @staticmethod
+    def _parse_day(fields: tuple):
+        """
+        (year, month, day) ints for the captured date text, or False if it
+        is not a valid date. Memoized in _days, since burst shots and
+        per-day folders repeat the same date text.
+        """
+        # Only checked here: memoized days are dropped when the limit changes
+        max_year = FilenameParser._latest_year()
+        year, month, day = fields
+        try:
+            try:
+                year, month, day = _NUMBERS[year], _NUMBERS[month], _NUMBERS[day]
+            except KeyError:
+                # Custom pattern with e.g. 1-digit months
+                year, month, day = int(year), int(month), int(day)
+            datetime(year, month, day)
+            valid = 1970 <= year <= max_year
+        except ValueError:
+            valid = False
+
+        days = FilenameParser._days
+        if len(days) >= _MAX_CACHED_DAYS:
+            days.clear()
+        days[fields] = result = (year, month, day) if valid else False
+        return result
+
+    @staticmethod
+    def _at_time(day: tuple, clock: tuple):
+        """Slow path of extract_date for custom patterns' time fields."""
+        try:
+            return datetime(*day, *[int(field or 0) for field in clock])
+        except ValueError:
+            return None
+
+
+def _getter(regex, names):
+    """Returns groups -> tuple of the named groups `regex` defines, in `names` order."""
+    positions = [regex.groupindex[name] - 1 for name in names if name in regex.groupindex]
+    if len(positions) == 1:
+        position = positions[0]
+        return lambda groups: (groups[position],)
+    return itemgetter(*positions)
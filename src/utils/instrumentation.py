@@ -0,0 +1,177 @@
+"""
+Per-stage timing and on-demand profiling.
+
+Wrap a stage with `with stage("exif.pillow", ext):`. While disabled this
+returns a shared no-op object, so the hooks cost one function call.
+When enabled, every stage records a count, total time and a log2
+latency histogram (in microseconds) per (stage, file extension).
+
+Enable with the EXIF_FIXER_PROFILE=1 environment variable or `--profile`
+on the CLI. The variable is inherited by the analysis worker processes,
+whose stats are shipped back with their results and merged.
+"""
+import os
+import threading
+import time
+
+ENV_VAR = "EXIF_FIXER_PROFILE"
+
+# Histogram bucket i counts stages that took < 2**i microseconds
+_BUCKETS = 32
+
+_enabled = os.environ.get(ENV_VAR, "") not in ("", "0")
+_lock = threading.Lock()
+# (stage, extension) -> [count, total_ns, histogram]
+_stats = {}
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(flag: bool = True):
+    """Turns collection on or off, for this process and future workers."""
+    global _enabled
+    _enabled = flag
+    if flag:
+        os.environ[ENV_VAR] = "1"
+    else:
+        os.environ.pop(ENV_VAR, None)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("key", "started")
+
+    def __init__(self, name, extension):
+        self.key = (name, extension)
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.key, time.perf_counter_ns() - self.started)
+        return False
+
+
+def stage(name: str, extension: str = ""):
+    """Context manager timing one stage for one file."""
+    if not _enabled:
+        return _NULL_STAGE
+    return _Stage(name, extension)
+
+
+def record(key, elapsed_ns: int):
+    bucket = min(_BUCKETS - 1, (elapsed_ns // 1000).bit_length())
+    with _lock:
+        entry = _stats.get(key)
+        if entry is None:
+            entry = _stats[key] = [0, 0, [0] * _BUCKETS]
+        entry[0] += 1
+        entry[1] += elapsed_ns
+        entry[2][bucket] += 1
+
+
+# -------------------------------------------------
+# COLLECTION
+# -------------------------------------------------
+def drain() -> dict:
+    """Returns and resets the stats collected so far (picklable)."""
+    global _stats
+    with _lock:
+        stats, _stats = _stats, {}
+    return stats
+
+
+def merge(stats: dict):
+    """Adds stats drained in another process."""
+    with _lock:
+        for key, (count, total_ns, histogram) in stats.items():
+            entry = _stats.get(key)
+            if entry is None:
+                _stats[key] = [count, total_ns, list(histogram)]
+                continue
+            entry[0] += count
+            entry[1] += total_ns
+            entry[2] = [a + b for a, b in zip(entry[2], histogram)]
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {key: [c, t, list(h)] for key, (c, t, h) in _stats.items()}
+
+
+def _percentile_us(histogram, fraction):
+    """Upper bound of the bucket holding the given fraction of samples."""
+    target = sum(histogram) * fraction
+    seen = 0
+    for i, n in enumerate(histogram):
+        seen += n
+        if n and seen >= target:
+            return 2 ** i
+    return 0
+
+
+def report(stats=None) -> str:
+    """Summary table, slowest stages first."""
+    stats = snapshot() if stats is None else stats
+    if not stats:
+        return "No stage timings collected."
+
+    lines = [
+        f"{'stage':<24} {'ext':<6} {'count':>9} {'total ms':>10} "
+        f"{'mean us':>9} {'p50 us':>8} {'p95 us':>8} {'p99 us':>8}"
+    ]
+    for (name, ext), (count, total_ns, histogram) in sorted(
+        stats.items(), key=lambda item: -item[1][1]
+    ):
+        lines.append(
+            f"{name:<24} {ext or '-':<6} {count:>9} {total_ns / 1e6:>10.1f} "
+            f"{total_ns / count / 1000:>9.1f} "
+            f"{'<' + str(_percentile_us(histogram, 0.50)):>8} "
+            f"{'<' + str(_percentile_us(histogram, 0.95)):>8} "
+            f"{'<' + str(_percentile_us(histogram, 0.99)):>8}"
+        )
+    return "\n".join(lines)
+
+
+# -------------------------------------------------
+# PROFILING MODE
+# -------------------------------------------------
+class Profiler:
+    """
+    cProfile over a whole run (main thread only; worker stages are still
+    covered by the stage timings). stop() writes the .prof dump, which
+    pstats, snakeviz or flameprof can open, and returns its path.
+    """
+
+    def __init__(self):
+        import cProfile
+
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        enable(True)
+        self._profile.enable()
+
+    def stop(self, output_dir: str = ".") -> str:
+        self._profile.disable()
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(
+            output_dir, time.strftime("exif-date-fixer-%Y%m%d-%H%M%S.prof")
+        )
+        self._profile.dump_stats(path)
+        return path
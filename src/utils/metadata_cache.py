@@ -0,0 +1,175 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+
+class MetadataCache:
+    """
+    Persistent SQLite cache of extracted dates.
+    Entries are keyed by path and only trusted while size, mtime_ns,
+    inode and device still match, and while their version matches
+    VERSION (bump it whenever a parser change alters results).
+    """
+
+    VERSION = 4
+    DEFAULT_MAX_ENTRIES = 1_000_000
+
+    # SQLite's default limit on bound parameters is 999
+    _LOOKUP_BATCH = 500
+
+    def __init__(self, db_path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # Used from the analysis QThread as well as the GUI thread
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                device INTEGER NOT NULL,
+                version INTEGER NOT NULL,
+                last_seen INTEGER NOT NULL,
+                date_taken TEXT,
+                date_digitized TEXT,
+                date_modified TEXT,
+                filename_date TEXT
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_seen ON entries(last_seen)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def default_path() -> str:
+        if os.name == "nt":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+            return os.path.join(base, "EXIF Date Fixer", "metadata_cache.sqlite3")
+
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        return os.path.join(base, "exif-date-fixer", "metadata_cache.sqlite3")
+
+    # -------------------------------------------------
+    # LOOKUP
+    # -------------------------------------------------
+    def get_many(self, file_paths, stats) -> list:
+        """
+        Returns, per path, the cached (date_taken, date_digitized,
+        date_modified, filename_date) tuple or None on a miss.
+        `stats` holds the os.stat_result of each path (None if unknown).
+        """
+        results = [None] * len(file_paths)
+        today = self._today()
+        touched = []
+
+        with self._lock:
+            for start in range(0, len(file_paths), self._LOOKUP_BATCH):
+                batch = file_paths[start:start + self._LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT path, size, mtime_ns, inode, device, version, last_seen, "
+                    f"date_taken, date_digitized, date_modified, filename_date "
+                    f"FROM entries WHERE path IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                by_path = {row[0]: row for row in rows}
+
+                for i, path in enumerate(batch, start):
+                    row = by_path.get(path)
+                    stat = stats[i]
+                    if row is None or stat is None or not self._matches(row, stat):
+                        continue
+                    results[i] = tuple(self._decode(v) for v in row[7:])
+                    if row[6] < today:
+                        touched.append((today, path))
+
+            # Refresh recency at most once a day per entry
+            if touched:
+                self._conn.executemany(
+                    "UPDATE entries SET last_seen = ? WHERE path = ?", touched
+                )
+                self._conn.commit()
+
+        return results
+
+    # -------------------------------------------------
+    # STORE
+    # -------------------------------------------------
+    def put_many(self, entries):
+        """Stores (path, stat, (date_taken, date_digitized, date_modified, filename_date)) entries."""
+        today = self._today()
+        rows = [
+            (
+                path, stat.st_size, stat.st_mtime_ns, stat.st_ino, stat.st_dev,
+                self.VERSION, today,
+                *(self._encode(d) for d in dates),
+            )
+            for path, stat, dates in entries
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?,?,?,?,?,?)", rows
+            )
+            self._conn.commit()
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # -------------------------------------------------
+    # HELPERS
+    # -------------------------------------------------
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        if count <= self.max_entries:
+            return
+
+        # Trim to 90% so we don't evict again on the very next insert
+        excess = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM entries WHERE path IN "
+            "(SELECT path FROM entries ORDER BY last_seen LIMIT ?)",
+            (excess,),
+        )
+        self._conn.commit()
+
+    def _matches(self, row, stat) -> bool:
+        return (
+            row[1] == stat.st_size
+            and row[2] == stat.st_mtime_ns
+            and row[3] == stat.st_ino
+            and row[4] == stat.st_dev
+            and row[5] == self.VERSION
+        )
+
+    @staticmethod
+    def _today() -> int:
+        return int(time.time() // 86400)
+
+    @staticmethod
+    def _encode(value):
+        return value.isoformat() if value else None
+
+    @staticmethod
+    def _decode(value):
+        return datetime.fromisoformat(value) if value else None
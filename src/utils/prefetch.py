@@ -0,0 +1,167 @@
+"""
+Latency-tolerant analysis for files on network shares.
+
+On an SMB/NFS mount every open, stat and read is a round trip of several
+milliseconds, so analyzing files one after the other mostly waits. The
+Prefetcher keeps up to `concurrency` files in flight: each is opened,
+fstat-ed and its first `read_ahead` bytes read in one executor task,
+then parsed from that in-memory HeaderBuffer. The tasks are scheduled
+from an asyncio loop on a background thread, with a semaphore enforcing
+the limit across every chunk submitted.
+"""
+import asyncio
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CONCURRENCY = 32
+# Covers the JPEG APP1 segment (at most 64 KB) with room for what precedes it
+DEFAULT_READ_AHEAD = 128 * 1024
+
+
+class HeaderBuffer(io.RawIOBase):
+    """
+    Read-only file object over the prefetched head of a file. Reads past
+    the head are served from the still-open file, so parsers that need
+    more (e.g. an MP4 whose moov box follows mdat) keep working.
+    """
+
+    def __init__(self, name: str, head: bytes, size: int, file=None):
+        super().__init__()
+        self.name = name
+        self.head = head
+        self.size = size
+        self._file = file
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self._pos = offset
+        return offset
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = max(0, self.size - self._pos)
+        start, end = self._pos, self._pos + size
+        if end <= len(self.head):
+            data = self.head[start:end]
+        elif self._file is None:
+            data = self.head[start:]
+        else:
+            self._file.seek(start)
+            data = self._file.read(size)
+        self._pos += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        super().close()
+
+
+class Prefetcher:
+    """
+    Runs analysis of many files with concurrent I/O.
+    submit_chunk() returns a concurrent.futures.Future, so it slots into
+    ProcessingController.iter_analyze where the process pool would be.
+    """
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, read_ahead: int = DEFAULT_READ_AHEAD):
+        self.concurrency = max(1, concurrency)
+        self.read_ahead = read_ahead
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="prefetch"
+        )
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="prefetch-loop", daemon=True
+        )
+        self._thread.start()
+
+    # -------------------------------------------------
+    # SUBMISSION (any thread)
+    # -------------------------------------------------
+    def submit_chunk(self, paths, stats, analyze):
+        """
+        Schedules `analyze(path, stat, head)` for every path, head being a
+        HeaderBuffer. The future resolves to [(result, error)] in input
+        order, error being the message of an exception, else None.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._gather(paths, stats, analyze), self._loop
+        )
+
+    def stat_many(self, paths) -> list:
+        """os.stat of every path, issued concurrently; None where it fails."""
+        return asyncio.run_coroutine_threadsafe(
+            self._gather_stats(paths), self._loop
+        ).result()
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # -------------------------------------------------
+    # EVENT LOOP SIDE
+    # -------------------------------------------------
+    async def _gather(self, paths, stats, analyze):
+        stats = stats or [None] * len(paths)
+        return await asyncio.gather(*(
+            self._run(self._analyze_one, path, stat, analyze)
+            for path, stat in zip(paths, stats)
+        ))
+
+    async def _gather_stats(self, paths):
+        results = await asyncio.gather(*(self._run(os.stat, path) for path in paths))
+        return [stat for stat, _ in results]
+
+    async def _run(self, func, *args):
+        async with self._semaphore:
+            try:
+                result = await self._loop.run_in_executor(self._executor, func, *args)
+            except Exception as e:
+                return None, str(e)
+        return result, None
+
+    def _analyze_one(self, path, stat, analyze):
+        # One open, one fstat and one read instead of stat + open + many small reads
+        f = open(path, "rb")
+        with HeaderBuffer(path, b"", 0, f) as head:
+            if stat is None:
+                stat = os.fstat(f.fileno())
+            head.head = f.read(self.read_ahead)
+            head.size = stat.st_size
+            return analyze(path, stat, head)
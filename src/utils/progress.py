@@ -0,0 +1,133 @@
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+# At most this many UI updates per second, however many files finish
+UI_UPDATE_INTERVAL = 1 / 30
+
+# Time constant (seconds) of the smoothed rates behind the ETA
+_RATE_WINDOW = 3.0
+
+
+@dataclass
+class ProgressSnapshot:
+    """Progress of a batch at one moment; what the view displays."""
+    done: int
+    total: int
+    bytes_done: int = 0
+    elapsed: float = 0.0
+    files_per_s: float = 0.0
+    mb_per_s: float = 0.0
+    eta: Optional[float] = None     # seconds, None while unknown
+
+    def describe(self, verb: str = "Processing") -> str:
+        """e.g. "Processing 1200/5000 files · 410 files/s · 38.2 MB/s · ETA 0:09" """
+        parts = [f"{verb} {self.done}/{self.total} files"]
+        if self.files_per_s:
+            parts.append(f"{self.files_per_s:.0f} files/s")
+        if self.mb_per_s:
+            parts.append(f"{self.mb_per_s:.1f} MB/s")
+        if self.eta is not None and self.done < self.total:
+            parts.append(f"ETA {format_duration(self.eta)}")
+        return " · ".join(parts)
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds + 0.5)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class ProgressTracker:
+    """
+    Coalesces per-file progress into rate-limited updates.
+
+    Call advance() for every finished file (or batch); it returns True
+    when an update is due, i.e. at most once per `interval` seconds.
+    The caller then emits snapshot() and take_rows() once, so the view
+    does a constant amount of work per frame instead of per file.
+    Always emit once more after the last file, whatever advance() said.
+    """
+
+    def __init__(self, total: int, interval: float = UI_UPDATE_INTERVAL, clock=time.monotonic):
+        self.total = total
+        self.interval = interval
+        self._clock = clock
+        self.done = 0
+        self.bytes_done = 0
+
+        self._started = self._last_emit = self._last_sample = clock()
+        self._sample_done = 0
+        self._sample_bytes = 0
+        self._files_rate = None
+        self._bytes_rate = None
+        # Rows finished since the last take_rows(), as a [first, last] range
+        self._first_row = None
+        self._last_row = None
+
+    def advance(self, files: int = 1, nbytes: int = 0, row: Optional[int] = None) -> bool:
+        self.done += files
+        self.bytes_done += nbytes
+        if row is not None:
+            self._touch(row, row + max(files, 1) - 1)
+
+        now = self._clock()
+        if now - self._last_emit < self.interval:
+            return False
+        self._last_emit = now
+        return True
+
+    def _touch(self, first, last):
+        if self._first_row is None:
+            self._first_row, self._last_row = first, last
+        else:
+            self._first_row = min(self._first_row, first)
+            self._last_row = max(self._last_row, last)
+
+    def take_rows(self):
+        """The (first, last) rows finished since the last call, or None."""
+        if self._first_row is None:
+            return None
+        rows = (self._first_row, self._last_row)
+        self._first_row = self._last_row = None
+        return rows
+
+    def snapshot(self) -> ProgressSnapshot:
+        now = self._clock()
+        self._sample(now)
+        elapsed = now - self._started
+
+        files_rate = self._files_rate or 0.0
+        eta = None
+        if files_rate > 0:
+            eta = (self.total - self.done) / files_rate
+        return ProgressSnapshot(
+            done=self.done,
+            total=self.total,
+            bytes_done=self.bytes_done,
+            elapsed=elapsed,
+            files_per_s=files_rate,
+            mb_per_s=(self._bytes_rate or 0.0) / 1e6,
+            eta=eta,
+        )
+
+    def _sample(self, now):
+        # Exponentially smoothed rates: steady enough for an ETA, but
+        # still follows a switch from small photos to large videos
+        dt = now - self._last_sample
+        if dt <= 0:
+            return
+        files_rate = (self.done - self._sample_done) / dt
+        bytes_rate = (self.bytes_done - self._sample_bytes) / dt
+        if self._files_rate is None:
+            self._files_rate, self._bytes_rate = files_rate, bytes_rate
+        else:
+            weight = min(1.0, dt / _RATE_WINDOW)
+            self._files_rate += weight * (files_rate - self._files_rate)
+            self._bytes_rate += weight * (bytes_rate - self._bytes_rate)
+        self._last_sample = now
+        self._sample_done = self.done
+        self._sample_bytes = self.bytes_done
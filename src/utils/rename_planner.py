@@ -0,0 +1,73 @@
+import os
+from dataclasses import dataclass
+
+
+@dataclass
+class RenameConflict:
+    """A target name that was taken and the name given instead."""
+    row: int
+    wanted: str         # target path the rules produced
+    resolved: str       # target path after disambiguation
+    existing: bool      # True: taken on disk, False: by an earlier file of the batch
+
+
+class RenamePlanner:
+    """
+    Hands out collision-free target names for a batch of renames/copies.
+
+    Each target directory is listed once, the first time a file targets
+    it; after that every check is a set lookup. Names already on disk are
+    never reused (except a file's own current name), and within the batch
+    the first file keeps the name and later ones get `_1`, `_2`, ... in
+    the order they are claimed, so the same batch always plans the same
+    names. Keep one planner for a whole run so later batches see the
+    names claimed by earlier ones.
+    """
+
+    def __init__(self):
+        # normcase'd directory -> {normcase'd name: True if on disk, False if claimed}
+        self._taken = {}
+        # (directory, stem, ext) -> next suffix number to try
+        self._next_suffix = {}
+
+    def _names(self, directory: str) -> dict:
+        key = os.path.normcase(os.path.abspath(directory))
+        names = self._taken.get(key)
+        if names is None:
+            try:
+                names = dict.fromkeys(map(os.path.normcase, os.listdir(directory)), True)
+            except OSError:
+                # Output folder not created yet
+                names = {}
+            self._taken[key] = names
+        return names
+
+    def claim(self, source: str, target: str):
+        """
+        Reserves a target path for `source`. Returns (path, existing):
+        `path` is `target` or a disambiguated variant of it; `existing`
+        is None without a clash, else whether the clash was with a file
+        already on disk.
+        """
+        if os.path.normcase(os.path.abspath(source)) == os.path.normcase(os.path.abspath(target)):
+            # Not moved (or only re-cased); keeps its own name
+            return target, None
+
+        directory, name = os.path.split(target)
+        names = self._names(directory)
+        existing = names.get(os.path.normcase(name))
+        if existing is None:
+            names[os.path.normcase(name)] = False
+            return target, None
+
+        stem, ext = os.path.splitext(name)
+        counter_key = (os.path.normcase(directory), os.path.normcase(stem), ext.lower())
+        n = self._next_suffix.get(counter_key, 1)
+        while True:
+            candidate = f"{stem}_{n}{ext}"
+            n += 1
+            if os.path.normcase(candidate) not in names:
+                break
+        self._next_suffix[counter_key] = n
+        names[os.path.normcase(candidate)] = False
+        return os.path.join(directory, candidate), existing
@@ -0,0 +1,234 @@
+"""
+Compiled file name templates.
+
+    {date:%Y/%m}/{date:%Y%m%d_%H%M%S}_{seq:04}{ext}
+
+Tokens:
+    {date[:strftime]}   proposed date (default %Y%m%d_%H%M%S)
+    {seq[:spec]}        1-based position of the file in the list, e.g. {seq:04}
+    {source}            where the date came from: exif, filename, fs or manual
+    {stem}              original file name without extension
+    {ext}               original extension, including the dot
+    {{ and }}           literal braces
+
+A "/" in the result sorts files into (created on demand) subfolders.
+
+A template is compiled once into a single f-string function. Date
+directives that only depend on the day (%Y, %m, %d, %b, ...) are rendered
+with strftime once per calendar day and cached; %H, %M, %S and %f are
+looked up in a table, so rendering a name costs a few lookups instead
+of a full strftime. A date token using any other directive is rendered
+with strftime for every file.
+"""
+import ntpath
+import re
+from datetime import datetime
+from functools import lru_cache
+
+DEFAULT_DATE_FORMAT = "%Y%m%d_%H%M%S"
+
+# The fixed formats offered before templates existed
+DATE_FORMATS = {
+    "YYYYMMDD_HHMMSS": "%Y%m%d_%H%M%S",
+    "YYYY-MM-DD_HH-MM-SS": "%Y-%m-%d_%H-%M-%S",
+    "YYYYMMDD": "%Y%m%d",
+    "YYYY-MM-DD": "%Y-%m-%d",
+}
+
+TOKENS = ("date", "seq", "source", "stem", "ext")
+
+# Directives formatted inline, from the datetime attribute
+_TIME_DIRECTIVES = {"H": "hour", "M": "minute", "S": "second", "f": "microsecond"}
+# "00".."99": indexing a table is several times faster than a :02d format
+_TWO_DIGITS = tuple(f"{i:02d}" for i in range(100))
+# Directives that only depend on the calendar day, rendered once per day.
+# A token with any other directive (%T, %s, %I, %z, ...) goes through
+# strftime for every file.
+_DAY_DIRECTIVES = set("aAbBCdDeFgGhjmuUVwWyY%")
+
+_TOKEN = re.compile(r"\{\{|\}\}|\{([a-z]+)(?::([^{}]*))?\}|[{}]")
+_DIRECTIVE = re.compile(r"%(.)|[^%]+", re.DOTALL)
+
+# Days kept per date fragment cache before it is reset
+_MAX_CACHED_DAYS = 1 << 16
+
+_SAMPLE_DATE = datetime(2001, 2, 3, 4, 5, 6)
+
+
+def escape(text: str) -> str:
+    """Makes `text` a literal part of a template."""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def legacy_template(date_format: str, prefix: str = "", suffix: str = "") -> str:
+    """The template equivalent of the date format / prefix / suffix settings."""
+    strftime = DATE_FORMATS.get(date_format, DEFAULT_DATE_FORMAT)
+    return f"{escape(prefix)}{{date:{strftime}}}{escape(suffix)}{{ext}}"
+
+
+class RenameTemplate:
+    """
+    A compiled template. render(date, ext, stem="", source="", seq=1)
+    returns the new (possibly folder-qualified, "/"-separated) name.
+    Raises ValueError for an invalid template.
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        # Names depend on the row number, so they shift when rows are removed
+        self.uses_seq = False
+        self._constants = {}
+        self._uses_day = False
+
+        # (kind, value) items: "text" literals, "day" strftime runs and
+        # "code" f-string fields
+        items = []
+        pos = 0
+        for match in _TOKEN.finditer(template):
+            if match.start() > pos:
+                items.append(("text", template[pos:match.start()]))
+            items.extend(self._compile_part(match))
+            pos = match.end()
+        if pos < len(template):
+            items.append(("text", template[pos:]))
+        expression = self._emit(items)
+
+        day = "    o = d.toordinal()\n" if self._uses_day else ""
+        # Constants are bound as keyword-only defaults: locals beat globals
+        bound = "".join(f", {name}={name}" for name in self._constants)
+        source = (
+            f"def render(d, ext, stem='', source='', seq=1, *_{bound}):\n"
+            f"{day}"
+            f"    return f'''{expression}'''\n"
+        )
+        namespace = dict(self._constants)
+        exec(compile(source, f"<template {template!r}>", "exec"), namespace)
+        self.render = namespace["render"]
+        self._check()
+
+    def __call__(self, date, ext, stem="", source="", seq=1) -> str:
+        return self.render(date, ext, stem, source, seq)
+
+    # -------------------------------------------------
+    # COMPILATION
+    # -------------------------------------------------
+    def _compile_part(self, match) -> list:
+        text = match.group(0)
+        if text in ("{{", "}}"):
+            return [("text", text[0])]
+        name, spec = match.group(1), match.group(2)
+        if name is None:
+            raise ValueError(f"Unmatched '{text}' in name template {self.template!r}")
+        if name not in TOKENS:
+            raise ValueError(f"Unknown token {{{name}}} in name template; use one of {', '.join(TOKENS)}")
+
+        if name == "date":
+            return self._compile_date(spec or DEFAULT_DATE_FORMAT)
+        if name == "seq":
+            self.uses_seq = True
+            spec = spec or ""
+            try:
+                format(1, spec)
+            except ValueError:
+                raise ValueError(f"Bad format {{seq:{spec}}} in name template") from None
+            zero_pad = re.fullmatch(r"0(\d+)d?", spec)
+            if zero_pad:
+                # str.zfill is much cheaper than the general format machinery
+                return [("code", "{str(seq).zfill(" + zero_pad.group(1) + ")}")]
+            return [("code", "{seq:{" + self._constant(spec) + "}}")]
+        if spec:
+            raise ValueError(f"{{{name}}} takes no format in name template")
+        return [("code", "{" + name + "}")]
+
+    def _compile_date(self, strftime: str) -> list:
+        pieces = list(_DIRECTIVE.finditer(strftime))
+        if any(
+            piece.group(1) is not None
+            and piece.group(1) not in _DAY_DIRECTIVES
+            and piece.group(1) not in _TIME_DIRECTIVES
+            for piece in pieces
+        ):
+            return [("code", "{d.strftime(" + self._constant(strftime) + ")}")]
+
+        items = []
+        for piece in pieces:
+            attribute = _TIME_DIRECTIVES.get(piece.group(1))
+            if attribute is None:
+                # Literal text or a day-level directive
+                items.append(("day", piece.group(0)))
+            elif attribute == "microsecond":
+                items.append(("code", "{d.microsecond:06d}"))
+            else:
+                items.append(("code", "{" + self._two_digits() + f"[d.{attribute}]}}"))
+        return items
+
+    def _emit(self, items) -> str:
+        """
+        Joins the items into the f-string body. Each run of day-level
+        directives, together with the literal text around it (even across
+        tokens, e.g. "{date:%Y/%m}/{date:%Y%m%d_"), becomes one fragment
+        cached per day.
+        """
+        out = []
+        run = []
+        for kind, value in items + [("code", "")]:
+            if kind != "code":
+                run.append((kind, value))
+                continue
+            if any(run_kind == "day" for run_kind, _ in run):
+                day_format = "".join(
+                    text if run_kind == "day" else text.replace("%", "%%")
+                    for run_kind, text in run
+                )
+                out.append(self._day_fragment(day_format))
+            elif run:
+                out.append(self._literal("".join(text for _, text in run)))
+            run = []
+            out.append(value)
+        return "".join(out)
+
+    def _constant(self, value) -> str:
+        name = f"_c{len(self._constants)}"
+        self._constants[name] = value
+        return name
+
+    def _two_digits(self) -> str:
+        for name, value in self._constants.items():
+            if value is _TWO_DIGITS:
+                return name
+        return self._constant(_TWO_DIGITS)
+
+    def _literal(self, text: str) -> str:
+        if re.fullmatch(r"[\w\-. /%]*", text):
+            # Nothing the f-string could misread
+            return text
+        return "{" + self._constant(text) + "}"
+
+    def _day_fragment(self, day_format: str) -> str:
+        """Expression for a run of day-level directives, cached per day."""
+        self._uses_day = True
+        cache = {}
+
+        def miss(d):
+            if len(cache) >= _MAX_CACHED_DAYS:
+                cache.clear()
+            value = cache[d.toordinal()] = d.strftime(day_format)
+            return value
+
+        return "{(" + self._constant(cache) + ".get(o) or " + self._constant(miss) + "(d))}"
+
+    def _check(self):
+        sample = self.render(_SAMPLE_DATE, ".jpg", "IMG_0001", "exif", 1)
+        # Checked by Windows rules on every platform: a backslash separates
+        # folders too, and "C:x" is relative to drive C, not the output folder
+        drive, path = ntpath.splitdrive(ntpath.normpath(sample))
+        parts = re.split(r"[\\/]", sample)
+        if (not sample or drive or ntpath.isabs(path)
+                or any(part in ("", ".", "..") for part in parts)):
+            raise ValueError(f"Name template {self.template!r} must give a relative file name")
+
+
+@lru_cache(maxsize=32)
+def compile_template(template: str) -> RenameTemplate:
+    """Compiles `template`, reusing the result for a template seen before."""
+    return RenameTemplate(template)
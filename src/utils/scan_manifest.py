@@ -0,0 +1,299 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+
+from .file_utils import SYMLINK_POLICIES, FileUtils
+
+
+# Folders modified this close to the scan are re-listed next time: a
+# change in the same mtime tick would otherwise go unnoticed
+_RACY_WINDOW_NS = 2_000_000_000
+# Stored instead of the real mtime of such folders
+_RELIST = -1
+
+
+@dataclass
+class ScanDelta:
+    """What changed under a folder since its previous rescan."""
+    added: list = field(default_factory=list)       # [(path, stat)]
+    modified: list = field(default_factory=list)    # [(path, stat)]
+    removed: list = field(default_factory=list)     # [path]
+    unchanged: int = 0
+    dirs_listed: int = 0
+    dirs_skipped: int = 0
+
+    @property
+    def changed(self) -> list:
+        """Added and modified records, sorted by path."""
+        return sorted(self.added + self.modified, key=lambda record: record[0])
+
+
+class ScanManifest:
+    """
+    Per-folder manifest of previous scans, kept in SQLite.
+
+    Each folder is stored with its mtime, the number of supported entries
+    it lists and a digest of their names; each file with its size and
+    mtime. A rescan stats every known folder but only lists, and stats
+    the files of, folders whose mtime moved, so a nightly re-sync costs
+    roughly the number of changed folders rather than the number of files.
+
+    A folder's mtime only changes when entries are added, removed or
+    renamed in it. Files edited in place inside an otherwise unchanged
+    folder are therefore only caught with deep=True, which stats every
+    file. verify=True re-lists every folder (without stat-ing files) and
+    compares entry count and digest, for file systems that do not keep
+    folder mtimes reliably.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS roots (
+                path TEXT PRIMARY KEY,
+                options TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS dirs (
+                path TEXT PRIMARY KEY,
+                parent TEXT,
+                mtime_ns INTEGER NOT NULL,
+                entry_count INTEGER NOT NULL,
+                digest TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                dir TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def default_path() -> str:
+        if os.name == "nt":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+            return os.path.join(base, "EXIF Date Fixer", "scan_manifest.sqlite3")
+
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        return os.path.join(base, "exif-date-fixer", "scan_manifest.sqlite3")
+
+    # -------------------------------------------------
+    # RESCAN
+    # -------------------------------------------------
+    def rescan(
+        self,
+        folder_path,
+        recursive=True,
+        symlinks="files",
+        include_hidden=True,
+        extensions=None,
+        deep=False,
+        verify=False,
+        commit=True,
+    ) -> ScanDelta:
+        """
+        Compares `folder_path` with its manifest, updates the manifest and
+        returns a ScanDelta. The first rescan of a folder (or one with
+        different options) reports every file as added.
+        Options have the same meaning as in FileUtils.iter_media.
+        With commit=False the update is only kept once commit() is called,
+        so files that were never handled are reported again next time.
+        """
+        if symlinks not in SYMLINK_POLICIES:
+            raise ValueError(f"Unknown symlink policy: {symlinks}")
+        if extensions is None:
+            extensions = FileUtils.SUPPORTED_EXTENSIONS
+        else:
+            extensions = {ext.lower() for ext in extensions}
+
+        root = os.path.normpath(os.path.abspath(str(folder_path)))
+        options = json.dumps([recursive, symlinks, include_hidden, sorted(extensions)])
+        delta = ScanDelta()
+        racy_after = time.time_ns() - _RACY_WINDOW_NS
+
+        def scan(path, stat_files=True):
+            return FileUtils._scan_dir(
+                path, recursive, symlinks, include_hidden, extensions, stat_files
+            )
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT options FROM roots WHERE path = ?", (root,)
+            ).fetchone()
+            if row is None or row[0] != options:
+                # Nothing comparable was recorded: start over
+                self._drop_tree(root, [])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO roots VALUES (?, ?)", (root, options)
+                )
+
+            seen = set()
+            stack = [(root, os.path.dirname(root))]
+            while stack:
+                path, parent = stack.pop()
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    self._drop_tree(path, delta.removed)
+                    continue
+
+                if symlinks == "follow":
+                    key = (info.st_dev, info.st_ino)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+
+                known = self._conn.execute(
+                    "SELECT mtime_ns, entry_count, digest FROM dirs WHERE path = ?", (path,)
+                ).fetchone()
+
+                trusted = known is not None and not deep and known[0] == info.st_mtime_ns
+                if trusted and verify:
+                    files, subdirs = scan(path, stat_files=False)
+                    trusted = self._summary(files, subdirs) == (known[1], known[2])
+
+                if trusted:
+                    delta.dirs_skipped += 1
+                    delta.unchanged += self._conn.execute(
+                        "SELECT COUNT(*) FROM files WHERE dir = ?", (path,)
+                    ).fetchone()[0]
+                    children = self._conn.execute(
+                        "SELECT path FROM dirs WHERE parent = ? ORDER BY path DESC", (path,)
+                    ).fetchall()
+                    stack.extend((child, path) for (child,) in children)
+                    continue
+
+                delta.dirs_listed += 1
+                files, subdirs = scan(path)
+                self._update_dir(path, parent, info, files, subdirs, racy_after, delta)
+                stack.extend((subdir, path) for subdir, _ in reversed(subdirs))
+
+            if commit:
+                self._conn.commit()
+
+        return delta
+
+    def commit(self, failed=(), written=()):
+        """
+        Keeps the pending rescan updates, except for the `failed` files:
+        they are forgotten and their folders re-listed on the next rescan,
+        which reports them as added again.
+
+        `written` holds (listed_path, path, stat) for files the caller
+        changed since the rescan: each is recorded at its new path with its
+        new stat, so it is not reported as changed next time. listed_path
+        is forgotten when it differs from path (a rename); pass None when
+        the listed file was left in place (a copy).
+        """
+        with self._lock:
+            for listed_path, file_path, stat in written:
+                file_path = os.path.normpath(file_path)
+                if listed_path is not None and os.path.normpath(listed_path) != file_path:
+                    self._conn.execute("DELETE FROM files WHERE path = ?", (listed_path,))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                    (file_path, os.path.dirname(file_path), stat.st_size, stat.st_mtime_ns),
+                )
+            for file_path in failed:
+                self._conn.execute(
+                    "UPDATE dirs SET mtime_ns = ? WHERE path = "
+                    "(SELECT dir FROM files WHERE path = ?)",
+                    (_RELIST, file_path),
+                )
+                self._conn.execute("DELETE FROM files WHERE path = ?", (file_path,))
+            self._conn.commit()
+
+    def forget(self, folder_path):
+        """Drops everything recorded under `folder_path`."""
+        root = os.path.normpath(os.path.abspath(str(folder_path)))
+        with self._lock:
+            self._drop_tree(root, [])
+            self._conn.execute("DELETE FROM roots WHERE path = ?", (root,))
+            self._conn.commit()
+
+    def close(self):
+        """Closes the database; uncommitted rescan updates are dropped."""
+        with self._lock:
+            self._conn.close()
+
+    # -------------------------------------------------
+    # HELPERS
+    # -------------------------------------------------
+    def _update_dir(self, path, parent, info, files, subdirs, racy_after, delta):
+        old_files = {
+            row[0]: (row[1], row[2])
+            for row in self._conn.execute(
+                "SELECT path, size, mtime_ns FROM files WHERE dir = ?", (path,)
+            )
+        }
+
+        for file_path, stat in files:
+            previous = old_files.pop(file_path, None)
+            if previous is None:
+                delta.added.append((file_path, stat))
+            elif previous != (stat.st_size, stat.st_mtime_ns):
+                delta.modified.append((file_path, stat))
+            else:
+                delta.unchanged += 1
+        delta.removed.extend(old_files)
+
+        current = {subdir for subdir, _ in subdirs}
+        for (old_subdir,) in self._conn.execute(
+            "SELECT path FROM dirs WHERE parent = ?", (path,)
+        ).fetchall():
+            if old_subdir not in current:
+                self._drop_tree(old_subdir, delta.removed)
+
+        mtime_ns = info.st_mtime_ns if info.st_mtime_ns < racy_after else _RELIST
+        self._conn.execute(
+            "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?)",
+            (path, parent, mtime_ns, *self._summary(files, subdirs)),
+        )
+        self._conn.execute("DELETE FROM files WHERE dir = ?", (path,))
+        self._conn.executemany(
+            "INSERT INTO files VALUES (?, ?, ?, ?)",
+            [(file_path, path, stat.st_size, stat.st_mtime_ns) for file_path, stat in files],
+        )
+
+    def _drop_tree(self, path, removed):
+        """Forgets a folder and everything below it, collecting its files."""
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            removed.extend(
+                row[0] for row in self._conn.execute(
+                    "SELECT path FROM files WHERE dir = ?", (current,)
+                )
+            )
+            stack.extend(
+                row[0] for row in self._conn.execute(
+                    "SELECT path FROM dirs WHERE parent = ?", (current,)
+                )
+            )
+            self._conn.execute("DELETE FROM files WHERE dir = ?", (current,))
+            self._conn.execute("DELETE FROM dirs WHERE path = ?", (current,))
+
+    @staticmethod
+    def _summary(files, subdirs):
+        """(entry count, digest of the sorted entry names) for one listing."""
+        names = sorted(
+            [os.path.basename(file_path) for file_path, _ in files]
+            + [os.path.basename(subdir) + "/" for subdir, _ in subdirs]
+        )
+        digest = hashlib.blake2b("\0".join(names).encode("utf-8", "surrogateescape"), digest_size=16)
+        return len(names), digest.hexdigest()
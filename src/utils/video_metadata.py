@@ -1,14 +1,61 @@
+import os
 from datetime import datetime, timezone
-from hachoir.parser import createParser
-from hachoir.metadata import extractMetadata
 
+from .bmff import is_bmff, read_creation_time
+from .file_utils import FileUtils
+from .instrumentation import stage
 
-def get_video_creation_time(file_path: str):
+
+def get_video_creation_time(file_path: str, head=None):
     """
-    Extract video creation time using Hachoir.
+    Extract video creation time.
     Converts UTC → LOCAL system time.
     Returns naive local datetime or None.
     """
+    info = get_video_creation_info(file_path, head)
+    return info[0] if info else None
+
+
+def get_video_creation_info(file_path: str, head=None):
+    """
+    Returns (naive local datetime, source) or None.
+    MP4/MOV files are read with the box walker (source is the box the
+    time came from: "mvhd", "tkhd" or "mdhd"); other containers such as
+    AVI and MKV go through hachoir (source "hachoir"), as do MP4/MOV
+    files the box walker cannot read.
+    `head` is an optional already open binary file of `file_path`.
+    """
+    try:
+        with FileUtils.open_source(file_path if head is None else head) as f:
+            if is_bmff(f.read(8)):
+                found = read_creation_time(f, FileUtils.source_size(f))
+                if found is not None:
+                    created, source = found
+                    return _to_local(created), source
+    except (OSError, ValueError):
+        pass
+
+    with stage("video.hachoir", os.path.splitext(file_path)[1].lower()):
+        created = _read_with_hachoir(file_path)
+    if created is None:
+        return None
+    return _to_local(created), "hachoir"
+
+
+def _to_local(utc_dt: datetime):
+    # Convert to local timezone, return naive local datetime
+    try:
+        return utc_dt.astimezone().replace(tzinfo=None)
+    except (OverflowError, OSError, ValueError):
+        return utc_dt.replace(tzinfo=None)
+
+
+def _read_with_hachoir(file_path: str):
+    """Full hachoir parse, for containers the box walker does not understand."""
+    # hachoir is slow to import; only load it once such a video shows up
+    from hachoir.parser import createParser
+    from hachoir.metadata import extractMetadata
+
     try:
         parser = createParser(file_path)
         if not parser:
@@ -20,20 +67,12 @@ def get_video_creation_time(file_path: str):
                 return None
 
             creation_date = metadata.get("creation_date")
-            if not creation_date:
-                return None
-
-            if isinstance(creation_date, datetime):
-                # Treat Hachoir datetime as UTC
-                utc_dt = creation_date.replace(tzinfo=timezone.utc)
-
-                # Convert to local timezone
-                local_dt = utc_dt.astimezone()
-
-                # Return naive local datetime
-                return local_dt.replace(tzinfo=None)
-
     except Exception:
-        pass
+        # Malformed containers raise all kinds of hachoir errors
+        return None
+
+    if not isinstance(creation_date, datetime):
+        return None
 
-    return None
+    # Treat Hachoir datetime as UTC
+    return creation_date.replace(tzinfo=timezone.utc)
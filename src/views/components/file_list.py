@@ -1,156 +1,262 @@
 from PyQt6.QtWidgets import (
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QHeaderView,
-    QPushButton
+    QStyledItemDelegate,
+    QStyle
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, QRectF
+from PyQt6.QtGui import QColor, QPainter
 
 
-class FileListTable(QTableWidget):
-    """Table widget to display files and their metadata status."""
+COLUMNS = [
+    "Filename",
+    "Current media Date",
+    "Detected Date",
+    "Proposed Date",
+    "Proposed Name",
+    "Status",
+    "Action"
+]
+ACTION_COLUMN = 6
+
+
+def _safe_datetime(value):
+    if hasattr(value, "tzinfo") and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+
+class FileListModel(QAbstractTableModel):
+    """
+    Table model over the loaded FileMetadata list.
+    Cells are formatted on demand in data(); nothing is stored per row.
+    The list is shared with MainController, so rows removed here are
+    removed from the controller's files_metadata as well.
+    """
+
+    def __init__(self, files=None):
+        super().__init__()
+        self.files = files if files is not None else []
+        # Set while rows are being processed: row removal is refused
+        self.locked = False
+
+    # ---------------------------------
+    # Qt model interface
+    # ---------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.files)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return COLUMNS[section]
+        return section + 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        file_meta = self.files[index.row()]
+        column = index.column()
+
+        if role == Qt.ItemDataRole.UserRole and column == 0:
+            return file_meta.file_path
+
+        if role == Qt.ItemDataRole.ToolTipRole and column in (4, 5):
+            return file_meta.message or None
+
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+
+        if column == 0:
+            return file_meta.filename
+
+        if column == 1:
+            # Once processed, the proposed date is the file's date
+            if file_meta.status == "Processed" and file_meta.proposed_date:
+                return str(_safe_datetime(file_meta.proposed_date))
+            orig_date = file_meta.file_system_modified
+            return str(_safe_datetime(orig_date)) if orig_date else "None"
+
+        if column == 2:
+            # Detected Date priority: EXIF Date Taken > Filename Date > None
+            detected_date = file_meta.exif_date_taken or file_meta.filename_date
+            return str(_safe_datetime(detected_date)) if detected_date else "None"
+
+        if column == 3:
+            prop_date = file_meta.proposed_date
+            return str(_safe_datetime(prop_date)) if prop_date else "Pending"
+
+        if column == 4:
+            return file_meta.proposed_filename or ""
+
+        if column == 5:
+            return file_meta.status
+
+        if column == ACTION_COLUMN:
+            return "Delete"
+
+        return None
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if self.locked or row < 0 or count <= 0 or row + count > len(self.files):
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        del self.files[row:row + count]
+        self.endRemoveRows()
+        return True
+
+    # ---------------------------------
+    # Bulk operations
+    # ---------------------------------
+    def append_files(self, metas):
+        if not metas:
+            return
+        first = len(self.files)
+        self.beginInsertRows(QModelIndex(), first, first + len(metas) - 1)
+        self.files.extend(metas)
+        self.endInsertRows()
+
+    def refresh_rows(self, first=0, last=None):
+        """Emits one dataChanged for the whole row range."""
+        if not self.files:
+            return
+        if last is None:
+            last = len(self.files) - 1
+        self.dataChanged.emit(
+            self.index(first, 0),
+            self.index(last, len(COLUMNS) - 1),
+            [Qt.ItemDataRole.DisplayRole],
+        )
+
+    def set_files(self, files):
+        self.beginResetModel()
+        self.files = files
+        self.endResetModel()
+
+    def sort_rows(self, first=0):
+        """Sorts rows from `first` on by file path."""
+        if len(self.files) - first < 2:
+            return
+        self.beginResetModel()
+        if hasattr(self.files, "sort_by_path"):
+            self.files.sort_by_path(first)
+        else:
+            self.files[first:] = sorted(self.files[first:], key=lambda meta: meta.file_path)
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self.files.clear()
+        self.endResetModel()
+
+
+class DeleteButtonDelegate(QStyledItemDelegate):
+    """Paints the red Delete button and removes the row when it is clicked."""
+
+    COLOR = QColor("#d9534f")
+    HOVER_COLOR = QColor("#c9302c")
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        rect = QRectF(option.rect).adjusted(6, 3, -6, -3)
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.HOVER_COLOR if hovered else self.COLOR)
+        painter.drawRoundedRect(rect, 4, 4)
+
+        font = painter.font()
+        font.setPixelSize(11)
+        painter.setFont(font)
+        painter.setPen(QColor("white"))
+        painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, "Delete")
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if (
+            event.type() == QEvent.Type.MouseButtonRelease
+            and event.button() == Qt.MouseButton.LeftButton
+            and option.rect.contains(event.position().toPoint())
+        ):
+            model.removeRows(index.row(), 1)
+            return True
+        return super().editorEvent(event, model, option, index)
+
+
+class FileListTable(QTableView):
+    """Table view to display files and their metadata status."""
 
     def __init__(self):
         super().__init__()
 
-        self.setColumnCount(7)
-        self.setHorizontalHeaderLabels([
-            "Filename",
-            "Current media Date",
-            "Detected Date",
-            "Proposed Date",
-            "Proposed Name",
-            "Status",
-            "Action"
-        ])
+        self.file_model = FileListModel()
+        self.setModel(self.file_model)
+
+        self._delete_delegate = DeleteButtonDelegate(self)
+        self.setItemDelegateForColumn(ACTION_COLUMN, self._delete_delegate)
 
         # Stretch main columns
         self.horizontalHeader().setSectionResizeMode(
             QHeaderView.ResizeMode.Stretch
         )
 
-        # Make Action column small
+        # Make Action column small (fixed: sizing to contents would
+        # measure every row)
         self.horizontalHeader().setSectionResizeMode(
-            6, QHeaderView.ResizeMode.ResizeToContents
+            ACTION_COLUMN, QHeaderView.ResizeMode.Fixed
         )
+        self.setColumnWidth(ACTION_COLUMN, 80)
+
+        # Fixed row height keeps scrolling O(1) on huge lists
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.verticalHeader().setDefaultSectionSize(30)
 
         self.setSelectionBehavior(
-            QTableWidget.SelectionBehavior.SelectRows
+            QTableView.SelectionBehavior.SelectRows
         )
         self.setSelectionMode(
-            QTableWidget.SelectionMode.SingleSelection
+            QTableView.SelectionMode.SingleSelection
         )
 
+        self.setMouseTracking(True)
         self.setAlternatingRowColors(True)
 
+    # ---------------------------------
+    # Share the controller's metadata list
+    # ---------------------------------
+    def set_files(self, files):
+        self.file_model.set_files(files)
 
-    @staticmethod
-    def _safe_datetime(value):
-        if hasattr(value, "tzinfo") and value.tzinfo is not None:
-            return value.replace(tzinfo=None)
-        return value
-
+    def set_locked(self, locked):
+        self.file_model.locked = locked
 
     # ---------------------------------
-    # Add row with red delete button
+    # Add rows
     # ---------------------------------
     def add_file_row(self, file_meta):
-        row = self.rowCount()
-        self.insertRow(row)
-
-        filename_item = QTableWidgetItem(file_meta.filename)
-        if hasattr(file_meta, "path"):
-            filename_item.setData(Qt.ItemDataRole.UserRole, file_meta.path)
-        self.setItem(row, 0, filename_item)
-
-        orig_date = file_meta.file_system_modified # or file_meta.exif_date_taken
-        orig_date = self._safe_datetime(orig_date) if orig_date else "None"
-        self.setItem(row, 1, QTableWidgetItem(str(orig_date)))
-
-        # Detected Date priority:
-# EXIF Date Taken > Filename Date > None
-        detected_date = (
-            file_meta.exif_date_taken
-            or file_meta.filename_date
-        )
-
-        if detected_date:
-            detected_date = self._safe_datetime(detected_date)
-        else:
-            detected_date = "None"
-
-        self.setItem(row, 2, QTableWidgetItem(str(detected_date)))
-
-
-        prop_date = file_meta.proposed_date
-        prop_date = self._safe_datetime(prop_date) if prop_date else "Pending"
-        self.setItem(row, 3, QTableWidgetItem(str(prop_date)))
+        self.file_model.append_files([file_meta])
 
-        prop_name = file_meta.proposed_filename if file_meta.proposed_filename else ""
-        self.setItem(row, 4, QTableWidgetItem(prop_name))
+    def add_file_rows(self, metas):
+        self.file_model.append_files(list(metas))
 
-        self.setItem(row, 5, QTableWidgetItem(file_meta.status))
-
-        # ---- Red Delete Button ----
-        delete_btn = QPushButton("Delete")
-        delete_btn.setCursor(Qt.CursorShape.PointingHandCursor)
-        delete_btn.setFixedHeight(24)
-
-        delete_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #d9534f;
-                color: white;
-                border: none;
-                padding: 2px 8px;
-                border-radius: 4px;
-                font-size: 11px;
-            }
-            QPushButton:hover {
-                background-color: #c9302c;
-            }
-            QPushButton:pressed {
-                background-color: #ac2925;
-            }
-        """)
-
-        delete_btn.clicked.connect(self._delete_button_clicked)
-        self.setCellWidget(row, 6, delete_btn)
+    def sort_rows(self, first=0):
+        self.file_model.sort_rows(first)
 
     # ---------------------------------
-    # Update row
+    # Update rows
     # ---------------------------------
-    def update_row(self, row, file_meta):
-        if 0 <= row < self.rowCount():
-
-            # If file was successfully processed, reflect the new date in Original Date
-            if file_meta.status == "Processed" and file_meta.proposed_date:
-                new_orig = self._safe_datetime(file_meta.proposed_date)
-                self.setItem(row, 1, QTableWidgetItem(str(new_orig)))
-
-            # Normalize proposed date
-            prop_date = file_meta.proposed_date
-            prop_date = (
-                self._safe_datetime(prop_date)
-                if prop_date else "Pending"
-            )
-
-            self.setItem(row, 3, QTableWidgetItem(str(prop_date)))
-            
-            prop_name = file_meta.proposed_filename if file_meta.proposed_filename else ""
-            self.setItem(row, 4, QTableWidgetItem(prop_name))
-            
-            self.setItem(row, 5, QTableWidgetItem(file_meta.status))
-    # ---------------------------------
-    # Handle delete button click
-    # ---------------------------------
-    def _delete_button_clicked(self):
-        button = self.sender()
-        if not button:
-            return
+    def update_row(self, row, file_meta=None):
+        if 0 <= row < self.file_model.rowCount():
+            self.file_model.refresh_rows(row, row)
 
-        index = self.indexAt(button.pos())
-        if index.isValid():
-            self.removeRow(index.row())
+    def refresh_rows(self, first=0, last=None):
+        self.file_model.refresh_rows(first, last)
 
     # ---------------------------------
     # Remove selected row (keyboard)
@@ -158,26 +264,19 @@ class FileListTable(QTableWidget):
     def remove_selected_row(self):
         selected = self.selectionModel().selectedRows()
         for index in sorted(selected, key=lambda x: x.row(), reverse=True):
-            self.removeRow(index.row())
+            self.file_model.removeRows(index.row(), 1)
 
     # ---------------------------------
     # Get all file paths
     # ---------------------------------
     def get_all_files(self) -> list[str]:
-        files = []
-        for row in range(self.rowCount()):
-            item = self.item(row, 0)
-            if item:
-                path = item.data(Qt.ItemDataRole.UserRole)
-                if path:
-                    files.append(path)
-        return files
+        return [file_meta.file_path for file_meta in self.file_model.files]
 
     # ---------------------------------
     # Clear all
     # ---------------------------------
     def clear_all(self):
-        self.setRowCount(0)
+        self.file_model.clear()
 
     # ---------------------------------
     # Delete key support
@@ -81,6 +81,18 @@ class SettingsPanel(QWidget):
         suffix_layout.addWidget(self.suffix_input)
         rename_layout.addLayout(suffix_layout)
         
+        template_layout = QHBoxLayout()
+        template_layout.addWidget(QLabel("Name Template:"))
+        self.template_input = QLineEdit()
+        self.template_input.setPlaceholderText("{date:%Y/%m}/{date:%Y%m%d_%H%M%S}_{seq:04}{ext}")
+        self.template_input.setToolTip(
+            "Overrides the format, prefix and suffix above when set.\n"
+            "Tokens: {date:strftime}, {seq:04}, {source}, {stem}, {ext}.\n"
+            "A / sorts files into date folders."
+        )
+        template_layout.addWidget(self.template_input)
+        rename_layout.addLayout(template_layout)
+        
         rename_group.setLayout(rename_layout)
         layout.addWidget(rename_group)
         
@@ -126,5 +138,6 @@ class SettingsPanel(QWidget):
             'date_format': self.date_format_combo.currentText(),
             'prefix': self.prefix_input.text().strip(),
             'suffix': self.suffix_input.text().strip(),
+            'name_template': self.template_input.text().strip(),
             'output_dir': self.output_dir_path,
         }
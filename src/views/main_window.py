@@ -26,8 +26,13 @@ class MainWindow(QMainWindow):
         self.clear_btn = QPushButton("Clear List")
         self.clear_btn.setObjectName("secondaryButton")
         
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setObjectName("secondaryButton")
+        self.cancel_btn.setVisible(False)
+        
         toolbar_layout.addWidget(self.add_folder_btn)
         toolbar_layout.addWidget(self.add_files_btn)
+        toolbar_layout.addWidget(self.cancel_btn)
         toolbar_layout.addStretch()
         toolbar_layout.addWidget(self.clear_btn)
         main_layout.addLayout(toolbar_layout)
@@ -61,11 +66,12 @@ class MainWindow(QMainWindow):
     # -------------------------------------------------
     # PROGRESS / DONE
     # -------------------------------------------------
-    def update_progress(self, current, total):
-        percent = int((current / total) * 100)
-        self.progress_bar.setValue(percent)
+    def update_progress(self, snapshot, verb="Processing"):
+        """Shows a ProgressSnapshot; called at most once per UI frame."""
+        self.progress_bar.setMaximum(max(snapshot.total, 1))
+        self.progress_bar.setValue(snapshot.done)
+        self.status_label.setText(snapshot.describe(verb))
 
-    def processing_done(self):
-        self.progress_bar.setValue(100)
-        self.status_label.setText("Done ✅")
-        self.file_table.show_clear_button()
+    def processing_done(self, message="Done ✅"):
+        self.progress_bar.setValue(self.progress_bar.maximum())
+        self.status_label.setText(message)
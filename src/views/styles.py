@@ -50,7 +50,7 @@ QPushButton#secondaryButton:hover {
     background-color: #d1d1d6;
 }
 
-QTableWidget {
+QTableView {
     border: 1px solid #d1d1d6;
     border-radius: 8px;
     background-color: white;
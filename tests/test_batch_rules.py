@@ -0,0 +1,75 @@
+"""
+Parity of BatchRuleEvaluator with ProcessingController.apply_rules.
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.controllers.batch_rules import BatchRuleEvaluator
+from src.controllers.processing_controller import ProcessingController
+from src.models.metadata_model import FileMetadata
+from src.models.metadata_store import MetadataStore
+
+pytest.importorskip("numpy")
+
+BASE_RULES = {
+    "use_exif": True,
+    "use_filename": True,
+    "use_earliest": False,
+    "offset_hours": 0,
+    "manual_date": None,
+    "enable_rename": True,
+    "date_format": "YYYYMMDD_HHMMSS",
+    "prefix": "IMG_",
+    "suffix": "",
+}
+
+
+def _metas(count: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+
+    def some_date(chance):
+        if rng.random() >= chance:
+            return None
+        return datetime(2000, 1, 1) + timedelta(seconds=rng.randrange(25 * 365 * 86400))
+
+    metas = []
+    for i in range(count):
+        taken = some_date(0.6)
+        metas.append(FileMetadata(
+            file_path=f"/photos/{i // 50:03d}/file{i}.jpg",
+            filename=f"file{i}.jpg",
+            extension=".jpg",
+            exif_date_taken=taken,
+            exif_date_digitized=taken,
+            file_system_created=some_date(0.9),
+            file_system_modified=some_date(0.9),
+            filename_date=some_date(0.4),
+        ))
+    return metas
+
+
+@pytest.mark.parametrize("changes", [
+    {},
+    {"offset_hours": 2},
+    {"offset_hours": 5.5},
+    {"offset_hours": -3.75},
+    {"use_exif": False, "use_filename": False, "use_earliest": True, "offset_hours": 0.1},
+    {"manual_date": datetime(2020, 5, 6, 7, 8, 9, 123), "offset_hours": 1.5},
+    {"name_template": "{date:%Y/%m}/{seq:04}_{source}{ext}"},
+])
+def test_matches_apply_rules(changes):
+    rules = dict(BASE_RULES, **changes)
+    processor = ProcessingController()
+    metas = _metas(300)
+
+    store = MetadataStore(metas)
+    assert BatchRuleEvaluator(processor).evaluate(store, rules) == (0, len(metas) - 1)
+
+    for seq, meta in enumerate(metas, 1):
+        processor.apply_rules(meta, rules, seq)
+        row = store[seq - 1]
+        assert (row.proposed_date, row.proposed_source, row.proposed_filename) == (
+            meta.proposed_date, meta.proposed_source, meta.proposed_filename
+        )
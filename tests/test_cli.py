@@ -0,0 +1,49 @@
+"""
+Command line runs over a generated folder.
+"""
+import os
+from datetime import datetime
+
+import pytest
+
+from benchmarks.corpus import exif_jpeg
+from src import cli
+
+
+@pytest.fixture
+def photos(tmp_path, monkeypatch):
+    # Keep the scan manifest and metadata cache out of the user's folders
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+    folder = tmp_path / "photos"
+    folder.mkdir()
+    for i in range(3):
+        (folder / f"photo{i}.jpg").write_bytes(exif_jpeg(datetime(2020, 1, 1, 10, 0, i)))
+    return folder
+
+
+def _run(*args):
+    return cli.main([*args, "--output", os.devnull])
+
+
+def test_changed_only_apply_records_renamed_files(photos, capsys):
+    args = [str(photos), "--changed-only", "--apply", "--rename",
+            "--template", "{stem}_{date:%Y%m%d}{ext}", "--no-cache"]
+
+    assert _run(*args) == 0
+    assert "3 added, 0 modified, 0 removed" in capsys.readouterr().err
+    names = sorted(os.listdir(photos))
+    assert names == ["photo0_20200101.jpg", "photo1_20200101.jpg", "photo2_20200101.jpg"]
+
+    assert _run(*args) == 0
+    assert "0 added, 0 modified, 0 removed, 3 unchanged" in capsys.readouterr().err
+    assert sorted(os.listdir(photos)) == names
+
+
+def test_changed_only_dry_run_keeps_files_pending(photos, capsys):
+    args = [str(photos), "--changed-only", "--no-cache"]
+
+    for _ in range(2):
+        assert _run(*args) == 0
+        # Nothing was applied, so nothing is recorded
+        assert "3 added, 0 modified, 0 removed" in capsys.readouterr().err
@@ -0,0 +1,175 @@
+"""
+Parity of FilenameParser with the dateutil-based parser it replaced.
+
+The legacy parser is kept below as the reference. Run with:
+    python -m pytest tests
+"""
+import random
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.corpus import filename_mix
+from src.utils.filename_parser import FilenameParser
+
+
+def legacy_extract_date(filename: str, dateutil_parser):
+    """FilenameParser.extract_date before the compiled matcher."""
+    now_year = datetime.now().year + 1
+
+    iso_patterns = [
+        r'(19\d{2}|20\d{2})[-_.](0[1-9]|1[0-2])[-_.](0[1-9]|[12]\d|3[01])'
+        r'(?:[ T_.-]?(?:[01]\d|2[0-3])'
+        r'[:_.-]?[0-5]\d'
+        r'[:_.-]?[0-5]\d)?',
+
+        r'(19\d{2}|20\d{2})(0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])'
+        r'(?:[_-]?(?:[01]\d|2[0-3])[0-5]\d[0-5]\d)?',
+    ]
+    dmy_patterns = [
+        r'(0[1-9]|[12]\d|3[01])[-_.](0[1-9]|1[0-2])[-_.](19\d{2}|20\d{2})'
+        r'(?:[ T_.-]?(?:[01]\d|2[0-3])'
+        r'[:_.-]?[0-5]\d'
+        r'[:_.-]?[0-5]\d)?'
+    ]
+
+    for patterns, options in ((iso_patterns, {"yearfirst": True}), (dmy_patterns, {"dayfirst": True})):
+        for pattern in patterns:
+            match = re.search(pattern, filename)
+            if match:
+                try:
+                    dt = dateutil_parser.parse(match.group(0), fuzzy=True, **options)
+                    if 1970 <= dt.year <= now_year:
+                        return dt
+                except Exception:
+                    pass
+    return None
+
+
+# -------------------------------------------------
+# ACCEPTED DIFFERENCES
+# -------------------------------------------------
+# Where the legacy parser disagrees with the text its own regex captured,
+# because dateutil misread it. The new parser returns the captured fields.
+
+def _tz_offset_misread(name, old, new):
+    # Screenshot_2023-01-05-12-30-45: "-30-45" was read as a UTC offset
+    return old is not None and old.tzinfo is not None
+
+
+def _separated_time_rejected(name, old, new):
+    # 2023-01-05 12.30.45 / 2023_01_05-12_30_45: dateutil rejects times
+    # separated by dots or underscores, so nothing was found
+    return old is None and new is not None and re.search(f"{new:%H}[._]{new:%M}[._]{new:%S}", name)
+
+
+def _current_year_substituted(name, old, new):
+    # A field dateutil could not place was replaced by the current year
+    return old is not None and old.year == datetime.now().year and str(old.year) not in name
+
+
+ACCEPTED_DIFFERENCES = (_tz_offset_misread, _separated_time_rejected, _current_year_substituted)
+
+# Names where the new parser intentionally differs, with its result
+INTENTIONAL_CHANGES = {
+    # An invalid match no longer ends a pattern's search: the same
+    # pattern is retried further on (legacy: None)
+    "20230230_20230105.jpg": datetime(2023, 1, 5),
+    # Vendor styles are tried before the generic ones, so their own date
+    # wins over a generic date later in the name (legacy: 2022-01-01)
+    "IMG_20230105_123045_2022-01-01.jpg": datetime(2023, 1, 5, 12, 30, 45),
+    "Screenshot_20230105-123045_2022-01-01.png": datetime(2023, 1, 5, 12, 30, 45),
+}
+
+# Extra styles on top of the benchmark corpus mix, including invalid and
+# out-of-range dates
+EXTRA_STYLES = [
+    "{:%Y%m%d_%H%M%S}",
+    "{:%Y%m%d-%H%M%S}",
+    "{:%Y%m%d}",
+    "{:%Y-%m-%d}",
+    "{:%Y_%m_%d-%H_%M_%S}",
+    "{:%Y.%m.%d_%H%M%S}",
+    "{:%Y-%m-%dT%H%M%S}",
+    "{:%d-%m-%Y}",
+    "{:%d.%m.%Y %H-%M-%S}",
+    "{:%d_%m_%Y_%H%M%S}",
+    "Screenshot_{:%Y%m%d-%H%M%S}",
+    "VID-{:%Y%m%d}-WA0007",
+    "scan {:%d-%m-%Y} {:%Y%m%d}",
+    "{:%Y-%m-%d} copy {:%d-%m-%Y}",
+]
+EXTRA_LITERALS = [
+    "2023-02-30_20230105",
+    "05-01-2023-10-20-30",
+    "31-02-2023",
+    "20231301_120000",
+    "1969-12-31",
+    "2099-01-01",
+    "DSC01234",
+    "holiday 2019",
+    "IMG_20230105",
+]
+
+
+def _generated_names(count: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    names = [name + ".jpg" for name in filename_mix(count, seed)]
+    for _ in range(count):
+        date = datetime(1960, 1, 1) + timedelta(seconds=rng.randrange(80 * 365 * 86400))
+        style = rng.choice(EXTRA_STYLES)
+        names.append(style.format(date, date) + rng.choice([".jpg", "_1.png", ""]))
+    return names + [name + ".jpg" for name in EXTRA_LITERALS]
+
+
+def test_matches_legacy_parser():
+    # Only the reference parser needs dateutil, which the app no longer uses
+    dateutil_parser = pytest.importorskip("dateutil.parser")
+    unexplained = []
+    for name in _generated_names(4000):
+        old = legacy_extract_date(name, dateutil_parser)
+        new = FilenameParser.extract_date(name)
+        if name in INTENTIONAL_CHANGES or (old is not None and old.tzinfo is None and old == new):
+            continue
+        if old is None and new is None:
+            continue
+        if not any(accepted(name, old, new) for accepted in ACCEPTED_DIFFERENCES):
+            unexplained.append((name, old, new))
+    assert unexplained == []
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("IMG_20230105_123045.jpg", datetime(2023, 1, 5, 12, 30, 45)),
+    ("IMG-20230105-WA0001.jpg", datetime(2023, 1, 5)),
+    ("PXL_20230105_123045123.jpg", datetime(2023, 1, 5, 12, 30, 45)),
+    ("Screenshot_2023-01-05-12-30-45.png", datetime(2023, 1, 5, 12, 30, 45)),
+    ("2023-01-05 12.30.45.jpg", datetime(2023, 1, 5, 12, 30, 45)),
+    ("05-01-2023_beach.jpg", datetime(2023, 1, 5)),
+    # An invalid date does not hide a valid one of a later pattern
+    ("2023-02-30_20230105.jpg", datetime(2023, 1, 5)),
+    # Year-first patterns keep priority over day-first ones
+    ("05-01-2023-10-20-30.jpg", datetime(2023, 10, 20)),
+    ("DSC01234.jpg", None),
+    ("holiday 2019.jpg", None),
+    ("1969-12-31.jpg", None),
+    *INTENTIONAL_CHANGES.items(),
+])
+def test_extract_date(name, expected):
+    assert FilenameParser.extract_date(name) == expected
+
+
+def test_register_pattern():
+    saved = FilenameParser.PATTERNS
+    try:
+        FilenameParser.register_pattern(
+            "camera_roll",
+            r'roll(?P<year>\d{4})(?P<month>\d{1,2})(?P<day>\d{2})',
+            priority=0,
+            hint="roll",
+        )
+        assert FilenameParser.extract_date("roll2023105.jpg") == datetime(2023, 1, 5)
+        assert FilenameParser.extract_date("IMG_20230105_123045.jpg") == datetime(2023, 1, 5, 12, 30, 45)
+    finally:
+        FilenameParser.PATTERNS = saved
+        FilenameParser._compiled = None
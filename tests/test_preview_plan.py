@@ -0,0 +1,108 @@
+"""
+PreviewPlan re-planning only what changed matches planning from scratch.
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.controllers.batch_rules import BatchRuleEvaluator
+from src.controllers.preview_plan import PreviewPlan
+from src.controllers.processing_controller import NAME_CLASH, ProcessingController
+from src.models.metadata_model import FileMetadata
+from src.models.metadata_store import DATE_FIELDS, MetadataStore
+
+RULES = {
+    "use_exif": True,
+    "offset_hours": 0,
+    "enable_rename": True,
+    "name_template": "{date:%Y%m%d}{ext}",
+}
+
+
+def _preview(store, plan, evaluator, rules):
+    stale = store.stale_rows()
+    changed = evaluator.evaluate(store, rules)
+    return plan.update(store, rules, changed, stale)
+
+
+def _planned_from_scratch(store, rules) -> list:
+    fresh = MetadataStore([
+        FileMetadata(
+            m.file_path, m.filename, m.extension,
+            **{name: getattr(m, name) for name in DATE_FIELDS if name != "proposed_date"},
+        )
+        for m in store
+    ])
+    evaluator = BatchRuleEvaluator(ProcessingController())
+    _preview(fresh, PreviewPlan(evaluator.processor, evaluator), evaluator, rules)
+    return [(m.proposed_filename, m.status) for m in fresh]
+
+
+@pytest.fixture
+def setup(tmp_path):
+    rng = random.Random(1)
+
+    def meta(i):
+        taken = datetime(2020, 1, 1) + timedelta(days=rng.randrange(30))
+        return FileMetadata(
+            str(tmp_path / f"d{i % 7}" / f"f{i}.jpg"), f"f{i}.jpg", ".jpg",
+            exif_date_taken=taken if rng.random() < 0.9 else None,
+        )
+
+    store = MetadataStore([meta(i) for i in range(600)])
+    evaluator = BatchRuleEvaluator(ProcessingController())
+    plan = PreviewPlan(evaluator.processor, evaluator)
+    _preview(store, plan, evaluator, RULES)
+    return store, plan, evaluator, meta, rng
+
+
+def _assert_matches(store, rules=RULES):
+    assert [(m.proposed_filename, m.status) for m in store] == _planned_from_scratch(store, rules)
+
+
+def test_full_plan_flags_clashes(setup):
+    store, plan, *_ = setup
+    _assert_matches(store)
+    assert plan.conflicts
+    assert all(store[c.row].status == NAME_CLASH for c in plan.conflicts)
+
+
+def test_unchanged_preview_plans_nothing(setup):
+    store, plan, evaluator, *_ = setup
+    assert _preview(store, plan, evaluator, RULES) == []
+    _assert_matches(store)
+
+
+def test_edits_replan_only_their_folders(setup):
+    store, plan, evaluator, _, rng = setup
+    edited = [7 * rng.randrange(len(store) // 7) for _ in range(5)]
+    for row in edited:
+        store[row].exif_date_taken = datetime(2020, 1, rng.randrange(1, 30))
+    rows = _preview(store, plan, evaluator, RULES)
+    assert set(edited) <= set(rows)
+    # Every edited row lies in folder d0, so rows of other folders are left alone
+    assert all(row % 7 == 0 for row in rows)
+    _assert_matches(store)
+
+
+def test_appended_rows_are_planned(setup):
+    store, plan, evaluator, meta, _ = setup
+    store.extend([meta(len(store) + i) for i in range(20)])
+    _preview(store, plan, evaluator, RULES)
+    _assert_matches(store)
+
+
+def test_invalidate_after_delete_resets_right_rows(setup):
+    store, plan, evaluator, *_ = setup
+    del store[3]
+    plan.invalidate()
+    _preview(store, plan, evaluator, RULES)
+    _assert_matches(store)
+
+
+def test_rules_change_plans_everything(setup):
+    store, plan, evaluator, *_ = setup
+    rules = dict(RULES, name_template="{date:%Y%m}{ext}")
+    _preview(store, plan, evaluator, rules)
+    _assert_matches(store, rules)
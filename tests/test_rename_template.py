@@ -0,0 +1,59 @@
+"""
+Compiled name templates: rendering and template validation.
+"""
+from datetime import datetime
+
+import pytest
+
+from src.utils.rename_template import RenameTemplate, legacy_template
+
+DATES = [datetime(2023, 1, 5, 8, 30, 0), datetime(2023, 1, 5, 17, 45, 59, 120000)]
+
+
+@pytest.mark.parametrize("strftime", [
+    "%Y%m%d_%H%M%S",
+    "%Y/%m/%d",
+    "%Y-%m-%d %H.%M.%S.%f",
+    "%Y%m%d_%T",
+    "%d %b %Y %I%p",
+    "%s",
+])
+def test_date_matches_strftime(strftime):
+    render = RenameTemplate("{date:" + strftime + "}{ext}").render
+    for date in DATES:
+        assert render(date, ".jpg") == date.strftime(strftime) + ".jpg"
+
+
+def test_tokens():
+    render = RenameTemplate("{date:%Y/%m}/{date:%Y%m%d}_{seq:04}_{source}_{stem}{ext}").render
+    assert render(DATES[0], ".jpg", "IMG_1", "exif", 7) == "2023/01/20230105_0007_exif_IMG_1.jpg"
+
+
+def test_legacy_template():
+    render = RenameTemplate(legacy_template("YYYY-MM-DD", "A{", "}")).render
+    assert render(DATES[0], ".png") == "A{2023-01-05}.png"
+
+
+@pytest.mark.parametrize("template", [
+    "",
+    "/photos/{stem}{ext}",
+    "../{stem}{ext}",
+    "{date:%Y}/../../{stem}{ext}",
+    "..\\{stem}{ext}",
+    "\\{stem}{ext}",
+    "\\\\server\\share\\{stem}{ext}",
+    "C:{stem}{ext}",
+    "C:\\photos\\{stem}{ext}",
+    "C:/photos/{stem}{ext}",
+    "{date:%Y}//{stem}{ext}",
+    "{date:%Y}/./{stem}{ext}",
+])
+def test_rejects_names_outside_the_folder(template):
+    with pytest.raises(ValueError):
+        RenameTemplate(template)
+
+
+@pytest.mark.parametrize("template", ["{unknown}", "{date", "{seq:q}", "{ext:x}"])
+def test_rejects_invalid_templates(template):
+    with pytest.raises(ValueError):
+        RenameTemplate(template)
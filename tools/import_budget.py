@@ -0,0 +1,85 @@
+"""
+Startup import budget check.
+
+Runs `python -X importtime -c "import <module>"` for the app's entry
+modules and fails when a heavy dependency is loaded eagerly or the
+cumulative import time goes over budget.
+
+Usage:
+    python tools/import_budget.py [--scale 1.5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies that must only load once a file that needs them is seen
+HEAVY_MODULES = {"PIL", "piexif", "hachoir", "numpy"}
+
+# module -> (budget in ms, modules that must not be imported)
+BUDGETS = {
+    "src.cli": (250, HEAVY_MODULES | {"PyQt6"}),
+    "src.controllers.processing_controller": (200, HEAVY_MODULES | {"PyQt6"}),
+    "src.views.main_window": (400, HEAVY_MODULES),
+    "src.controllers.main_controller": (500, HEAVY_MODULES),
+}
+
+
+def measure(module: str):
+    """Returns (cumulative import time in ms, set of top-level packages loaded)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+
+    total_us = 0
+    loaded = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        name = name.strip()
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        loaded.add(name.split(".")[0])
+        if name == module:
+            total_us = int(cumulative)
+
+    return total_us / 1000, loaded
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--scale", type=float, default=1.0,
+        help="Multiply every time budget (e.g. for slow CI machines)",
+    )
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module, (budget_ms, forbidden) in BUDGETS.items():
+        # Best of three to smooth out a cold disk cache
+        runs = [measure(module) for _ in range(3)]
+        elapsed = min(ms for ms, _ in runs)
+        eager = sorted(forbidden & runs[0][1])
+        limit = budget_ms * args.scale
+
+        ok = elapsed <= limit and not eager
+        failed |= not ok
+        line = f"{'OK  ' if ok else 'FAIL'} {module}: {elapsed:.1f} ms (budget {limit:.0f} ms)"
+        if eager:
+            line += f", eagerly imports {', '.join(eager)}"
+        print(line)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())